@@ -0,0 +1,13 @@
+"""핵심 처리 경로 벤치마크.
+
+네트워크 없이(합성 경계 GeoJSON, 로컬 CSV 주가 소스) 합성 데이터로 각 페이지의 무거운
+경로를 화면 없이 실행하고, 실행 시간과 최대 메모리를 JSON으로 출력합니다.
+
+    python -m benchmarks                       # 1k, 100k 행
+    python -m benchmarks --scales 1k,100k,10m --output bench.json
+    python -m benchmarks --cases region.normalize,spatial.nearest
+
+페이지별 콜드 스타트(import·첫 렌더링 시간)는 benchmarks/startup.py를 보세요.
+
+    python -m benchmarks.startup
+"""
@@ -0,0 +1,294 @@
+"""벤치마크 실행기. 사용법은 benchmarks/__init__.py를 보세요.
+
+케이스마다 준비(setup, 측정 제외)를 한 뒤 캐시를 모두 비우고 실행해 '처음 보는 데이터'
+비용을 잽니다. 시간은 repeat회 중 가장 빠른 값, 최대 메모리는 tracemalloc으로 한 번 더
+실행해 잰 값입니다. (tracemalloc은 느려지므로 시간 측정과 따로 실행합니다)
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from benchmarks import datasets
+from utils import analytics, cache, choropleth, distance, downsample, geo, ledger, pipeline, prices, spatial
+from utils.region import normalize_regions, split_regions
+
+SCALES = {"1k": 1_000, "100k": 100_000, "10m": 10_000_000}
+DEFAULT_SCALES = ("1k", "100k")
+
+CASES = {}
+
+
+def case(name, scaled=True):
+    """setup(rows, workdir) -> 측정할 함수 를 등록합니다. scaled=False면 규모와 무관해 한 번만 잽니다."""
+    def register(setup):
+        CASES[name] = (setup, scaled)
+        return setup
+    return register
+
+
+# -----------------------------
+# 케이스
+# -----------------------------
+@case("ingest.facility_csv")
+def _ingest(rows, workdir):
+    upload = datasets.to_upload(datasets.facility_frame(rows), "facility.csv")
+
+    def run():
+        plan = pipeline.plan(upload, "facility")
+        return pipeline.ingest(upload, plan=plan.select([plan.region_col]))
+    return run
+
+
+@case("ingest.facility_parts")
+def _ingest_parts(rows, workdir):
+    # 병원·의원·약국으로 나뉜 세 파일을 주소 컬럼만 읽어 합칩니다. (PARSE_WORKERS개 프로세스)
+    # 첫 실행에는 작업 프로세스를 띄우는 시간이 들어가므로 repeat 2회 이상에서 보세요.
+    frame = datasets.facility_frame(rows)
+    uploads = [
+        datasets.to_upload(part, f"facility-{i}.csv")
+        for i, part in enumerate((frame.iloc[:rows // 3], frame.iloc[rows // 3:2 * rows // 3], frame.iloc[2 * rows // 3:]))
+    ]
+
+    def run():
+        parts = pipeline.plan_parts(uploads, "facility")
+        return pipeline.ingest_parts(parts, ["소재지전체주소"])
+    return run
+
+
+@case("region.normalize")
+def _normalize(rows, workdir):
+    values = datasets.addresses(rows)
+    return lambda: normalize_regions(values)
+
+
+@case("region.split")
+def _split(rows, workdir):
+    values = datasets.addresses(rows)
+    return lambda: split_regions(values)
+
+
+def _frames(rows):
+    elder = pipeline.Frame("bench-elder", datasets.elder_frame())
+    facility = pipeline.Frame(f"bench-facility-{rows}", datasets.facility_frame(rows)[["소재지전체주소"]])
+    return elder, facility
+
+
+@case("pipeline.sido_ratio")
+def _sido(rows, workdir):
+    elder, facility = _frames(rows)
+
+    def run():
+        schema = pipeline.detect_schema(elder, "elder")
+        elder_agg = pipeline.aggregate_elder(pipeline.normalize_region(schema.frame, schema.region_col), schema.target_col)
+        facility_agg = pipeline.aggregate_facility(pipeline.normalize_region(facility, "소재지전체주소"))
+        return pipeline.metrics(pipeline.join(elder_agg, facility_agg))
+    return run
+
+
+@case("pipeline.drilldown")
+def _drilldown(rows, workdir):
+    elder, facility = _frames(rows)
+
+    def run():
+        schema = pipeline.detect_schema(elder, "elder")
+        elder_cube = pipeline.region_cube(schema.frame, schema.region_col, (schema.target_col,), True)
+        facility_cube = pipeline.region_cube(facility, "소재지전체주소")
+        # 큐브를 만든 뒤의 수준 전환·드릴다운은 조회만 합니다.
+        for level in ("시도", "시군구", "읍면동"):
+            pipeline.drilldown(elder_cube, facility_cube, schema.target_col, level)
+        return pipeline.drilldown(elder_cube, facility_cube, schema.target_col, "시군구", (datasets.SIDO[0],))
+    return run
+
+
+@case("ledger.update")
+def _ledger(rows, workdir):
+    # 원장을 만들어 두고, 1%가 빠지고 1%가 새로 생긴 배포본과 원래 목록을 번갈아 반영합니다.
+    ledger.LEDGER_DIR = os.path.join(workdir, "ledgers")
+    df = datasets.facility_frame(rows)[["암호화요양기호", "소재지전체주소"]].reset_index(drop=True)
+    changed = max(1, rows // 100)
+    added = df.iloc[:changed].assign(암호화요양기호=lambda d: d["암호화요양기호"] + "N")
+    versions = [pd.concat([df.iloc[changed:], added], ignore_index=True), df]
+    name = f"bench-{rows}"
+    ledger.apply(name, df, "암호화요양기호", "소재지전체주소")
+    counter = iter(range(1_000_000))
+
+    def run():
+        return ledger.apply(name, versions[next(counter) % 2], "암호화요양기호", "소재지전체주소")
+    return run
+
+
+@case("spatial.nearest")
+def _nearest(rows, workdir):
+    elder_lat, elder_lon = datasets.coordinates(rows, seed=1)
+    fac_lat, fac_lon = datasets.coordinates(max(100, rows // 100), seed=2)
+
+    def run():
+        index = spatial.FacilityIndex(fac_lat, fac_lon)
+        _, idx = index.nearest(elder_lat, elder_lon)
+        return distance.paired_distance(elder_lat, elder_lon, fac_lat[idx], fac_lon[idx], method="projected")
+    return run
+
+
+@case("figure.choropleth", scaled=False)
+def _figure(rows, workdir):
+    # 경계 저장소와 정적 파일(정적 서빙이 켜진 설정이면 URL 경로로 그립니다)을 임시 디렉터리에 둡니다.
+    geo.GEO_DIR = os.path.join(workdir, "geo")
+    choropleth.STATIC_DIR = os.path.join(workdir, "static")
+    geo.build_store("sido", datasets.write_boundaries(workdir))
+    df = pd.DataFrame({"지역": list(geo.SIDO_BY_CODE.values()), "값": np.random.default_rng(0).random(17)})
+
+    def run():
+        fig = choropleth.figure(
+            df, level="sido", locations="지역", color="값",
+            color_continuous_scale="RdYlGn", color_continuous_midpoint=0.5,
+            geos=dict(fitbounds="locations", visible=False),
+        )
+        # Streamlit이 st.plotly_chart에서 하는 직렬화까지 포함합니다.
+        return fig.to_json()
+    return run
+
+
+@case("prices.refresh_and_read")
+def _prices(rows, workdir):
+    directory = os.path.join(workdir, f"prices-{rows}")
+    tickers, start, end = datasets.write_prices(directory, rows)
+    source = prices.CSVSource(directory)
+    counter = iter(range(1_000_000))
+
+    def run():
+        # 매번 빈 저장소에서 시작해 로컬 CSV 소스(yfinance 대용)로 채웁니다.
+        store = prices.PriceStore(os.path.join(workdir, f"prices-{rows}-{next(counter)}.sqlite"))
+        prices._recent_fetches.clear()
+        prices.refresh(tickers, start, end, source=source, store=store, rate=None, max_workers=8)
+        return store.read(tickers, start, end)
+    return run
+
+
+@case("prices.analytics")
+def _analytics(rows, workdir):
+    directory = os.path.join(workdir, f"analytics-{rows}")
+    tickers, start, end = datasets.write_prices(directory, rows)
+    source = prices.CSVSource(directory)
+    wide = pd.concat({ticker: source.fetch(ticker, start, end) for ticker in tickers}, axis=1)
+
+    def run():
+        summary = analytics.summary(wide)
+        analytics.correlation(analytics.daily_returns(wide))
+        for column in wide.columns[:50]:
+            downsample.downsample(wide.index.to_numpy(), wide[column].to_numpy(), 2_000)
+        return summary
+    return run
+
+
+# -----------------------------
+# 실행
+# -----------------------------
+def _measure(fn, repeat, memory):
+    best = float("inf")
+    for _ in range(repeat):
+        cache.clear_all()
+        gc.collect()
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    peak = None
+    if memory:
+        cache.clear_all()
+        gc.collect()
+        tracemalloc.start()
+        try:
+            fn()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return best, peak
+
+
+def _git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(scales=DEFAULT_SCALES, cases=None, repeat=3, memory=True, log=sys.stderr):
+    """선택한 케이스·규모를 실행하고 결과 사전(JSON으로 직렬화 가능)을 돌려줍니다."""
+    names = list(cases or CASES)
+    unknown = [n for n in names if n not in CASES]
+    if unknown:
+        raise ValueError(f"알 수 없는 케이스: {', '.join(unknown)} (가능: {', '.join(CASES)})")
+    results = []
+    with tempfile.TemporaryDirectory(prefix="bench-") as workdir:
+        for name in names:
+            setup, scaled = CASES[name]
+            for scale in (scales if scaled else scales[:1]):
+                rows = SCALES[scale]
+                fn = setup(rows, workdir)
+                # 큰 규모는 한 번만 실행합니다.
+                seconds, peak = _measure(fn, repeat if rows < 1_000_000 else 1, memory)
+                result = {
+                    "case": name,
+                    "scale": scale if scaled else None,
+                    "rows": rows if scaled else None,
+                    "seconds": round(seconds, 6),
+                    "peak_bytes": peak,
+                }
+                results.append(result)
+                print(f"{name:28s} {scale if scaled else '-':>5s} {seconds:9.4f}s"
+                      + (f" {peak / 1024 ** 2:10.1f}MB" if peak is not None else ""), file=log)
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "revision": _git_revision(),
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "repeat": repeat,
+        },
+        "results": results,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="핵심 처리 경로 벤치마크")
+    parser.add_argument("--scales", default=",".join(DEFAULT_SCALES), help=f"쉼표로 구분 ({', '.join(SCALES)})")
+    parser.add_argument("--cases", default=None, help=f"쉼표로 구분 (기본: 전체 — {', '.join(CASES)})")
+    parser.add_argument("--repeat", type=int, default=3, help="시간 측정 반복 횟수 (가장 빠른 값)")
+    parser.add_argument("--no-memory", action="store_true", help="tracemalloc 최대 메모리 측정 생략")
+    parser.add_argument("--output", default=None, help="결과 JSON 파일 (기본: 표준 출력)")
+    args = parser.parse_args(argv)
+
+    scales = [s.strip().lower() for s in args.scales.split(",") if s.strip()]
+    bad = [s for s in scales if s not in SCALES]
+    if bad:
+        parser.error(f"알 수 없는 규모: {', '.join(bad)}")
+    cases = [c.strip() for c in args.cases.split(",")] if args.cases else None
+    try:
+        report = run(scales, cases, args.repeat, not args.no_memory)
+    except ValueError as e:
+        parser.error(str(e))
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
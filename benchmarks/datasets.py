@@ -0,0 +1,149 @@
+"""벤치마크용 합성 데이터.
+
+시도·시군구·읍면동 명칭은 실제 형식(정식 명칭/약칭/옛 명칭, 일반구가 있는 시,
+도로명주소 참고항목)을 흉내 내지만 이름 자체는 만들어낸 것입니다.
+"""
+import io
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from utils.geo import SIDO_BY_CODE
+from utils.region import SIDO_ALIASES
+
+SIDO = list(SIDO_ALIASES)
+# 시도마다 만들 시군구·읍면동 수 (전국 약 250개 시군구, 3,500개 읍면동 규모)
+SIGUNGU_PER_SIDO = 15
+DONG_PER_SIGUNGU = 14
+
+# 대한민국 대략적 범위
+LAT_RANGE = (33.2, 38.6)
+LON_RANGE = (126.0, 129.6)
+
+_SYLLABLES = list("가나다라마바사아자차카타파하강남동서북중신성덕양원")
+
+
+class Upload(io.BytesIO):
+    """Streamlit UploadedFile 대용 (이름이 있는 BytesIO)."""
+
+    def __init__(self, data, name):
+        super().__init__(data)
+        self.name = name
+
+
+def _names(rng, n, suffix):
+    first = rng.choice(_SYLLABLES, n)
+    second = rng.choice(_SYLLABLES, n)
+    return [f"{a}{b}{suffix}" for a, b in zip(first, second)]
+
+
+def regions(seed=0):
+    """(시도, 시군구 토큰, 읍면동) 계층 목록. 일부 시는 '○○시 ○○구' 두 토큰입니다."""
+    rng = np.random.default_rng(seed)
+    rows = []
+    for sido in SIDO:
+        for i, sigungu in enumerate(_names(rng, SIGUNGU_PER_SIDO, "구" if "광역" in sido or "특별시" in sido else "시")):
+            if sigungu.endswith("시") and i % 4 == 0:
+                sigungu = f"{sigungu} {_names(rng, 1, '구')[0]}"
+            for dong in _names(rng, DONG_PER_SIGUNGU, "동"):
+                rows.append((sido, sigungu, dong))
+    return rows
+
+
+def addresses(n, seed=0):
+    """시설 주소 n개. 약칭·옛 명칭, 지번/도로명(참고항목) 형식을 섞습니다."""
+    rng = np.random.default_rng(seed)
+    table = regions(seed)
+    picks = rng.integers(0, len(table), n)
+    aliases = {sido: (sido, *SIDO_ALIASES[sido]) for sido in SIDO}
+    form = rng.integers(0, 3, n)
+    numbers = rng.integers(1, 999, n)
+    out = []
+    for idx, kind, number in zip(picks, form, numbers):
+        sido, sigungu, dong = table[idx]
+        name = aliases[sido][number % len(aliases[sido])]
+        if kind == 0:
+            out.append(f"{name} {sigungu} {dong} {number}-{number % 17}")
+        elif kind == 1:
+            out.append(f"{name} {sigungu} {dong[:-1]}로 {number} ({dong})")
+        else:
+            out.append(f"{name} {sigungu} {dong[:-1]}길 {number}")
+    return pd.Series(out, dtype=object)
+
+
+def coordinates(n, seed=0):
+    """대한민국 범위 안의 (위도, 경도) 배열."""
+    rng = np.random.default_rng(seed)
+    return rng.uniform(*LAT_RANGE, n), rng.uniform(*LON_RANGE, n)
+
+
+def facility_frame(n, seed=0):
+    """의료기관 표준데이터 형식의 DataFrame."""
+    rng = np.random.default_rng(seed)
+    lat, lon = coordinates(n, seed + 1)
+    return pd.DataFrame({
+        "암호화요양기호": [f"JDQ4MTAx{i:010d}" for i in range(n)],
+        "요양기관명": [f"기관{i}" for i in range(n)],
+        "종별코드명": rng.choice(["의원", "치과의원", "한의원", "병원", "약국"], n),
+        "소재지전체주소": addresses(n, seed),
+        "좌표(x)": lon,
+        "좌표(y)": lat,
+    })
+
+
+def elder_frame(seed=0):
+    """KOSIS 형식(두 줄 머리글, 전국·시도·시군구 행)의 독거노인 표."""
+    rng = np.random.default_rng(seed)
+    table = regions(seed)
+    labels = ["전국"]
+    for sido in SIDO:
+        labels.append(sido)
+        labels.extend(sorted({f"{sido} {sigungu}" for s, sigungu, _ in table if s == sido}))
+    population = rng.integers(1_000, 50_000, len(labels))
+    header = pd.DataFrame(
+        [["행정구역별", "독거노인가구비율(A÷B×100) (%)", "65세이상 1인가구(A) (가구)"]],
+        columns=["행정구역별", "2024", "2024.1"],
+    )
+    body = pd.DataFrame({"행정구역별": labels, "2024": rng.uniform(5, 20, len(labels)).round(1), "2024.1": population})
+    return pd.concat([header, body], ignore_index=True)
+
+
+def to_upload(df, name, encoding="cp949"):
+    """DataFrame을 업로드 파일 대용 객체로 만듭니다. (공공데이터처럼 CP949 CSV)"""
+    return Upload(df.to_csv(index=False).encode(encoding), name)
+
+
+def write_boundaries(directory, vertices=2_000):
+    """시도 17개의 합성 경계 GeoJSON을 파일로 쓰고 경로를 돌려줍니다. (링마다 vertices개 점)"""
+    features = []
+    theta = np.linspace(0, 2 * np.pi, vertices)
+    for i, (code, name) in enumerate(SIDO_BY_CODE.items()):
+        lat = LAT_RANGE[0] + 0.3 + (i // 4) * 1.1
+        lon = LON_RANGE[0] + 0.4 + (i % 4) * 0.9
+        ring = np.c_[lon + 0.4 * np.cos(theta), lat + 0.5 * np.sin(theta)].round(6).tolist()
+        ring[-1] = ring[0]
+        features.append({
+            "type": "Feature",
+            "properties": {"code": code, "name": name},
+            "geometry": {"type": "Polygon", "coordinates": [ring]},
+        })
+    path = os.path.join(directory, "sido.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"type": "FeatureCollection", "features": features}, f, ensure_ascii=False)
+    return path
+
+
+def write_prices(directory, n_rows, days=2_520, seed=0):
+    """n_rows개 종가를 티커별 CSV(Date, Close)로 씁니다. 티커 하나는 최대 days 영업일입니다."""
+    rng = np.random.default_rng(seed)
+    days = min(days, n_rows)
+    n_tickers = max(1, n_rows // days)
+    dates = pd.bdate_range(end=pd.Timestamp.today().normalize() - pd.Timedelta(days=1), periods=days)
+    tickers = [f"T{i:05d}" for i in range(n_tickers)]
+    os.makedirs(directory, exist_ok=True)
+    for ticker in tickers:
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, days)))
+        pd.DataFrame({"Date": dates, "Close": close}).to_csv(os.path.join(directory, f"{ticker}.csv"), index=False)
+    return tickers, dates[0].date(), dates[-1].date()
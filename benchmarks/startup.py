@@ -0,0 +1,114 @@
+"""페이지별 콜드 스타트 프로파일.
+
+페이지마다 새 파이썬 프로세스(-X importtime)에서 Streamlit AppTest로 첫 화면을 그리고,
+그 페이지가 새로 가져온 모듈의 import 시간과 첫 렌더링 시간을 JSON으로 출력합니다.
+streamlit 자체를 가져오는 시간(baseline)은 따로 보고합니다.
+
+    python -m benchmarks.startup
+    python -m benchmarks.startup --pages pages/00_math.py --top 5 --output startup.json
+
+00_finance.py는 PRICE_DATA_DIR이 없으면 yfinance로 주가를 받으므로 네트워크 시간이 섞입니다.
+"""
+import argparse
+import glob
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MARKER = "--- startup profile: page ---"
+
+# 자식 프로세스에서 실행하는 코드. 표식 전의 import는 baseline, 후의 import는 페이지 몫입니다.
+_CHILD = f"""
+import json, sys, time
+started = time.perf_counter()
+import streamlit
+from streamlit.testing.v1 import AppTest
+baseline = time.perf_counter() - started
+print({MARKER!r}, file=sys.stderr, flush=True)
+started = time.perf_counter()
+at = AppTest.from_file(sys.argv[1], default_timeout=float(sys.argv[2]))
+at.run()
+render = time.perf_counter() - started
+errors = [e.message for e in at.exception]
+print(json.dumps({{"baseline_seconds": baseline, "render_seconds": render, "errors": errors}}))
+"""
+
+
+def _parse_importtime(lines):
+    """-X importtime 출력에서 최상위 import(들여쓰기 없는 줄)의 (모듈, 누적 초) 목록."""
+    modules = []
+    for line in lines:
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|", 2)
+        # 이름 앞 공백 한 칸은 구분자이고, 그보다 깊으면 다른 모듈 안에서 가져온 것입니다.
+        if name.startswith("  "):
+            continue
+        try:
+            modules.append((name.strip(), int(cumulative) / 1e6))
+        except ValueError:
+            continue
+    return modules
+
+
+def profile_page(page, timeout=60.0, top=10):
+    """page 하나를 새 프로세스에서 실행해 import·렌더링 시간을 잽니다."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _CHILD, page, str(timeout)],
+        capture_output=True, text=True, cwd=ROOT,
+    )
+    stderr = proc.stderr.splitlines()
+    split = stderr.index(MARKER) if MARKER in stderr else len(stderr)
+    page_imports = _parse_importtime(stderr[split + 1:])
+    result = {
+        "page": os.path.relpath(page, ROOT),
+        "baseline_import_seconds": round(sum(s for _, s in _parse_importtime(stderr[:split])), 6),
+        "import_seconds": round(sum(s for _, s in page_imports), 6),
+        "render_seconds": None,
+        "top_imports": [
+            {"module": name, "seconds": round(seconds, 6)}
+            for name, seconds in sorted(page_imports, key=lambda item: -item[1])[:top]
+        ],
+        "errors": [],
+    }
+    try:
+        child = json.loads(proc.stdout.strip().splitlines()[-1])
+        result["render_seconds"] = round(child["render_seconds"], 6)
+        result["errors"] = child["errors"]
+    except (IndexError, ValueError, KeyError):
+        result["errors"] = [line for line in stderr[split + 1:] if not line.startswith("import time:")][-5:]
+    return result
+
+
+def default_pages():
+    return [os.path.join(ROOT, "main.py")] + sorted(glob.glob(os.path.join(ROOT, "pages", "*.py")))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.startup", description="페이지별 콜드 스타트 프로파일")
+    parser.add_argument("--pages", default=None, help="쉼표로 구분한 페이지 파일 (기본: main.py와 pages/*.py)")
+    parser.add_argument("--timeout", type=float, default=60.0, help="페이지 하나의 첫 렌더링 제한 시간(초)")
+    parser.add_argument("--top", type=int, default=10, help="페이지마다 보고할 느린 import 수")
+    parser.add_argument("--output", default=None, help="결과 JSON 파일 (기본: 표준 출력)")
+    args = parser.parse_args(argv)
+
+    pages = [os.path.abspath(p.strip()) for p in args.pages.split(",")] if args.pages else default_pages()
+    results = []
+    for page in pages:
+        result = profile_page(page, args.timeout, args.top)
+        results.append(result)
+        render = f"{result['render_seconds']:8.3f}s" if result["render_seconds"] is not None else "   실패"
+        print(f"{result['page']:24s} import {result['import_seconds']:7.3f}s  render {render}"
+              + ("  (오류 있음)" if result["errors"] else ""), file=sys.stderr)
+    text = json.dumps({"python": sys.version.split()[0], "results": results}, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
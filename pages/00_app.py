@@ -1,14 +1,14 @@
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-import io
-import requests
+
+from utils import choropleth, cube, ingest, instrument, pipeline, ui
 
 # -----------------------------
 # 설정 및 제목
 # -----------------------------
 st.set_page_config(page_title="독거노인 대비 의료기관 분포 분석", layout="wide")
 st.title(" 지역별 독거노인 인구 대비 의료기관 분포 분석")
+# 재실행마다 단계별 시간·메모리·캐시 적중을 기록합니다. (DEBUG_PANEL 설정 시 사이드바에 표시)
+ui.debug_panel("00_app")
 
 st.markdown("""
 이 앱은 **지역별 독거노인 인구수**와 **의료기관 수**를 비교하여
@@ -23,24 +23,65 @@ st.markdown("""
 # -----------------------------
 st.sidebar.header(" 데이터 업로드")
 elder_file = st.sidebar.file_uploader("독거노인 인구 파일 (CSV 또는 XLSX)", type=["csv", "xlsx"])
-facility_file = st.sidebar.file_uploader("의료기관 데이터 파일 (CSV 또는 XLSX)", type=["csv", "xlsx"])
+# 병원·의원·약국처럼 나뉜 파일(과 XLSX의 여러 시트)은 함께 올리면 병렬로 읽어 합칩니다.
+facility_files = st.sidebar.file_uploader("의료기관 데이터 파일 (CSV 또는 XLSX, 여러 개 가능)", type=["csv", "xlsx"], accept_multiple_files=True)
+# 대용량 파일은 전체를 읽지 않고 주소 컬럼만 조각 단위로 읽어 지역별 개수를 셉니다.
+stream_facility = st.sidebar.checkbox("의료기관 파일 스트리밍 집계 (대용량 파일용)", key="facility_stream")
+if stream_facility and facility_files and len(facility_files) > 1:
+    # 스트리밍 집계는 파일 하나만 읽으므로, 여러 파일은 병렬 읽기로 대신합니다.
+    st.sidebar.caption("스트리밍 집계는 파일이 하나일 때만 사용합니다. 여러 파일은 병렬로 읽습니다.")
+    stream_facility = False
 
 # -----------------------------
 # 파일 읽기 함수
 # -----------------------------
-def read_any(file):
+def start_read(file, kind):
+    # 앞부분 표본으로 머리글·자료형·지역 컬럼을 정한 뒤, 필요한 컬럼만 한 번 읽습니다.
+    # 파싱은 백그라운드 작업으로 실행하므로 읽는 동안 위젯을 눌러도 처음부터 다시 읽지 않습니다.
+    # 같은 파일을 다시 읽을 때는 파싱 캐시를 사용합니다. (utils.pipeline → utils.ingest)
     if file is None:
         return None
     try:
-        if file.name.endswith(".csv"):
-            raw = file.read()
-            try:
-                return pd.read_csv(io.BytesIO(raw), encoding="utf-8")
-            except UnicodeDecodeError:
-                return pd.read_csv(io.BytesIO(raw), encoding="cp949")
-        elif file.name.endswith(".xlsx"):
-            # read_excel의 기본 동작은 첫 번째 시트를 읽습니다.
-            return pd.read_excel(file)
+        plan = pipeline.plan(file, kind)
+        # 독거노인 파일은 자동으로 고른 지역 컬럼이 틀렸을 때 다른 컬럼을 고를 수 있도록 전체 컬럼을 읽습니다.
+        if kind == "facility" and plan.region_col is not None:
+            # 의료기관 파일은 찾은 지역 컬럼만 읽습니다. (찾지 못하면 직접 고를 수 있도록 전체 컬럼을 읽음)
+            plan = plan.select([plan.region_col])
+        return pipeline.ingest_job(file, plan)
+    except Exception as e:
+        st.error(f"파일 읽기 오류: {e}")
+        return None
+
+
+def start_read_parts(files):
+    # 의료기관 파일·시트마다 계획을 세우고, 파트마다 찾은 주소 컬럼만 작업 프로세스들로 나눠 읽습니다.
+    if not files:
+        return None
+    try:
+        parts = pipeline.plan_parts(files, "facility")
+        found = [(file, plan) for file, plan in parts if plan.region_col is not None]
+        if not found:
+            # 지역 컬럼을 찾지 못하면 직접 고를 수 있도록 전체 컬럼을 읽습니다.
+            return pipeline.ingest_parts_job(parts)
+        # 파일마다 주소 컬럼 이름이 달라도(도로명전체주소/소재지전체주소) 첫 파트의 이름으로 맞춰 합칩니다.
+        region_col = found[0][1].region_col
+        skipped = [ingest.part_label(file, plan) for file, plan in parts if plan.region_col is None]
+        if skipped:
+            st.sidebar.caption(f"주소 컬럼을 찾지 못해 건너뛴 파일·시트: {', '.join(skipped)}")
+        return pipeline.ingest_parts_job([
+            (file, plan.select([plan.region_col]).rename({plan.region_col: region_col})) for file, plan in found
+        ])
+    except Exception as e:
+        st.error(f"파일 읽기 오류: {e}")
+        return None
+
+
+def finish_read(job, label):
+    # 작업이 끝나지 않았으면 진행률을 보여 주고 이번 재실행은 여기서 멈춥니다.
+    if job is None:
+        return None
+    try:
+        return ui.wait_for(job, f"{label} 파일 읽는 중")
     except Exception as e:
         st.error(f"파일 읽기 오류: {e}")
         return None
@@ -48,100 +89,111 @@ def read_any(file):
 # -----------------------------
 # 파일 로드
 # -----------------------------
-df_elder = read_any(elder_file)
-df_facility = read_any(facility_file)
+# 저장된 스냅샷을 고르면 업로드·파싱 없이 메모리 매핑으로 불러옵니다.
+# 두 파일의 읽기 작업을 먼저 모두 시작해 동시에 읽습니다.
+elder_frame = ui.snapshot_picker("독거노인", key="elder")
+elder_job = start_read(elder_file, "elder") if elder_frame is None else None
+
+facility_frame = ui.snapshot_picker("의료기관", key="facility")
+facility_cols = None
+facility_plan = None
+facility_job = None
+if facility_frame is None:
+    if stream_facility:
+        try:
+            # 스트리밍 집계는 첫 번째 파일(첫 시트)만 계획의 머리글 행대로 읽습니다.
+            facility_plan = pipeline.plan(facility_files[0], "facility") if facility_files else None
+            facility_cols = list(facility_plan.columns) if facility_plan is not None else None
+        except Exception as e:
+            st.error(f"파일 읽기 오류: {e}")
+    else:
+        facility_job = start_read_parts(facility_files)
+
+if elder_job is not None:
+    elder_frame = finish_read(elder_job, "독거노인")
+    if elder_frame is not None:
+        ui.snapshot_saver("독거노인", elder_frame, elder_file, key="elder")
+if facility_job is not None:
+    facility_frame = finish_read(facility_job, "의료기관")
+    if facility_frame is not None:
+        ui.snapshot_saver("의료기관", facility_frame, facility_files, key="facility")
+
+parse_stats = ingest.cache_stats()
+stage_stats = pipeline.cache_stats()
+st.sidebar.caption(
+    f"파싱 캐시: 적중 {parse_stats['hits']}회 / 미스 {parse_stats['misses']}회 · "
+    f"단계 캐시: 적중 {stage_stats['hits']}회 / 미스 {stage_stats['misses']}회"
+)
 
 # -----------------------------
 # 데이터 처리 (파일 로드 확인 후 실행)
 # -----------------------------
-if df_elder is not None and df_facility is not None:
+if elder_frame is not None and (facility_frame is not None or facility_cols is not None):
     st.success(" 두 파일 모두 업로드 완료!")
     
     # -----------------------------
     # 1. 독거노인 데이터 헤더/컬럼 전처리
     # -----------------------------
-    target_col = None
-
-    # 헤더 병합 로직 (KOSIS 파일 구조 대응)
-    if '행정구역별' in df_elder.columns and '2024' in df_elder.columns:
-        df_elder.columns = df_elder.iloc[0]
-        df_elder = df_elder[1:].reset_index(drop=True)
-        df_elder.columns = [col.strip() for col in df_elder.columns]
-
-    # 지역 컬럼 이름 찾기 및 통일
-    elder_region_col_candidates = [c for c in df_elder.columns if "시도" in c or "지역" in c or "행정구역" in c]
-    if elder_region_col_candidates:
-        df_elder = df_elder.rename(columns={elder_region_col_candidates[0]: '지역'})
-    else:
-        st.warning("독거노인 지역 컬럼을 자동으로 찾을 수 없습니다. 아래에서 직접 선택해주세요.")
-        elder_region = st.selectbox("독거노인 지역 컬럼 선택", df_elder.columns, key="elder_region_sel")
-        df_elder = df_elder.rename(columns={elder_region: '지역'})
+    # 헤더 병합(KOSIS 파일 구조 대응), 숫자 컬럼 변환, 지역/인구 컬럼 자동 선택
+    elder_schema = pipeline.detect_schema(elder_frame, "elder")
+    elder_cols = list(elder_schema.frame.df.columns)
 
+    elder_region = elder_schema.region_col
+    if elder_region is None:
+        st.warning("독거노인 지역 컬럼을 자동으로 찾을 수 없습니다. 아래에서 직접 선택해주세요.")
+        elder_region = st.selectbox("독거노인 지역 컬럼 선택", elder_cols, key="elder_region_sel")
 
     # 인구 컬럼 자동/수동 선택
-    target_col_candidates = [c for c in df_elder.columns if '1인가구' in c and '65세이상' in c]
-    if target_col_candidates:
-        target_col = target_col_candidates[0]
-    else:
+    target_col = elder_schema.target_col
+    if target_col is None:
         st.warning("독거노인 인구 컬럼을 자동으로 찾을 수 없습니다. 아래에서 직접 선택해주세요.")
-        target_col = st.selectbox("독거노인 인구 컬럼 선택", df_elder.columns, key="target_col_sel")
-
-    # 독거노인 데이터의 '전국' 행 제거 및 지역이 NaN인 행 제거
-    df_elder = df_elder[df_elder['지역'].astype(str) != '전국']
-    df_elder = df_elder.dropna(subset=['지역'])
+        target_col = st.selectbox("독거노인 인구 컬럼 선택", elder_cols, key="target_col_sel")
 
     # -----------------------------
     # 2. 의료기관 데이터 전처리
     # -----------------------------
-    facility_region_col_candidates = [c for c in df_facility.columns if "시도" in c or "주소" in c or "지역" in c or "소재지전체주소" in c]
-    facility_region = facility_region_col_candidates[0] if facility_region_col_candidates else st.selectbox("의료기관 지역 컬럼 선택", df_facility.columns, key="facility_region_sel")
-    
-    # 주소 컬럼에서 시/도 추출
-    df_facility["지역"] = df_facility[facility_region].astype(str).str[:2]
+    if facility_frame is not None:
+        facility_schema = pipeline.detect_schema(facility_frame, "facility")
+        facility_cols = list(facility_schema.frame.df.columns)
+        facility_region = facility_schema.region_col
+    else:
+        facility_region = pipeline.pick_column(facility_cols, pipeline.FACILITY_REGION_HINTS)
+    if facility_region is None:
+        facility_region = st.selectbox("의료기관 지역 컬럼 선택", facility_cols, key="facility_region_sel")
 
     # -----------------------------
     # 3. 지역명 자동 변환 (GeoJSON 매칭 보정)
     # -----------------------------
-    def normalize_region(name):
-        name = str(name).strip()
-        mapping = {
-            "서울": "서울특별시", "부산": "부산광역시", "대구": "대구광역시", "인천": "인천광역시",
-            "광주": "광주광역시", "대전": "대전광역시", "울산": "울산광역시", "세종": "세종특별자치시",
-            "경기": "경기도", "강원": "강원특별자치도", "충북": "충청북도", "충남": "충청남도",
-            "전북": "전북특별자치도", "전남": "전라남도",
-            "경북": "경상북도", "경남": "경상남도",
-            "제주": "제주특별자치도"
-        }
-        for key, val in mapping.items():
-            if name.startswith(key):
-                return val
-        return name
-
-    df_elder["지역"] = df_elder["지역"].apply(normalize_region)
-    df_facility["지역"] = df_facility["지역"].apply(normalize_region)
+    # 약칭·옛 명칭까지 시도 공식 명칭으로 통일하고, '전국' 등 인식하지 못한 행은 제외
+    elder_norm = pipeline.normalize_region(elder_schema.frame, elder_region)
+    if facility_frame is not None:
+        facility_norm = pipeline.normalize_region(facility_schema.frame, facility_region)
 
     # -----------------------------
     # 4. 미리보기 및 시각화
     # -----------------------------
     st.subheader(" 독거노인 인구 데이터 미리보기")
-    st.dataframe(df_elder.head())
+    st.dataframe(elder_norm.df.head())
 
     st.subheader(" 의료기관 데이터 미리보기")
-    st.dataframe(df_facility.head())
-
-    if target_col is not None and target_col in df_elder.columns:
-        # 의료기관 수 계산 및 병합
-        df_facility_grouped = df_facility.groupby("지역").size().reset_index(name="의료기관_수")
-
-        # 독거노인 인구 컬럼 수치형으로 변환
-        df_elder[target_col] = pd.to_numeric(df_elder[target_col], errors='coerce').fillna(0)
-        
-        # 병합
-        df = pd.merge(df_elder, df_facility_grouped, on="지역", how="inner")
+    if facility_frame is not None:
+        st.dataframe(facility_norm.df.head())
+    else:
+        st.caption("스트리밍 집계 모드에서는 원본 행을 읽지 않으므로 시도별 개수만 표시합니다.")
 
-        # 비율 계산 (독거노인 1000명당 의료기관 수)
-        df["의료기관_비율"] = (df["의료기관_수"] / (df[target_col].replace(0, 1) + 1e-9)) * 1000
-        df = df.rename(columns={"의료기관_비율": "독거노인_1000명당_의료기관_수"})
+    if target_col is not None and target_col in elder_cols:
+        # 시도별 집계 → 병합 → 독거노인 1000명당 의료기관 수
+        # (인구 컬럼만 바꾸면 집계 이후 단계만 다시 계산됩니다.)
+        elder_agg = pipeline.aggregate_elder(elder_norm, target_col)
+        if facility_frame is not None:
+            facility_agg = pipeline.aggregate_facility(facility_norm)
+        else:
+            # 주소 컬럼만 조각 단위로 읽어 시도별 개수만 남김 (백그라운드 작업, 읽은 위치로 진행률 표시)
+            facility_agg = ui.wait_for(
+                pipeline.aggregate_facility_streaming_job(facility_files[0], facility_region, facility_plan), "의료기관 주소 집계 중"
+            )
+            st.dataframe(facility_agg.df)
+        df = pipeline.metrics(pipeline.join(elder_agg, facility_agg)).df
         
         # -----------------------------
         # 지도 시각화를 위한 고정 기준값 설정 (***최종 수정 부분***)
@@ -150,47 +202,98 @@ if df_elder is not None and df_facility is not None:
         FIXED_MIDPOINT = 1.0
         
         st.subheader(" 병합 결과 데이터")
-        st.dataframe(df[["지역", target_col, "의료기관_수", "독거노인_1000명당_의료기관_수"]])
+        st.dataframe(df[["지역", pipeline.ELDER_POPULATION, pipeline.FACILITY_COUNT, pipeline.RATIO]])
 
         # -----------------------------
         # 지도 시각화
         # -----------------------------
-        geojson_url = "https://raw.githubusercontent.com/southkorea/southkorea-maps/master/kostat/2013/json/skorea_provinces_geo_simple.json"
-        geojson = requests.get(geojson_url).json()
-
-        # GeoJSON 명칭 보정
-        for feature in geojson['features']:
-            if feature['properties']['name'] == '강원도':
-                feature['properties']['name'] = '강원특별자치도'
-            if feature['properties']['name'] == '전라북도':
-                feature['properties']['name'] = '전북특별자치도'
-
-        fig = px.choropleth(
-            df,
-            geojson=geojson,
-            locations="지역",
-            featureidkey="properties.name",
-            color="독거노인_1000명당_의료기관_수",
-            # ⭐ 색상 척도의 중앙값(노란색)을 고정 기준값 1.0으로 설정
-            color_continuous_scale="RdYlGn", 
-            color_continuous_midpoint=FIXED_MIDPOINT, 
-            title=f"시도별 독거노인 **1000명당** 의료기관 분포 (기준값: {FIXED_MIDPOINT:.1f})", 
-            range_color=(df["독거노인_1000명당_의료기관_수"].min(), df["독거노인_1000명당_의료기관_수"].max()),
-            hover_data={
-                "지역": True, 
-                target_col: True, 
-                "의료기관_수": True,
-                "독거노인_1000명당_의료기관_수": ':.2f' 
-            }
-        )
-
-        fig.update_geos(
-            fitbounds="locations",
-            visible=False,
-            bgcolor="#f5f5f5"
-        )
-
-        st.plotly_chart(fig, use_container_width=True)
+        # 명칭 보정(강원·전북)과 좌표 단순화가 끝난 번들 경계 데이터를 사용합니다.
+        # 같은 데이터·옵션이면 캐시된 그림을 그대로 쓰고, 경계는 정적 파일 URL로 보냅니다. (utils.choropleth)
+        try:
+            fig = choropleth.figure(
+                df,
+                level="sido",
+                locations="지역",
+                color="독거노인_1000명당_의료기관_수",
+                # ⭐ 색상 척도의 중앙값(노란색)을 고정 기준값 1.0으로 설정
+                color_continuous_scale="RdYlGn", 
+                color_continuous_midpoint=FIXED_MIDPOINT, 
+                title=f"시도별 독거노인 **1000명당** 의료기관 분포 (기준값: {FIXED_MIDPOINT:.1f})", 
+                range_color=(df["독거노인_1000명당_의료기관_수"].min(), df["독거노인_1000명당_의료기관_수"].max()),
+                hover_data={
+                    "지역": True, 
+                    pipeline.ELDER_POPULATION: True, 
+                    "의료기관_수": True,
+                    "독거노인_1000명당_의료기관_수": ':.2f' 
+                },
+                geos=dict(
+                    fitbounds="locations",
+                    visible=False,
+                    bgcolor="#f5f5f5"
+                )
+            )
+        except FileNotFoundError as e:
+            # 경계 번들이 없고 내려받을 수도 없으면(망 분리 환경 등) 지도 없이 표만 보여 줍니다.
+            fig = None
+            st.warning(f"시도 경계 데이터를 불러오지 못해 지도를 그리지 않았습니다. ({e})")
+
+        if fig is not None:
+            with instrument.stage("st.plotly_chart"):
+                st.plotly_chart(fig, use_container_width=True)
+
+        # -----------------------------
+        # 시군구·읍면동 드릴다운
+        # -----------------------------
+        st.subheader(" 시군구·읍면동 드릴다운")
+        if facility_frame is None:
+            st.caption("스트리밍 집계 모드에서는 시도별 개수만 세므로 드릴다운을 사용할 수 없습니다.")
+        else:
+            # 데이터셋마다 모든 수준의 합계를 한 번만 계산해 두고, 수준/지역 전환은 표 조회로 처리합니다.
+            # 큰 의료기관 파일은 주소 분해에 시간이 걸리므로 백그라운드 작업으로 만듭니다.
+            elder_cube_job = pipeline.region_cube_job(elder_schema.frame, elder_region, (target_col,), True)
+            facility_cube_job = pipeline.region_cube_job(facility_schema.frame, facility_region)
+            elder_cube = ui.wait_for(elder_cube_job, "독거노인 지역 계층 집계 중")
+            facility_cube = ui.wait_for(facility_cube_job, "의료기관 지역 계층 집계 중")
+
+            level = st.radio("집계 수준", cube.LEVELS, horizontal=True, key="drill_level")
+            depth = cube.LEVELS.index(level)
+            parent = ()
+            for i, col in enumerate(st.columns(depth) if depth else []):
+                choice = col.selectbox(cube.LEVELS[i], ["(전체)"] + facility_cube.names(parent), key=f"drill_{i}")
+                if choice == "(전체)":
+                    break
+                parent += (choice,)
+
+            df_drill = pipeline.drilldown(elder_cube, facility_cube, target_col, level, parent)
+            if df_drill.empty:
+                # 독거노인 통계가 이 수준까지 내려가지 않으면 의료기관 수만 보여줍니다.
+                st.info(f"독거노인 파일에 {level} 단위 데이터가 없어 의료기관 수만 표시합니다.")
+                df_count = facility_cube.table(level, parent)
+                st.dataframe(df_count)
+                st.bar_chart(df_count.assign(지역=cube.path_label(df_count, level)).set_index("지역")[cube.COUNT])
+            else:
+                st.dataframe(df_drill)
+                fig_drill = None
+                if level == "시군구":
+                    try:
+                        fig_drill = choropleth.figure(
+                            df_drill,
+                            level="sigungu",
+                            featureidkey="properties.full_name",
+                            locations="지역",
+                            color=pipeline.RATIO,
+                            color_continuous_scale="RdYlGn",
+                            color_continuous_midpoint=FIXED_MIDPOINT,
+                            title=f"시군구별 독거노인 1000명당 의료기관 분포 (기준값: {FIXED_MIDPOINT:.1f})",
+                            geos=dict(fitbounds="locations", visible=False, bgcolor="#f5f5f5"),
+                        )
+                    except FileNotFoundError:
+                        st.caption("시군구 경계 데이터가 없어 표로만 표시합니다. (python -m utils.geo sigungu)")
+                if fig_drill is not None:
+                    with instrument.stage("st.plotly_chart"):
+                        st.plotly_chart(fig_drill, use_container_width=True)
+                else:
+                    st.bar_chart(df_drill.set_index("지역")[pipeline.RATIO])
     else:
         st.error("독거노인 인구 컬럼이 설정되지 않아 비율 계산 및 시각화를 진행할 수 없습니다. 데이터 구조를 확인하거나 위에서 컬럼을 직접 선택해 주세요.")
 
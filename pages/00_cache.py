@@ -0,0 +1,115 @@
+import pandas as pd
+import streamlit as st
+
+from utils import cache, jobs, ui
+
+# -----------------------------
+# 설정 및 제목
+# -----------------------------
+st.set_page_config(page_title="캐시 관리", layout="wide")
+st.title(" 공유 캐시 현황")
+
+# 모든 세션의 캐시 키가 보이고 비우기 버튼이 공유 캐시를 지우므로 운영자만 엽니다.
+if not ui.cache_admin_enabled():
+    st.info(f"캐시 관리 페이지는 서버에 {ui.CACHE_ADMIN_ENV}=1 환경 변수를 설정한 경우에만 열립니다.")
+    st.stop()
+
+st.markdown("""
+모든 사용자 세션이 함께 쓰는 프로세스 전역 캐시입니다.
+같은 파일·같은 분석을 여러 명이 보면 계산은 한 번만 하고 나머지는 캐시에서 꺼냅니다.
+
+- **TTL**: 저장 후 이 시간(초)이 지나면 다시 계산합니다.
+- **전역 상한**: 모든 캐시의 합계가 상한을 넘으면 가장 오래 쓰이지 않은 항목부터 지웁니다. (`CACHE_MAX_MB` 환경 변수)
+""")
+
+MB = 1024 ** 2
+
+# -----------------------------
+# 요약
+# -----------------------------
+total = cache.total_bytes()
+col1, col2, col3 = st.columns(3)
+col1.metric("전체 사용량", f"{total / MB:,.1f} MB")
+col2.metric("전역 상한", f"{cache.GLOBAL_MAX_BYTES / MB:,.0f} MB")
+col3.metric("사용률", f"{total / cache.GLOBAL_MAX_BYTES:.1%}")
+
+rows = cache.registry_stats()
+summary = pd.DataFrame([
+    {
+        "캐시": row["name"],
+        "항목 수": row["entries"],
+        "최대 항목": row["max_entries"],
+        "크기(MB)": row["bytes"] / MB,
+        "적중": row["hits"],
+        "미스": row["misses"],
+        "적중률": row["hit_rate"],
+        "제거": row["evictions"],
+        "TTL(초)": row["ttl"],
+    }
+    for row in rows
+])
+st.dataframe(
+    summary,
+    hide_index=True,
+    column_config={
+        "크기(MB)": st.column_config.NumberColumn(format="%.2f"),
+        "적중률": st.column_config.NumberColumn(format="percent"),
+    },
+)
+
+# -----------------------------
+# 캐시별 항목
+# -----------------------------
+st.subheader(" 캐시별 항목")
+caches = cache.registered()
+for name, lru in caches.items():
+    entries = lru.entries()
+    with st.expander(f"{name} ({len(entries)}개)"):
+        if entries:
+            # 오래 쓰이지 않은 항목이 위에 옵니다. (다음 제거 대상)
+            st.dataframe(
+                pd.DataFrame(
+                    [
+                        {
+                            "키": repr(key)[:120],
+                            "크기(KB)": size / 1024,
+                            "저장 후(초)": age,
+                            "마지막 사용 후(초)": idle,
+                            "남은 TTL(초)": lru.ttl - age if lru.ttl is not None else None,
+                        }
+                        for key, size, age, idle in entries
+                    ]
+                ),
+                hide_index=True,
+            )
+        if st.button("비우기", key=f"clear_{name}"):
+            lru.clear()
+            st.rerun()
+
+if st.button("모든 캐시 비우기", type="primary"):
+    cache.clear_all()
+    st.rerun()
+
+# -----------------------------
+# 백그라운드 작업 (utils.jobs)
+# -----------------------------
+st.subheader(" 백그라운드 작업")
+job_list = jobs.list_jobs()
+if job_list:
+    st.dataframe(
+        pd.DataFrame([
+            {
+                "작업": job.name,
+                "상태": job.status,
+                "진행률": job.progress,
+                "메시지": job.message,
+                "실행 시간(초)": job.elapsed,
+                "오류": repr(job.error) if job.error is not None else None,
+            }
+            for job in job_list
+        ]),
+        hide_index=True,
+        column_config={"진행률": st.column_config.ProgressColumn(min_value=0.0, max_value=1.0)},
+    )
+else:
+    st.caption("실행 중이거나 보관 중인 작업이 없습니다.")
@@ -1,12 +1,12 @@
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-import io
-import requests
+
+from utils import choropleth, ingest, instrument, ledger, pipeline, ui
 
 # 페이지 설정
 st.set_page_config(page_title="독거노인 대비 의료기관 분포 분석", layout="wide")
 st.title("🏥 지역별 독거노인 인구 대비 의료기관 분포 분석")
+# 재실행마다 단계별 시간·메모리·캐시 적중을 기록합니다. (DEBUG_PANEL 설정 시 사이드바에 표시)
+ui.debug_panel("00_economic")
 
 st.markdown("""
 이 앱은 **지역별 독거노인 인구수**와 **의료기관 수**를 비교하여  
@@ -19,31 +19,67 @@ st.markdown("""
 st.sidebar.header("📁 데이터 업로드")
 # 파일 업로드를 Streamlit에 의해 관리되도록 단순화
 elder_file = st.sidebar.file_uploader("독거노인 인구 파일 (CSV 또는 XLSX)", type=["csv", "xlsx"], key="elder_upload")
-facility_file = st.sidebar.file_uploader("의료기관 데이터 파일 (CSV 또는 XLSX)", type=["csv", "xlsx"], key="facility_upload")
+# 병원·의원·약국처럼 나뉜 파일(과 XLSX의 여러 시트)은 함께 올리면 병렬로 읽어 합칩니다.
+facility_files = st.sidebar.file_uploader(
+    "의료기관 데이터 파일 (CSV 또는 XLSX, 여러 개 가능)", type=["csv", "xlsx"], accept_multiple_files=True, key="facility_upload"
+)
+# 대용량 파일은 전체를 읽지 않고 주소 컬럼만 조각 단위로 읽어 지역별 개수를 셉니다.
+stream_facility = st.sidebar.checkbox("의료기관 파일 스트리밍 집계 (대용량 파일용)", key="facility_stream")
+# 매달 다시 배포되는 전체 목록을 저장된 원장과 요양기관 코드로 비교해, 추가·삭제된 기관만 반영합니다.
+use_ledger = st.sidebar.checkbox("의료기관 원장 증분 갱신 (요양기관 코드 기준)", key="facility_ledger")
+if use_ledger:
+    ledger_name = st.sidebar.text_input("원장 이름", "의료기관", key="facility_ledger_name")
 
 # -----------------------------
 # 🔍 파일 읽기 함수 (데이터 클렌징 로직 추가)
 # -----------------------------
-def read_any(file, is_elder_file=False):
-    """CSV 또는 XLSX 파일을 읽어 DataFrame으로 반환하고, 독거노인 파일에 대해서는 헤더 처리를 수행합니다."""
+def plan_any(file, kind):
+    """파일 앞부분만 읽어 머리글·인코딩·컬럼 자료형과 지역/인구 컬럼 기본값을 정합니다."""
     if file is None:
         return None
     try:
-        if file.name.endswith(".csv"):
-            raw = file.read()
-            # KOSIS 파일 특성상 header=1 (두 번째 행) 사용
-            read_kwargs = {'header': 1} if is_elder_file else {}
-            try:
-                # UTF-8로 시도
-                df = pd.read_csv(io.BytesIO(raw), encoding="utf-8", **read_kwargs)
-            except UnicodeDecodeError:
-                # CP949로 재시도
-                df = pd.read_csv(io.BytesIO(raw), encoding="cp949", **read_kwargs)
-        elif file.name.endswith(".xlsx"):
-            # XLSX 파일은 header=1 옵션으로 읽기
-            df = pd.read_excel(file, header=1) if is_elder_file else pd.read_excel(file)
-            
-        return df
+        return pipeline.plan(file, kind)
+    except Exception as e:
+        st.error(f"파일 읽기 오류가 발생했습니다: {e}")
+        return None
+
+
+def plan_parts_any(files, kind):
+    """여러 파일의 시트마다 읽기 계획을 만듭니다. 파일이 없으면 None입니다."""
+    if not files:
+        return None
+    try:
+        return pipeline.plan_parts(files, kind)
+    except Exception as e:
+        st.error(f"파일 읽기 오류가 발생했습니다: {e}")
+        return None
+
+
+def read_parts_any(parts, columns):
+    """여러 파일·시트에서 columns만 작업 프로세스들로 나눠 읽어 하나의 Frame으로 합칩니다."""
+    # 선택한 컬럼이 없는 시트(안내문·표지 등)는 건너뜁니다.
+    usable = ingest.parts_with(parts, columns)
+    skipped = [ingest.part_label(file, plan) for file, plan in parts if (file, plan) not in usable]
+    if skipped:
+        st.sidebar.caption(f"선택한 컬럼이 없어 건너뛴 파일·시트: {', '.join(skipped)}")
+    if not usable:
+        st.error("선택한 컬럼이 있는 파일·시트가 없습니다.")
+        return None
+    try:
+        return ui.wait_for(pipeline.ingest_parts_job(usable, columns), f"의료기관 파일·시트 {len(usable)}개 읽는 중")
+    except Exception as e:
+        st.error(f"파일 읽기 오류가 발생했습니다: {e}")
+        return None
+
+
+def read_any(file, plan):
+    """읽기 계획(plan)의 머리글·컬럼·자료형대로 파일을 한 번 읽어 파이프라인 Frame으로 반환합니다.
+
+    파싱은 백그라운드 작업으로 실행하고, 끝나지 않았으면 진행률을 보여 주며 이번 재실행을 멈춥니다.
+    """
+    try:
+        # 같은 파일·계획이면 파싱 캐시에서 바로 꺼냅니다. (utils.pipeline → utils.ingest)
+        return ui.wait_for(pipeline.ingest_job(file, plan), f"{file.name} 읽는 중")
     except Exception as e:
         st.error(f"파일 읽기 오류가 발생했습니다: {e}")
         return None
@@ -51,11 +87,34 @@ def read_any(file, is_elder_file=False):
 # -----------------------------
 # 📊 파일 로드 및 메인 로직
 # -----------------------------
-# 독거노인 파일은 header=1 옵션으로 로드하도록 지정
-df_elder = read_any(elder_file, is_elder_file=True)
-df_facility = read_any(facility_file, is_elder_file=False)
+# 저장된 스냅샷을 고르면 업로드·파싱 없이 메모리 매핑으로 불러옵니다.
+elder_frame = ui.snapshot_picker("독거노인", key="elder")
+if elder_frame is None:
+    elder_plan = plan_any(elder_file, "elder")
+    if elder_plan is not None:
+        # 지역 컬럼은 아래에서 직접 고를 수 있으므로 모든 컬럼을 읽습니다. (자료형은 계획대로 지정)
+        elder_frame = read_any(elder_file, elder_plan)
+    if elder_frame is not None:
+        ui.snapshot_saver("독거노인", elder_frame, elder_file, key="elder")
+
+# 의료기관 파일은 컬럼 선택 뒤에 선택한 주소 컬럼만 읽습니다.
+facility_frame = ui.snapshot_picker("의료기관", key="facility")
+facility_parts = plan_parts_any(facility_files, "facility") if facility_frame is None else None
+# 파일·시트마다 컬럼이 조금씩 다를 수 있으므로 전체 컬럼을 처음 나온 순서대로 보여 줍니다.
+facility_cols = list(dict.fromkeys(c for _, plan in facility_parts for c in plan.columns)) if facility_parts else None
+if stream_facility and facility_parts is not None and len(facility_parts) > 1:
+    # 스트리밍 집계는 파일 하나(첫 시트)만 읽으므로, 여러 파일·시트는 병렬 읽기로 대신합니다.
+    st.sidebar.caption("스트리밍 집계는 파일·시트가 하나일 때만 사용합니다. 여러 파일·시트는 병렬로 읽습니다.")
+    stream_facility = False
+
+parse_stats = ingest.cache_stats()
+stage_stats = pipeline.cache_stats()
+st.sidebar.caption(
+    f"파싱 캐시: 적중 {parse_stats['hits']}회 / 미스 {parse_stats['misses']}회 · "
+    f"단계 캐시: 적중 {stage_stats['hits']}회 / 미스 {stage_stats['misses']}회"
+)
 
-if df_elder is not None and df_facility is not None:
+if elder_frame is not None and (facility_frame is not None or facility_cols is not None):
     st.success("✅ 두 파일 모두 업로드 완료!")
 
     # -----------------------------
@@ -63,22 +122,18 @@ if df_elder is not None and df_facility is not None:
     # -----------------------------
     
     st.subheader("🎯 분석을 위한 컬럼 선택")
-    elder_cols = df_elder.columns.tolist()
-    facility_cols = df_facility.columns.tolist()
-    
     # --- 자동 선택 로직 ---
-    # 독거노인 데이터 지역 컬럼 (KOSIS 파일 기준 '행정구역별')
-    elder_region_col_default = next((c for c in elder_cols if "행정구역" in c), elder_cols[0])
-    
-    # 의료기관 데이터 지역 컬럼 (표준데이터 기준 '소재지전체주소' 또는 '도로명전체주소')
-    facility_region_col_default = next((c for c in facility_cols if "도로명전체주소" in c), 
-                                        next((c for c in facility_cols if "소재지전체주소" in c), 
-                                            facility_cols[0]))
-    
-    # 독거노인 인구수 컬럼 (KOSIS 파일 기준 '65세이상 1인가구(A) (가구)')
-    target_col_default = next((c for c in elder_cols if "1인가구(A)" in c and df_elder[c].dtype != 'object'), 
-                                next((c for c in elder_cols if "독거" in c and df_elder[c].dtype != 'object'), 
-                                    elder_cols[1] if len(elder_cols) > 1 else elder_cols[0]))
+    # 머리글 정리(KOSIS 두 줄 머리글), 숫자 컬럼 변환, 지역/인구 컬럼 기본값 선택
+    elder_schema = pipeline.detect_schema(elder_frame, "elder")
+    elder_cols = list(elder_schema.frame.df.columns)
+    elder_region_col_default = elder_schema.region_col or elder_cols[0]
+    target_col_default = elder_schema.target_col or (elder_cols[1] if len(elder_cols) > 1 else elder_cols[0])
+
+    if facility_frame is not None:
+        facility_cols = list(pipeline.detect_schema(facility_frame, "facility").frame.df.columns)
+    # 의료기관 데이터 지역 컬럼 (표준데이터 기준 '도로명전체주소' 또는 '소재지전체주소')
+    facility_region_col_default = pipeline.pick_column(facility_cols, pipeline.FACILITY_REGION_HINTS) or facility_cols[0]
+    facility_id_col_default = pipeline.pick_column(facility_cols, ledger.ID_HINTS) or facility_cols[0]
     
     col1, col2, col3 = st.columns(3)
     
@@ -112,35 +167,58 @@ if df_elder is not None and df_facility is not None:
             index=get_default_index(non_region_cols, target_col_default),
             key="population_select"
         )
+    if use_ledger:
+        facility_id = st.selectbox(
+            "의료기관 데이터의 요양기관 코드 컬럼 (원장 비교 기준)",
+            facility_cols,
+            index=get_default_index(facility_cols, facility_id_col_default),
+            key="facility_id_select"
+        )
     
+    if facility_frame is None and (use_ledger or not stream_facility):
+        # 선택한 주소 컬럼(원장 모드면 요양기관 코드 컬럼까지)만 읽으므로 나머지 컬럼은 파싱하지 않습니다.
+        facility_read_cols = [facility_region, facility_id] if use_ledger and facility_id != facility_region else [facility_region]
+        facility_frame = read_parts_any(facility_parts, facility_read_cols)
+        if facility_frame is None:
+            st.stop()
+        ui.snapshot_saver("의료기관", facility_frame, facility_files, key="facility")
+    if facility_frame is not None:
+        facility_schema = pipeline.detect_schema(facility_frame, "facility")
+
     # -----------------------------
     # 🧹 데이터 전처리 (시/도 레벨로 통일 및 클렌징)
     # -----------------------------
+    # 각 단계 결과는 입력이 같으면 캐시에서 나오므로, 인구 컬럼만 바꾸면 집계 이후만 다시 계산됩니다.
     
-    # 1. 독거노인 데이터 클렌징
+    # 1. 독거노인 데이터: 공식 시도명으로 통일('전국' 등 제외) → 시도별 인구 합계
     try:
-        # 시/도 레벨 통일을 위해 앞 2글자만 추출
-        df_elder["지역"] = df_elder[elder_region].astype(str).str[:2]
-        # '전국'과 같은 요약 행 및 NaN 값 제거
-        df_elder = df_elder[df_elder["지역"].isin(["서울", "부산", "대구", "인천", "광주", "대전", "울산", "세종", "경기", "강원", "충북", "충남", "전북", "전남", "경북", "경남", "제주"])].copy()
-        
-        # 인구 컬럼을 강제로 숫자 변환 및 NaN은 0으로 처리 (오류 방지 핵심)
-        df_elder['POP_NUMERIC'] = pd.to_numeric(df_elder[target_col], errors='coerce').fillna(0)
-        
-        # 시/도('지역')별로 독거노인 인구수 총합을 계산
-        df_elder_grouped = df_elder.groupby("지역")['POP_NUMERIC'].sum().reset_index(name="독거노인_총인구")
-        
+        elder_agg = pipeline.aggregate_elder(pipeline.normalize_region(elder_schema.frame, elder_region), target_col)
     except Exception as e:
         st.error(f"**[독거노인 데이터 처리 오류]** 지역/인구 컬럼 선택을 확인해주세요. 오류: {e}")
         st.stop()
         
     # 2. 의료기관 데이터 클렌징 및 집계
     try:
-        # 시/도 레벨 통일을 위해 앞 2글자만 추출
-        df_facility["지역"] = df_facility[facility_region].astype(str).str[:2]
-        
-        # '지역' 기준으로 의료기관 수 집계
-        df_facility_grouped = df_facility.groupby("지역").size().reset_index(name="의료기관_수")
+        if use_ledger:
+            # 원장과 비교해 추가·삭제된 기관만 반영한 시도별 개수
+            facility_agg, delta = ui.wait_for(
+                pipeline.aggregate_facility_ledger_job(facility_schema.frame, facility_id, facility_region, ledger_name),
+                "의료기관 원장 갱신 중"
+            )
+            if delta.inserted or delta.deleted:
+                st.sidebar.caption(
+                    f"원장 '{ledger_name}': 추가 {delta.inserted:,}행 / 삭제 {delta.deleted:,}행 반영 ({delta.seconds:.2f}초)"
+                )
+            else:
+                st.sidebar.caption(f"원장 '{ledger_name}': 변경 없음 ({delta.rows:,}행)")
+        elif facility_frame is None:
+            # 선택한 주소 컬럼만 조각 단위로 읽으며 시도별 개수를 누적
+            facility_agg = ui.wait_for(
+                pipeline.aggregate_facility_streaming_job(facility_files[0], facility_region, facility_parts[0][1]),
+                "의료기관 주소 집계 중",
+            )
+        else:
+            facility_agg = pipeline.aggregate_facility(pipeline.normalize_region(facility_schema.frame, facility_region))
     except Exception as e:
         st.error(f"**[의료기관 데이터 처리 오류]** 주소 컬럼 선택을 확인해주세요. 오류: {e}")
         st.stop()
@@ -149,20 +227,20 @@ if df_elder is not None and df_facility is not None:
     # 4. 데이터 병합 및 비율 계산
     # -----------------------------
     # 집계된 두 데이터프레임을 '지역' 기준으로 병합
-    df = pd.merge(df_elder_grouped, df_facility_grouped, on="지역", how="inner")
+    joined = pipeline.join(elder_agg, facility_agg)
     
-    if df.empty:
-        st.error("데이터 병합 결과가 비어있습니다. 두 파일의 지역 값이 일치하지 않아 병합에 실패했습니다. 올바른 지역 컬럼을 선택하고, 값이 앞 2글자로 일치하는지 확인해주세요.")
+    if joined.df.empty:
+        st.error("데이터 병합 결과가 비어있습니다. 두 파일의 지역 값이 일치하지 않아 병합에 실패했습니다. 올바른 지역 컬럼을 선택하고, 값이 시도명으로 시작하는지 확인해주세요.")
         st.stop()
         
-    # 독거노인 1000명당 의료기관 수 계산
-    safe_population = df["독거노인_총인구"]
-    
-    # 0으로 나누는 오류 방지 및 1000명 기준으로 비율 조정
-    df["의료기관_비율"] = (df["의료기관_수"] / (safe_population + 1e-9)) * 1000
+    # 독거노인 1000명당 의료기관 수 계산 (인구가 0인 시도는 비율 없음)
+    df = pipeline.metrics(joined).df
     
     # 최종 결과 데이터프레임 컬럼 이름 정리
-    df_result = df.rename(columns={"독거노인_총인구": f"독거노인_총인구(선택: {target_col})"})
+    df_result = df.rename(columns={
+        pipeline.ELDER_POPULATION: f"독거노인_총인구(선택: {target_col})",
+        pipeline.RATIO: "의료기관_비율",
+    })
 
     # -----------------------------
     # 📊 테이블 출력
@@ -186,42 +264,45 @@ if df_elder is not None and df_facility is not None:
     # -----------------------------
     st.subheader("🗺️ 시도별 독거노인 인구 대비 의료기관 분포 지도")
     
-    # 시도 경계 지오제이슨 파일 로드 (대한민국 시도 경계)
-    geojson_url = "https://raw.githubusercontent.com/southkorea/southkorea-maps/master/kostat/2013/json/skorea_provinces_geo_simple.json"
-    geojson = requests.get(geojson_url).json()
-
+    # 시도 경계는 오프라인 번들을 쓰고, 같은 데이터·옵션이면 캐시된 그림을 그대로 씁니다. (utils.choropleth)
     # Plotly Choropleth 지도 생성
-    fig = px.choropleth(
-        df_result,
-        geojson=geojson,
-        locations="지역",
-        featureidkey="properties.name", # 지도 데이터의 지역 이름 컬럼과 병합
-        color="의료기관_비율",
-        color_continuous_scale="YlOrRd", # 노란색-주황색-빨간색 스케일
-        title="시도별 독거노인 인구 1,000명당 의료기관 분포",
-        hover_name="지역",
-        hover_data={
-            f"독거노인_총인구(선택: {target_col})": ':,.0f', 
-            "의료기관_수": True, 
-            "의료기관_비율": ':.2f',
-            "지역": False
-        } 
-    )
-    
-    # 지도 영역을 대한민국 시도 경계에 맞게 조정
-    fig.update_geos(
-        fitbounds="locations", 
-        visible=False,
-        scope='asia',
-        center={"lat": 36, "lon": 127.8} 
-    )
-    # 레이아웃 업데이트 (제목 중앙 정렬)
-    fig.update_layout(
-        margin={"r":0,"t":50,"l":0,"b":0},
-        title_x=0.5
-    )
+    try:
+        fig = choropleth.figure(
+            df_result,
+            level="sido",
+            featureidkey="properties.name", # 지도 데이터의 지역 이름 컬럼과 병합
+            locations="지역",
+            color="의료기관_비율",
+            color_continuous_scale="YlOrRd", # 노란색-주황색-빨간색 스케일
+            title="시도별 독거노인 인구 1,000명당 의료기관 분포",
+            hover_name="지역",
+            hover_data={
+                f"독거노인_총인구(선택: {target_col})": ':,.0f', 
+                "의료기관_수": True, 
+                "의료기관_비율": ':.2f',
+                "지역": False
+            },
+            # 지도 영역을 대한민국 시도 경계에 맞게 조정
+            geos=dict(
+                fitbounds="locations", 
+                visible=False,
+                scope='asia',
+                center={"lat": 36, "lon": 127.8} 
+            ),
+            # 레이아웃 업데이트 (제목 중앙 정렬)
+            layout=dict(
+                margin={"r":0,"t":50,"l":0,"b":0},
+                title_x=0.5
+            )
+        )
+    except FileNotFoundError as e:
+        # 경계 번들이 없고 내려받을 수도 없으면(망 분리 환경 등) 지도 없이 표만 보여 줍니다.
+        fig = None
+        st.warning(f"시도 경계 데이터를 불러오지 못해 지도를 그리지 않았습니다. ({e})")
     
-    st.plotly_chart(fig, use_container_width=True)
+    if fig is not None:
+        with instrument.stage("st.plotly_chart"):
+            st.plotly_chart(fig, use_container_width=True)
 
 else:
     st.info("👆 사이드바에서 두 개의 파일을 모두 업로드해주세요.")
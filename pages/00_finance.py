@@ -1,14 +1,10 @@
 import streamlit as st
 
-import yfinance as yf
-
-import pandas as pd
-
 import plotly.graph_objs as go
 
 from datetime import datetime, timedelta
 
-st.title("글로벌 시가총액 TOP10 기업의 최근 1년간 주가 변화")
+from utils import analytics, downsample, encoding, instrument, prices, ui
 
 top10 = {
 
@@ -34,92 +30,225 @@ top10 = {
 
 }
 
-st.write("조회 기업:")
+# 재실행마다 단계별 시간·메모리·캐시 적중을 기록합니다. (DEBUG_PANEL 설정 시 사이드바에 표시)
+ui.debug_panel("00_finance")
+
+# 조회 종목(유니버스)과 기간 설정: 기본값은 시가총액 TOP10, 사이드바에서 직접 입력하거나 파일로 올릴 수 있음
+
+st.sidebar.header("조회 종목 및 기간")
 
-st.write(", ".join([f"{v}({k})" for k, v in top10.items()]))
+universe_file = st.sidebar.file_uploader("종목 목록 파일 (CSV: 티커,이름)", type=["csv", "txt"], key="universe_upload")
 
-end = datetime.today()
+universe_text = st.sidebar.text_area(
 
-start = end - timedelta(days=365)
+    "종목 목록 (한 줄에 '티커,이름')",
+
+    "\n".join(f"{k},{v}" for k, v in top10.items()),
+
+    height=200
+
+)
 
-with st.spinner("데이터를 가져오고 있습니다..."):
+try:
+    if universe_file is not None:
+        # 한글 윈도우 엑셀에서 저장한 CSV는 CP949이므로 다른 업로드와 같은 방식으로 인코딩을 고릅니다.
+        data = universe_file.getvalue()
+        universe_text = data.decode(encoding.detect_encoding(data))
+    universe = prices.parse_universe(universe_text)
+except (UnicodeDecodeError, ValueError) as e:
+    st.error(f"종목 목록 파일을 읽지 못했습니다. UTF-8 또는 CP949로 저장한 '티커,이름' CSV를 올려 주세요. ({e})")
+    st.stop()
 
-    data = yf.download(list(top10.keys()), start=start, end=end, group_by='ticker', auto_adjust=True)
+lookback_years = st.sidebar.number_input("조회 기간 (년)", min_value=1, max_value=20, value=1, step=1)
 
-# 데이터 구조 자동 감지
+if not universe:
 
-if isinstance(data.columns, pd.MultiIndex):
+    st.error("조회할 종목을 하나 이상 입력해 주세요.")
 
-    # 야후파이낸스 종목 여러 개 → MultiIndex
+    st.stop()
 
-    # 구조 확인: 보통 ('AAPL', 'Adj Close'), ...
+st.title(f"글로벌 주요 기업의 최근 {lookback_years}년간 주가 변화")
 
-    # level 0: 티커, level 1: 속성
+st.write("조회 기업:")
 
-    if "Adj Close" in data.columns.get_level_values(1):
+st.write(", ".join([f"{v}({k})" for k, v in universe.items()]))
 
-        # 각 티커별 "Adj Close"만 추출
+end = datetime.today().date()
 
-        adj_close = pd.DataFrame({ticker: data[ticker]['Adj Close'] for ticker in top10 if ticker in data.columns.get_level_values(0)})
+start = end - timedelta(days=365 * lookback_years)
 
-    elif "Close" in data.columns.get_level_values(1):
+tickers = list(universe.keys())
 
-        adj_close = pd.DataFrame({ticker: data[ticker]['Close'] for ticker in top10 if ticker in data.columns.get_level_values(0)})
+# 차트 표시 설정: 종목당 점 수를 줄여서 브라우저로 보내고, 구간을 좁히면 그 구간을 더 촘촘히 다시 샘플링
 
-    else:
+st.sidebar.header("차트 표시 설정")
 
-        st.error("데이터에서 'Adj Close' 또는 'Close' 값을 찾을 수 없습니다.")
+max_points = st.sidebar.number_input("종목당 최대 표시 점 수", min_value=100, max_value=20000, value=1000, step=100)
 
-        st.write(data.head())
+ds_method = st.sidebar.radio(
 
-        st.stop()
+    "다운샘플링 방식",
 
-else:
+    downsample.METHODS,
 
-    # 단일 컬럼 (종목 1개 등) 혹은 Wide-Format
+    format_func={"lttb": "LTTB (모양 보존)", "minmax": "구간별 최소/최대"}.get
 
-    if "Adj Close" in data.columns:
+)
 
-        adj_close = data["Adj Close"].to_frame()
+view_start, view_end = st.slider("조회 구간", min_value=start, max_value=end, value=(start, end), format="YYYY-MM-DD")
 
-    elif "Close" in data.columns:
+def build_figure(adj_close, title, yaxis_title):
 
-        adj_close = data["Close"].to_frame()
+    fig = go.Figure()
 
-    else:
+    series = {}
 
-        st.error("데이터에서 'Adj Close' 또는 'Close' 값을 찾을 수 없습니다.")
+    for ticker in universe:
 
-        st.write(data.head())
+        if ticker in adj_close.columns:
 
-        st.stop()
+            series[ticker] = downsample.downsample(adj_close.index.to_numpy(), adj_close[ticker].to_numpy(), max_points, ds_method)
 
-adj_close = adj_close.fillna(method="ffill")
+    # 표시할 점이 많으면 WebGL 트레이스로 렌더링
 
-fig = go.Figure()
+    n_points = sum(len(x) for x, _ in series.values())
 
-for ticker, name in top10.items():
+    trace_cls = go.Scattergl if n_points > downsample.WEBGL_THRESHOLD else go.Scatter
 
-    if ticker in adj_close.columns:
+    for ticker, (x, y) in series.items():
 
-        fig.add_trace(go.Scatter(
+        fig.add_trace(trace_cls(
 
-            x=adj_close.index, y=adj_close[ticker], mode='lines', name=name
+            x=x, y=y, mode='lines', name=universe[ticker]
 
         ))
 
-fig.update_layout(
+    fig.update_layout(
 
-    title='글로벌 시가총액 TOP10 기업 주가 변화 (최근 1년)',
+        title=title,
 
-    xaxis_title='날짜',
+        xaxis_title='날짜',
 
-    yaxis_title='종가(USD)',
+        yaxis_title=yaxis_title,
 
-    legend_title='기업명',
+        legend_title='기업명',
 
-    height=600
+        height=600
 
-)
+    )
+
+    return fig
+
+# 로컬 저장소(data/prices.sqlite)에 이미 있는 구간을 먼저 그리고,
+
+# 빠진 구간은 백그라운드 작업으로 종목별로 동시에 받아 옵니다. (utils.jobs)
+
+# 받는 동안에는 진행률과 지금까지 저장된 구간으로 그린 차트를 주기적으로 다시 그리고,
+
+# 그사이 위젯을 눌러 재실행해도 다운로드는 처음부터 다시 시작하지 않습니다.
+
+store = prices.get_store()
+
+draw_count = 0
+
+def draw(target=st):
+
+    global draw_count
+
+    with instrument.stage("prices.read"):
+
+        adj_close = store.read(tickers, view_start, view_end).ffill()
+
+    if not adj_close.empty:
+
+        draw_count += 1
+
+        with instrument.stage("chart.price"):
+
+            target.plotly_chart(
+
+                build_figure(adj_close, f'주요 기업 주가 변화 (최근 {lookback_years}년)', '종가(USD)'),
+
+                use_container_width=True,
+
+                key=f"price_chart_{draw_count}"
+
+            )
+
+try:
+
+    results = ui.wait_for(prices.refresh_job(tickers, start, end, store=store), "주가 데이터 받는 중", render=draw)
+
+except Exception as e:
+
+    st.error(f"주가 데이터를 받는 중 오류가 발생했습니다: {e}")
 
-st.plotly_chart(fig, use_container_width=True)
+    results = []
+
+draw()
+
+failed = [f"{universe[r.key[0]]}({r.key[0]}): {r.error}" for r in results]
+
+if failed:
+
+    st.warning("일부 종목을 가져오지 못했습니다.\n\n" + "\n\n".join(failed))
+
+if draw_count == 0:
+
+    st.error("주가 데이터를 가져오지 못했습니다.")
+
+    st.stop()
+
+# -----------------------------
+# 분석 패널: 모든 지표를 날짜 × 종목 행렬 전체에 대해 한 번에 계산
+# -----------------------------
+
+with instrument.stage("prices.read"):
+
+    adj_close = store.read(tickers, view_start, view_end).ffill()
+
+    returns = analytics.daily_returns(adj_close)
+
+st.subheader("분석 패널")
+
+vol_window = st.slider("변동성 계산 기간 (거래일)", min_value=5, max_value=120, value=21, step=1)
+
+tab_norm, tab_vol, tab_dd, tab_corr = st.tabs(["누적 수익률", "이동 변동성", "낙폭", "상관관계"])
+
+with tab_norm, instrument.stage("chart.normalized"):
+
+    st.plotly_chart(build_figure(analytics.normalized(adj_close), '시작일 = 100 기준 상대 가격', '상대 가격'), use_container_width=True)
+
+with tab_vol, instrument.stage("chart.volatility"):
+
+    st.plotly_chart(build_figure(analytics.rolling_volatility(returns, vol_window), f'{vol_window}일 이동 변동성 (연율화)', '변동성'), use_container_width=True)
+
+with tab_dd, instrument.stage("chart.drawdown"):
+
+    st.plotly_chart(build_figure(analytics.drawdown(adj_close), '최고가 대비 낙폭', '낙폭'), use_container_width=True)
+
+with tab_corr, instrument.stage("chart.correlation"):
+
+    corr = analytics.correlation(returns)
+
+    names = [universe[t] for t in corr.columns]
+
+    st.plotly_chart(
+
+        go.Figure(go.Heatmap(z=corr.to_numpy(), x=names, y=names, zmin=-1, zmax=1, colorscale='RdBu')).update_layout(height=600),
+
+        use_container_width=True
+
+    )
+
+with instrument.stage("analytics.summary"):
+
+    summary = analytics.summary(adj_close)
+
+st.dataframe(
+
+    summary.rename(index=universe).style.format("{:.2%}"),
+
+    use_container_width=True
+
+)
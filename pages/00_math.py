@@ -1,13 +1,14 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-from scipy.spatial import Voronoi
-import folium
-from streamlit_folium import folium_static
+
+from utils import distance, geo, instrument, mapview, spatial, ui, voronoi
 
 st.set_page_config(page_title="독거노인 접근성 분석", layout="wide")
 st.title("🏠 독거노인 시설 접근성 분석 웹앱")
 st.write("독거노인 위치와 시설 위치를 기반으로 Voronoi 다이어그램을 지도에 시각화합니다.")
+# 재실행마다 단계별 시간·메모리·캐시 적중을 기록합니다. (DEBUG_PANEL 설정 시 사이드바에 표시)
+ui.debug_panel("00_math")
 
 # ----------------------
 # 1. 기본 데이터
@@ -31,61 +32,113 @@ st.subheader("독거노인 위치")
 st.dataframe(elderly_df)
 
 # ----------------------
-# 2. Voronoi 계산
+# 2. Voronoi 서비스 권역 계산
 # ----------------------
-coords = facility_df[['longitude', 'latitude']].values
-vor = Voronoi(coords)
+facility_lat = facility_df['latitude'].to_numpy()
+facility_lon = facility_df['longitude'].to_numpy()
+elderly_lat = elderly_df['latitude'].to_numpy()
+elderly_lon = elderly_df['longitude'].to_numpy()
+
+# 권역을 자를 경계: 시설 좌표 범위(기본) 또는 시도 행정경계
+# 시도 목록은 코드표에서 만들고, 경계 파일은 시도를 고른 뒤에만 읽습니다. (처음이면 내려받음)
+BBOX_BOUNDARY = "시설 좌표 범위 (사각형)"
+boundary_name = st.selectbox("서비스 권역 경계", [BBOX_BOUNDARY] + list(geo.SIDO_BY_CODE.values()))
+boundary, boundary_key = None, None
+if boundary_name != BBOX_BOUNDARY:
+    try:
+        features = geo.load_boundaries("sido")["features"]
+        feature = next(f for f in features if f["properties"]["name"] == boundary_name)
+        boundary = voronoi.boundary_from_feature(feature)
+        boundary_key = ("sido", geo.GEO_VERSION, boundary_name)
+    except (FileNotFoundError, StopIteration) as e:
+        st.warning(f"{boundary_name} 경계를 불러오지 못해 시설 좌표 범위로 자릅니다. ({e})")
+
+# 시설 좌표·경계가 같으면 캐시된 권역을 재사용 (독거노인 데이터만 바뀌어도 재계산하지 않음)
+with instrument.stage("voronoi.service_areas"):
+    service_areas = voronoi.get_service_areas(facility_lat, facility_lon, boundary, boundary_key)
+    # 모든 독거노인을 한 번에 셀에 배정하고 시설별 담당 인원(셀 부하)을 계산 (경계 밖은 따로 셈)
+    cell_load, outside_elderly = service_areas.load(elderly_lat, elderly_lon)
 
 # ----------------------
 # 3. Folium 지도 시각화
 # ----------------------
 st.subheader("지도 기반 Voronoi 영역 시각화")
-m = folium.Map(location=[np.mean(coords[:,1]), np.mean(coords[:,0])], zoom_start=15)
+# folium·streamlit_folium은 가져오는 데 시간이 걸리므로 위의 표를 먼저 보낸 뒤 지도를 그릴 때 가져옵니다.
+with instrument.stage("import folium"):
+    import folium
+    from streamlit_folium import folium_static
+
+m = folium.Map(location=[np.mean(facility_lat), np.mean(facility_lon)], zoom_start=15)
+
+# 점이 많아지면 마커 → 클러스터 → 격자 집계로 자동 전환
+st.sidebar.header("🗺️ 지도 표시 설정")
+render_mode = st.sidebar.selectbox(
+    "점 표시 방식",
+    mapview.RENDER_MODES,
+    format_func={"auto": "자동", "markers": "개별 마커", "cluster": "마커 클러스터", "heatmap": "히트맵", "grid": "격자 집계"}.get,
+)
+marker_limit = st.sidebar.number_input("개별 마커 최대 점 수 (자동)", min_value=0, value=mapview.DEFAULT_MARKER_LIMIT, step=100)
+cluster_limit = st.sidebar.number_input("클러스터 최대 점 수 (자동)", min_value=0, value=mapview.DEFAULT_CLUSTER_LIMIT, step=1000)
 
 # 시설 마커
-for i, row in facility_df.iterrows():
-    folium.Marker(
-        location=[row['latitude'], row['longitude']],
-        popup=row['name'],
-        icon=folium.Icon(color='red', icon='plus')
-    ).add_to(m)
+facility_mode = mapview.add_points(
+    m, facility_lat, facility_lon, names=facility_df['name'].tolist(), color='red', icon='plus',
+    mode=render_mode, marker_limit=marker_limit, cluster_limit=cluster_limit, layer_name="시설",
+)
 
 # 독거노인 마커
-for i, row in elderly_df.iterrows():
-    folium.Marker(
-        location=[row['latitude'], row['longitude']],
-        popup=row['name'],
-        icon=folium.Icon(color='blue', icon='user')
-    ).add_to(m)
-
-# Voronoi 영역 단순 표시
-for region in vor.regions:
-    if not -1 in region and len(region) > 0:
-        polygon = [vor.vertices[i] for i in region]
-        folium.Polygon(
-            locations=[(y, x) for x, y in polygon],
-            color='orange',
-            fill=True,
-            fill_opacity=0.2
-        ).add_to(m)
-
-folium_static(m)
+elderly_mode = mapview.add_points(
+    m, elderly_lat, elderly_lon, names=elderly_df['name'].tolist(), color='blue', icon='user',
+    mode=render_mode, marker_limit=marker_limit, cluster_limit=cluster_limit, layer_name="독거노인",
+)
+st.caption(f"표시 방식 — 시설: {facility_mode}, 독거노인: {elderly_mode}")
+
+# 경계로 잘린 Voronoi 권역 (모든 시설의 셀을 하나의 GeoJSON 레이어로 표시)
+cell_properties = [{'name': name, 'load': int(load)} for name, load in zip(facility_df['name'], cell_load)]
+folium.GeoJson(
+    service_areas.to_geojson(cell_properties),
+    style_function=lambda feature: {'color': 'orange', 'fillColor': 'orange', 'weight': 2, 'fillOpacity': 0.2},
+    tooltip=folium.GeoJsonTooltip(fields=['name', 'load'], aliases=['시설', '담당 독거노인 수']),
+).add_to(m)
+
+with instrument.stage("folium_static"):
+    folium_static(m)
+
+st.subheader("시설별 서비스 권역 부하")
+st.dataframe(pd.DataFrame({'facility': facility_df['name'].to_numpy(), 'assigned_elderly': cell_load}))
+if outside_elderly:
+    st.caption(f"경계 밖 독거노인 {outside_elderly}명은 권역 배정에서 제외했습니다.")
 
 # ----------------------
 # 4. 독거노인별 접근성 계산
 # ----------------------
 st.subheader("독거노인별 가장 가까운 시설")
-nearest_list = []
-for idx, elderly in elderly_df.iterrows():
-    distances = np.sqrt((facility_df['latitude'] - elderly['latitude'])**2 +
-                        (facility_df['longitude'] - elderly['longitude'])**2)
-    nearest_idx = distances.idxmin()
-    nearest_list.append({
-        'elderly': elderly['name'],
-        'nearest_facility': facility_df.loc[nearest_idx, 'name'],
-        'distance': distances.min()
-    })
-
-nearest_df = pd.DataFrame(nearest_list)
+# 시설 좌표로 만든 KD-tree를 재실행 간에 재사용합니다. 독거노인이 많으면 질의가 오래 걸리므로
+# 백그라운드 작업으로 실행하고 진행률을 보여 줍니다. (utils.jobs)
+with instrument.stage("spatial.nearest"):
+    _, nearest_idx = ui.wait_for(spatial.nearest_job(facility_lat, facility_lon, elderly_lat, elderly_lon), "최근접 시설 계산 중")
+    facility_index = spatial.get_index(facility_lat, facility_lon)
+
+# 최근접 시설까지의 거리(m)는 전체 배열에 대해 한 번에 계산
+distance_method = st.radio(
+    "거리 계산 방식",
+    distance.METHODS,
+    format_func={"haversine": "대권 거리 (Haversine)", "projected": "평면 투영 거리 (EPSG:5179)"}.get,
+    horizontal=True,
+)
+with instrument.stage("distance.paired_distance"):
+    distances = distance.paired_distance(
+        elderly_lat, elderly_lon,
+        facility_lat[nearest_idx], facility_lon[nearest_idx],
+        method=distance_method,
+    )
+
+radius_m = st.slider("접근성 반경 (m)", min_value=100, max_value=5000, value=500, step=100)
+nearest_df = pd.DataFrame({
+    'elderly': elderly_df['name'].to_numpy(),
+    'nearest_facility': facility_df['name'].to_numpy()[nearest_idx],
+    'distance_m': distances.round(1),
+    'facilities_within_radius': facility_index.count_within_radius(elderly_lat, elderly_lon, radius_m),
+})
 st.dataframe(nearest_df)
-st.write("※ 거리 단위는 위도/경도 기준이며, 실제 도로망 기반 분석과는 차이가 있습니다.")
+st.write("※ 거리 단위는 m(직선 거리)이며, 실제 도로망 기반 분석과는 차이가 있습니다.")
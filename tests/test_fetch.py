@@ -0,0 +1,61 @@
+import threading
+import time
+
+import pytest
+
+from utils import fetch
+
+
+@pytest.fixture
+def release():
+    event = threading.Event()
+    yield event
+    event.set()
+
+
+def run(keys, fn, **schedule):
+    schedule = {"rate": 0, "backoff": 0.01, **schedule}
+    return {r.key: r for r in fetch.iter_fetch(keys, fn, **schedule)}
+
+
+def test_results_and_retries():
+    calls = []
+
+    def fn(key):
+        calls.append(key)
+        if key == "flaky" and calls.count(key) == 1:
+            raise ValueError("once")
+        return key.upper()
+
+    results = run(["a", "flaky"], fn)
+    assert results["a"].value == "A" and results["a"].attempts == 1
+    assert results["flaky"].value == "FLAKY" and results["flaky"].attempts == 2
+
+
+def test_timeout_counts_from_worker_start(release):
+    # 'slow'가 제한 시간을 넘겨도 스레드는 0.5초까지 자리를 차지합니다. 그 뒤에 시작한 'b'는
+    # 제출 시각이 아니라 시작 시각부터 재므로, 0.2초 걸려도 제한 시간(0.3초) 안입니다.
+    threading.Timer(0.5, release.set).start()
+
+    def fn(key):
+        if key == "slow":
+            release.wait()
+        else:
+            time.sleep(0.2)
+        return key
+
+    results = run(["slow", "b"], fn, max_workers=1, timeout=0.3, retries=0)
+    assert isinstance(results["slow"].error, TimeoutError)
+    assert results["b"].ok and results["b"].value == "b"
+
+
+def test_hung_threads_fail_remaining_keys(release):
+    def fn(key):
+        release.wait()
+        return key
+
+    started = time.monotonic()
+    results = run(["hung", "b", "c"], fn, max_workers=1, timeout=0.1, retries=0)
+    assert time.monotonic() - started < 2
+    assert all(isinstance(r.error, TimeoutError) for r in results.values())
+    assert results["b"].attempts == 0
@@ -0,0 +1,81 @@
+import io
+
+import pandas as pd
+
+from utils import ingest, pipeline
+
+
+class Upload(io.BytesIO):
+    def __init__(self, data, name):
+        super().__init__(data)
+        self.name = name
+
+
+def csv(df, name):
+    return Upload(df.to_csv(index=False).encode("utf-8"), name)
+
+
+def test_parts_with_different_address_columns_are_merged():
+    lot = pd.DataFrame({"요양기관명": ["a", "b"], "소재지전체주소": ["서울특별시 종로구 1", "부산광역시 중구 1"]})
+    road = pd.DataFrame({"요양기관명": ["c"], "도로명전체주소": ["경기도 수원시 1"]})
+    parts = pipeline.plan_parts([csv(lot, "lot.csv"), csv(road, "road.csv")], "facility")
+    assert [plan.region_col for _, plan in parts] == ["소재지전체주소", "도로명전체주소"]
+
+    renamed = [(file, plan.select([plan.region_col]).rename({plan.region_col: "소재지전체주소"})) for file, plan in parts]
+    df = pipeline.ingest_parts(renamed).df
+    assert list(df.columns) == ["소재지전체주소"]
+    assert df["소재지전체주소"].tolist() == ["서울특별시 종로구 1", "부산광역시 중구 1", "경기도 수원시 1"]
+
+
+def test_rename_to_same_name_keeps_plan():
+    file = csv(pd.DataFrame({"소재지전체주소": ["서울특별시 종로구 1"]}), "one.csv")
+    plan = ingest.plan_upload(file)
+    assert plan.rename({"소재지전체주소": "소재지전체주소"}) == plan
+
+
+def test_streaming_counts_use_plan_header_and_sheet():
+    from dataclasses import replace
+
+    df = pd.DataFrame({"요양기관명": ["a", "b", "c"], "주소": ["서울특별시 종로구 1", "서울특별시 중구 1", "부산광역시 중구 1"]})
+    buffer = io.BytesIO()
+    with pd.ExcelWriter(buffer) as writer:
+        pd.DataFrame({"x": [1]}).to_excel(writer, sheet_name="안내", index=False)
+        df.to_excel(writer, sheet_name="목록", index=False, startrow=2)
+    xlsx = Upload(buffer.getvalue(), "title.xlsx")
+    plan = replace(ingest.plan_upload(xlsx), header=2, sheet="목록")
+    assert ingest.read_header(xlsx, plan.header, plan.sheet) == ["요양기관명", "주소"]
+    assert ingest.count_regions_streaming(xlsx, "주소", plan=plan).to_dict() == {"서울특별시": 2, "부산광역시": 1}
+
+    text = "2024년 의료기관 현황,\n" + df.to_csv(index=False)
+    file = Upload(text.encode("utf-8"), "title.csv")
+    plan = replace(ingest.plan_upload(file), header=1)
+    counts = ingest.count_regions_streaming(file, "주소", chunksize=1, plan=plan)
+    assert counts.to_dict() == {"서울특별시": 2, "부산광역시": 1}
+
+
+def test_integer_column_with_late_blank_keeps_typed_read(monkeypatch):
+    population = [str(i) for i in range(600)] + [""]
+    file = csv(pd.DataFrame({"행정구역": ["서울특별시"] * 601, "인구": population}), "late.csv")
+    plan = ingest.plan_upload(file)
+    assert dict(plan.dtypes)["인구"] == "Int64"
+
+    calls = []
+    read_csv = ingest._read_csv
+    monkeypatch.setattr(ingest, "_read_csv", lambda *a, **k: calls.append(k.get("dtype")) or read_csv(*a, **k))
+    df = ingest.read_upload(file, plan=plan)
+    assert len(calls) == 1 and calls[0] is not None
+    assert df["인구"].isna().sum() == 1 and df["인구"].sum() == sum(range(600))
+
+
+def test_content_hash_is_computed_once_per_upload(monkeypatch):
+    calls = []
+    hash_buffer = ingest._hash_buffer
+    monkeypatch.setattr(ingest, "_hash_buffer", lambda file: calls.append(file) or hash_buffer(file))
+    file = csv(pd.DataFrame({"a": [1, 2]}), "a.csv")
+    file.file_id = "upload-1"
+    first = ingest.content_hash(file)
+    # 재실행마다 새로 만들어지는 같은 업로드 객체
+    again = csv(pd.DataFrame({"a": [1, 2]}), "a.csv")
+    again.file_id = "upload-1"
+    assert ingest.content_hash(again) == first == hash_buffer(file)
+    assert len(calls) == 1
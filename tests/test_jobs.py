@@ -0,0 +1,74 @@
+import time
+
+import numpy as np
+import pytest
+
+from utils import cache, jobs
+
+
+@pytest.fixture(autouse=True)
+def clean():
+    jobs._jobs.clear()
+    jobs._results.clear()
+    yield
+    jobs._jobs.clear()
+    jobs._results.clear()
+
+
+def make(value, calls):
+    def run(progress):
+        calls.append(value)
+        return value
+    return run
+
+
+def test_result_is_accounted_in_cache():
+    job = jobs.submit(("t", 1), make(np.zeros(1000), []))
+    assert job.wait(5)
+    assert job.result().shape == (1000,)
+    assert not hasattr(job, "_result")
+    assert ("t", 1) in jobs._results
+    assert "jobs.results" in cache.registered()
+    assert jobs._results.total_bytes >= 8000
+
+
+def test_finished_job_is_reused():
+    calls = []
+    first = jobs.submit(("t", 2), make(1, calls))
+    first.wait(5)
+    assert jobs.submit(("t", 2), make(1, calls)) is first
+    assert calls == [1]
+
+
+def test_evicted_result_reruns_job():
+    calls = []
+    job = jobs.submit(("t", 3), make(1, calls))
+    job.wait(5)
+    jobs._results.clear()
+    assert job.evicted
+    with pytest.raises(jobs.ResultEvicted):
+        job.result()
+    again = jobs.submit(("t", 3), make(1, calls))
+    assert again is not job
+    again.wait(5)
+    assert again.result() == 1 and calls == [1, 1]
+
+
+def test_expired_job_releases_result():
+    job = jobs.submit(("t", 4), make(1, []), ttl=0)
+    job.wait(5)
+    time.sleep(0.01)
+    jobs.submit(("t", 5), make(2, [])).wait(5)
+    assert ("t", 4) not in jobs._results
+    assert jobs.get(("t", 4)) is None
+
+
+def test_failed_job_raises_and_restarts():
+    def boom(progress):
+        raise ValueError("x")
+
+    job = jobs.submit(("t", 6), boom)
+    job.wait(5)
+    with pytest.raises(ValueError):
+        job.result()
+    assert jobs.submit(("t", 6), make(1, [])) is not job
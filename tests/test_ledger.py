@@ -0,0 +1,126 @@
+import os
+
+import pandas as pd
+import pytest
+
+from utils import ledger
+from utils.region import normalize_regions
+
+ID, ADDRESS = "암호화요양기호", "소재지전체주소"
+
+
+@pytest.fixture(autouse=True)
+def ledger_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(ledger, "LEDGER_DIR", str(tmp_path / "ledgers"))
+
+
+def frame(rows):
+    return pd.DataFrame(rows, columns=[ID, ADDRESS])
+
+
+def recount(df):
+    """원장 없이 처음부터 센 시도별 개수."""
+    return normalize_regions(df[ADDRESS]).value_counts().to_dict()
+
+
+BASE = frame([
+    ("A1", "서울특별시 종로구 세종대로 1"),
+    ("A2", "서울특별시 중구 을지로 2"),
+    ("B1", "부산광역시 해운대구 1"),
+    ("C1", "경기도 수원시 팔달구 1"),
+])
+
+
+def test_first_apply_builds_counts():
+    delta = ledger.apply("t", BASE, ID, ADDRESS)
+    assert (delta.inserted, delta.deleted, delta.rows) == (4, 0, 4)
+    assert ledger.counts("t").to_dict() == recount(BASE) == {"서울특별시": 2, "부산광역시": 1, "경기도": 1}
+
+
+def test_insert_and_delete():
+    ledger.apply("t", BASE, ID, ADDRESS)
+    new = pd.concat([BASE.iloc[1:], frame([("D1", "대구광역시 중구 1"), ("D2", "대구광역시 북구 2")])])
+    delta = ledger.apply("t", new, ID, ADDRESS)
+    assert (delta.inserted, delta.deleted) == (2, 1)
+    assert delta.changed == {"서울특별시": -1, "대구광역시": 2}
+    assert ledger.counts("t").to_dict() == recount(new)
+
+
+def test_relocation_moves_count_between_regions():
+    ledger.apply("t", BASE, ID, ADDRESS)
+    new = BASE.copy()
+    new.loc[new[ID] == "B1", ADDRESS] = "광주광역시 북구 1"
+    delta = ledger.apply("t", new, ID, ADDRESS)
+    # 주소가 바뀐 기관은 옛 행 삭제 + 새 행 추가입니다.
+    assert (delta.inserted, delta.deleted) == (1, 1)
+    assert delta.changed == {"부산광역시": -1, "광주광역시": 1}
+    assert ledger.counts("t").to_dict() == recount(new)
+
+
+def test_reapply_same_source_is_noop():
+    ledger.apply("t", BASE, ID, ADDRESS, source="v1")
+    revision = ledger.read_manifest("t")["revision"]
+    delta = ledger.apply("t", BASE, ID, ADDRESS, source="v1")
+    assert (delta.inserted, delta.deleted, delta.changed) == (0, 0, {})
+    assert ledger.read_manifest("t")["revision"] == revision
+
+
+def test_reapply_same_rows_without_source_changes_nothing():
+    ledger.apply("t", BASE, ID, ADDRESS)
+    delta = ledger.apply("t", BASE.iloc[::-1], ID, ADDRESS)
+    assert (delta.inserted, delta.deleted, delta.changed) == (0, 0, {})
+    assert ledger.counts("t").to_dict() == recount(BASE)
+
+
+def test_unknown_region_is_tracked_but_not_counted():
+    df = pd.concat([BASE, frame([("X1", "주소 미상"), ("X2", None)])])
+    delta = ledger.apply("t", df, ID, ADDRESS)
+    assert delta.inserted == 6
+    assert ledger.counts("t").to_dict() == recount(BASE)
+    # 인식하지 못한 행이 빠져도 시도별 개수는 그대로입니다.
+    delta = ledger.apply("t", BASE, ID, ADDRESS)
+    assert (delta.deleted, delta.changed) == (2, {})
+
+
+def test_duplicate_rows_are_counted_by_multiplicity():
+    df = pd.concat([BASE, BASE.iloc[:1]])
+    ledger.apply("t", df, ID, ADDRESS)
+    assert ledger.counts("t")["서울특별시"] == 3
+    delta = ledger.apply("t", BASE, ID, ADDRESS)
+    assert (delta.inserted, delta.deleted, delta.changed) == (0, 1, {"서울특별시": -1})
+
+
+def test_numeric_ids_match_string_ids():
+    numeric = BASE.assign(**{ID: range(4)})
+    ledger.apply("t", numeric, ID, ADDRESS)
+    delta = ledger.apply("t", numeric.assign(**{ID: [str(i) for i in range(4)]}), ID, ADDRESS)
+    assert (delta.inserted, delta.deleted) == (0, 0)
+
+
+def test_interrupted_save_is_recovered():
+    ledger.apply("t", BASE, ID, ADDRESS)
+    path = os.path.join(ledger.LEDGER_DIR, "t")
+    # 이전 원장을 옆으로 옮긴 직후 멈춘 상태
+    os.replace(path, path + ".old")
+    assert ledger.counts("t").to_dict() == recount(BASE)
+    delta = ledger.apply("t", BASE.iloc[1:], ID, ADDRESS)
+    assert (delta.inserted, delta.deleted) == (0, 1)
+    assert not os.path.exists(path + ".old")
+
+
+def test_invalid_name_is_rejected():
+    with pytest.raises(ValueError):
+        ledger.apply("../t", BASE, ID, ADDRESS)
+
+
+def test_job_reapplies_after_other_source():
+    from utils import pipeline
+
+    other = frame([("A1", "서울특별시 종로구 세종대로 1")])
+    for token, df in [("a", BASE), ("b", other), ("a", BASE)]:
+        job = pipeline.aggregate_facility_ledger_job(pipeline.Frame(token, df), ID, ADDRESS, "t")
+        assert job.wait(5)
+        agg, _ = job.result()
+        assert dict(zip(agg.df["지역"], agg.df[pipeline.FACILITY_COUNT])) == recount(df)
+    assert ledger.counts("t").to_dict() == recount(BASE)
+    assert ledger.revision("t") == 3
@@ -0,0 +1,59 @@
+from datetime import date
+
+import pandas as pd
+import pytest
+
+from utils import prices
+
+START, END = date(2024, 1, 1), date(2024, 1, 31)
+
+
+class StubSource(prices.PriceSource):
+    name = "stub"
+
+    def __init__(self, close):
+        self.close = close
+        self.calls = []
+
+    def fetch(self, ticker, start, end):
+        self.calls.append((ticker, start, end))
+        return self.close
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(prices, "_recent_fetches", {})
+    return prices.PriceStore(str(tmp_path / "prices.sqlite"))
+
+
+def test_write_extends_coverage(store):
+    close = pd.Series([1.0, 2.0], index=pd.to_datetime(["2024-01-02", "2024-01-03"]))
+    prices.refresh(["AAA"], START, END, StubSource(close), store)
+    assert store.coverage("AAA", "stub") == (START, END)
+    assert store.read_long(["AAA"], START, END)["close"].tolist() == [1.0, 2.0]
+
+
+def test_empty_result_does_not_mark_range_covered(store, monkeypatch):
+    source = StubSource(pd.Series(dtype="float64"))
+    assert prices.refresh(["AAA"], START, END, source, store) == []
+    assert store.coverage("AAA", "stub") is None
+
+    # 같은 구간은 잠시 다시 요청하지 않고, 그 뒤에는 다시 받습니다.
+    prices.refresh(["AAA"], START, END, source, store)
+    assert len(source.calls) == 1
+    monkeypatch.setattr(prices, "_recent_fetches", {})
+    source.close = pd.Series([3.0], index=pd.to_datetime(["2024-01-05"]))
+    prices.refresh(["AAA"], START, END, source, store)
+    assert len(source.calls) == 2
+    assert store.coverage("AAA", "stub") == (START, END)
+
+
+@pytest.mark.parametrize("header", ["티커,이름", "Ticker,Name", "symbol", "종목코드,종목명"])
+def test_parse_universe_skips_header(header):
+    text = f"{header}\n005930.KS,삼성전자\nbrk-b\n"
+    assert prices.parse_universe(text) == {"005930.KS": "삼성전자", "BRK-B": "BRK-B"}
+
+
+def test_parse_universe_keeps_first_ticker_and_comments():
+    text = "# 관심 종목\n^GSPC,S&P 500\n\nKRW=X,원/달러  # 환율\n"
+    assert prices.parse_universe(text) == {"^GSPC": "S&P 500", "KRW=X": "원/달러"}
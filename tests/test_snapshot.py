@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils import snapshot
+
+
+@pytest.fixture(autouse=True)
+def snapshot_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(snapshot, "SNAPSHOT_DIR", str(tmp_path / "snapshots"))
+
+
+def test_round_trip_types():
+    df = pd.DataFrame({
+        "지역": ["서울특별시", None, "부산광역시"],
+        "인구": [1, 2, 3],
+        "비율": [0.5, np.nan, 1.5],
+        "날짜": pd.to_datetime(["2024-01-01", "2024-01-02", None]),
+    })
+    snapshot.save_snapshot("t", df)
+    loaded = snapshot.load_snapshot("t")
+    assert loaded["지역"].tolist()[0] == "서울특별시" and pd.isna(loaded["지역"][1])
+    for col in ("인구", "비율", "날짜"):
+        np.testing.assert_array_equal(np.asarray(loaded[col]), df[col].to_numpy())
+
+
+@pytest.mark.parametrize("tz", ["Asia/Seoul", "UTC", "+09:00"])
+def test_tz_aware_datetimes(tz):
+    df = pd.DataFrame({"시각": pd.to_datetime(["2024-01-01 09:00", None, "2024-07-01 18:30"]).tz_localize(tz)})
+    snapshot.save_snapshot("tz", df)
+    assert snapshot.read_manifest("tz")["columns"][0]["tz"]
+    loaded = snapshot.load_snapshot("tz")
+    assert str(loaded["시각"].dt.tz) == str(df["시각"].dt.tz)
+    pd.testing.assert_series_equal(loaded["시각"], df["시각"])
+
+
+def test_nullable_boolean_with_missing():
+    df = pd.DataFrame({"개업": pd.array([True, None, False], dtype="boolean")})
+    snapshot.save_snapshot("b", df)
+    loaded = snapshot.load_snapshot("b")
+    assert loaded["개업"].tolist()[::2] == [1.0, 0.0] and np.isnan(loaded["개업"][1])
+
+
+def test_overwrite_in_same_second_is_reloaded():
+    from utils import pipeline
+
+    snapshot.save_snapshot("same", pd.DataFrame({"인구": [1, 2]}))
+    assert pipeline.from_snapshot("same").df["인구"].tolist() == [1, 2]
+    snapshot.save_snapshot("same", pd.DataFrame({"인구": [3]}))
+    assert pipeline.from_snapshot("same").df["인구"].tolist() == [3]
@@ -0,0 +1,60 @@
+import tracemalloc
+
+import pytest
+
+pytest.importorskip("streamlit")
+
+from utils import ui
+
+
+@pytest.fixture(autouse=True)
+def reset_tracing():
+    yield
+    ui._trace_leases.clear()
+    if ui._trace_timer is not None:
+        ui._trace_timer.cancel()
+    if ui._trace_owned:
+        tracemalloc.stop()
+        ui._trace_owned = False
+
+
+@pytest.mark.parametrize("mode, param, expected", [
+    (None, "1", False),
+    ("query", "1", True),
+    ("query", None, False),
+    ("1", None, True),
+])
+def test_debug_param_needs_env(monkeypatch, mode, param, expected):
+    if mode is None:
+        monkeypatch.delenv("DEBUG_PANEL", raising=False)
+    else:
+        monkeypatch.setenv("DEBUG_PANEL", mode)
+    monkeypatch.setattr(ui.st, "query_params", {} if param is None else {ui.DEBUG_PARAM: param})
+    assert ui.debug_enabled() is expected
+
+
+def test_tracing_stops_when_last_session_releases():
+    ui._set_tracing("a", True)
+    ui._set_tracing("b", True)
+    assert tracemalloc.is_tracing()
+    ui._set_tracing("a", False)
+    assert tracemalloc.is_tracing()
+    ui._set_tracing("b", False)
+    assert not tracemalloc.is_tracing()
+
+
+def test_tracing_lease_expires(monkeypatch):
+    monkeypatch.setattr(ui, "TRACE_LEASE_SECONDS", 0.05)
+    ui._set_tracing("a", True)
+    assert tracemalloc.is_tracing()
+    ui._trace_timer.join(2)
+    assert not tracemalloc.is_tracing()
+
+
+@pytest.mark.parametrize("value, expected", [(None, False), ("0", False), ("1", True)])
+def test_cache_admin_needs_env(monkeypatch, value, expected):
+    if value is None:
+        monkeypatch.delenv(ui.CACHE_ADMIN_ENV, raising=False)
+    else:
+        monkeypatch.setenv(ui.CACHE_ADMIN_ENV, value)
+    assert ui.cache_admin_enabled() is expected
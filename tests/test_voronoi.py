@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+
+from utils import voronoi
+
+pytest.importorskip("scipy")
+
+# 위도 0 근처라 평면 축척(cos φ0)이 거의 1입니다.
+LAT = np.array([0.2, 0.2, 0.8, 0.8, 0.5])
+LON = np.array([0.2, 0.8, 0.2, 0.8, 0.5])
+SQUARE = [[[[0, 0], [1, 0], [1, 1], [0, 1], [0, 0]]]]
+# ㄱ자 경계: 오른쪽 위 사분면(0.5~1, 0.5~1)이 비어 있습니다.
+L_SHAPE = [[[[0, 0], [1, 0], [1, 0.5], [0.5, 0.5], [0.5, 1], [0, 1], [0, 0]]]]
+# 가운데 구멍(0.4~0.6)이 뚫린 사각형
+HOLED = [[SQUARE[0][0], [[0.4, 0.4], [0.6, 0.4], [0.6, 0.6], [0.4, 0.6], [0.4, 0.4]]]]
+
+
+def cell_area(areas, i):
+    total = 0.0
+    for polygon in areas.cells[i]:
+        outer, *holes = [np.asarray(ring)[:-1] for ring in polygon]
+        total += abs(voronoi._signed_area(outer)) - sum(abs(voronoi._signed_area(h)) for h in holes)
+    return total
+
+
+def test_cells_tile_boundary():
+    areas = voronoi.ServiceAreas(LAT, LON, SQUARE)
+    total = sum(cell_area(areas, i) for i in range(len(LAT)))
+    assert total == pytest.approx(1.0, rel=1e-6)
+
+
+def test_concave_boundary_clips_cells():
+    areas = voronoi.ServiceAreas(LAT, LON, L_SHAPE)
+    assert sum(cell_area(areas, i) for i in range(len(LAT))) == pytest.approx(0.75, rel=1e-6)
+    # 오른쪽 위 시설의 셀은 경계 밖이라 통째로 잘려 나갑니다.
+    assert areas.cells[3] == []
+
+
+def test_assign_matches_nearest_facility():
+    rng = np.random.default_rng(0)
+    lat, lon = rng.uniform(0.01, 0.99, 500), rng.uniform(0.01, 0.99, 500)
+    areas = voronoi.ServiceAreas(LAT, LON, SQUARE)
+    x_scale = areas.scale
+    d = ((lon[:, None] - LON) * x_scale) ** 2 + (lat[:, None] - LAT) ** 2
+    np.testing.assert_array_equal(areas.assign(lat, lon), d.argmin(axis=1))
+
+
+def test_points_outside_boundary_are_masked():
+    areas = voronoi.ServiceAreas(LAT, LON, L_SHAPE)
+    lat = np.array([0.1, 0.9, 0.9, 1.5, 0.3])
+    lon = np.array([0.1, 0.1, 0.9, 0.3, 0.7])
+    np.testing.assert_array_equal(areas.assign(lat, lon), [0, 2, -1, -1, 1])
+    load, outside = areas.load(lat, lon)
+    assert outside == 2
+    np.testing.assert_array_equal(load, [1, 1, 1, 0, 0])
+
+
+def test_points_in_hole_are_outside():
+    areas = voronoi.ServiceAreas(LAT, LON, HOLED)
+    assigned = areas.assign([0.5, 0.45, 0.3], [0.5, 0.55, 0.3])
+    np.testing.assert_array_equal(assigned, [-1, -1, 0])
+
+
+def test_duplicate_facilities_share_first_cell():
+    lat, lon = np.r_[LAT, LAT[0]], np.r_[LON, LON[0]]
+    areas = voronoi.ServiceAreas(lat, lon, SQUARE)
+    load, outside = areas.load([0.1, 0.15], [0.1, 0.1])
+    assert outside == 0
+    assert load[0] == 2 and load[-1] == 0
+
+
+def test_empty_points():
+    areas = voronoi.ServiceAreas(LAT, LON, SQUARE)
+    load, outside = areas.load([], [])
+    assert outside == 0 and load.sum() == 0 and len(load) == len(LAT)
+
+
+def test_cache_size_counts_tree_and_cells():
+    from utils.cache import estimate_size
+    from utils.spatial import FacilityIndex
+
+    areas = voronoi.ServiceAreas(LAT, LON, SQUARE)
+    index = FacilityIndex(LAT, LON)
+    assert estimate_size(index) >= index.tree.data.nbytes + index.tree.indices.nbytes
+    assert estimate_size(areas) > estimate_size(areas.cells) + areas._tree.data.nbytes
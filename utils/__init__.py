@@ -0,0 +1 @@
+"""여러 페이지가 함께 쓰는 데이터 처리 모듈 모음."""
@@ -0,0 +1,47 @@
+"""주가 분석 지표.
+
+모든 함수는 날짜 × 종목 wide DataFrame 전체에 대해 한 번에 계산하며,
+종목별 파이썬 반복문을 쓰지 않습니다.
+"""
+import numpy as np
+import pandas as pd
+
+TRADING_DAYS = 252
+
+
+def normalized(prices, base=100.0):
+    """각 종목의 첫 유효 가격을 base로 맞춘 상대 가격."""
+    first = prices.bfill().iloc[0]
+    return prices.div(first) * base
+
+
+def daily_returns(prices):
+    """일간 수익률 (결측은 이어 붙이지 않습니다)."""
+    return prices.pct_change(fill_method=None)
+
+
+def rolling_volatility(returns, window=21, periods=TRADING_DAYS):
+    """window일 이동 표준편차를 연율화한 변동성."""
+    return returns.rolling(window, min_periods=max(2, window // 2)).std() * np.sqrt(periods)
+
+
+def drawdown(prices):
+    """직전 최고가 대비 하락률 (0 이하)."""
+    return prices / prices.cummax() - 1.0
+
+
+def correlation(returns):
+    """일간 수익률 상관계수 행렬."""
+    return returns.corr()
+
+
+def summary(prices, periods=TRADING_DAYS):
+    """종목별 누적 수익률, 연율화 변동성, 최대 낙폭 요약표."""
+    returns = daily_returns(prices)
+    first = prices.bfill().iloc[0]
+    last = prices.ffill().iloc[-1]
+    return pd.DataFrame({
+        "누적수익률": last / first - 1.0,
+        "연율화변동성": returns.std() * np.sqrt(periods),
+        "최대낙폭": drawdown(prices).min(),
+    })
@@ -0,0 +1,266 @@
+"""프로세스 전역 LRU 캐시.
+
+Streamlit은 위젯을 누를 때마다 스크립트를 처음부터 다시 실행하므로,
+같은 입력에 대한 무거운 계산 결과를 모듈 수준 캐시에 보관해 재사용합니다.
+캐시는 프로세스의 모든 세션이 공유하므로, 여러 사용자가 같은 분석을 보면
+계산은 한 번만 일어납니다.
+
+이름을 붙인 캐시는 레지스트리에 등록되어 관리 페이지(pages/00_cache.py, CACHE_ADMIN=1일 때)에
+표시되고, 모든 캐시의 합계가 전역 상한(CACHE_MAX_MB 환경 변수, 기본 2GB)을
+넘으면 가장 오래 쓰이지 않은 항목부터 캐시를 가리지 않고 제거합니다.
+"""
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+GLOBAL_MAX_BYTES = int(os.environ.get("CACHE_MAX_MB", "2048")) * 1024 ** 2
+
+_registry = {}
+_registry_lock = threading.Lock()
+_MISSING = object()
+
+
+def estimate_size(value):
+    """캐시 항목의 대략적인 메모리 크기(바이트)를 추정합니다.
+
+    직접 만든 객체(KD-tree 인덱스 등)는 nbytes() 메서드로 자기 크기를 알려 줄 수 있습니다.
+    """
+    if callable(getattr(value, "nbytes", None)):
+        return int(value.nbytes())
+    if hasattr(value, "memory_usage"):
+        # DataFrame / Series
+        usage = value.memory_usage(deep=True)
+        return int(usage.sum()) if hasattr(usage, "sum") else int(usage)
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return len(value)
+    if hasattr(value, "__dataclass_fields__"):
+        return sum(estimate_size(getattr(value, name)) for name in value.__dataclass_fields__)
+    if isinstance(value, (dict, list, tuple)):
+        return _container_size(value)
+    return sys.getsizeof(value)
+
+
+def _container_size(value):
+    # GeoJSON처럼 중첩된 dict/list는 안쪽 객체까지 모두 더합니다. (저장할 때 한 번만 계산)
+    total, stack = 0, [value]
+    while stack:
+        item = stack.pop()
+        total += sys.getsizeof(item)
+        if isinstance(item, dict):
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple)):
+            stack.extend(item)
+    return total
+
+
+class LRUCache:
+    """항목 수와 전체 크기로 제한되는 스레드 안전 LRU 캐시.
+
+    ttl(초)을 주면 저장 후 그 시간이 지난 항목은 없는 것으로 봅니다.
+    name을 주면 레지스트리에 등록되어 전역 메모리 상한과 관리 화면의 대상이 됩니다.
+    """
+
+    def __init__(self, max_entries=16, max_bytes=None, ttl=None, name=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.name = name
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data = OrderedDict()
+        self._sizes = {}
+        self._stored = {}
+        self._used = {}
+        self._inflight = {}
+        self._lock = threading.RLock()
+        if name is not None:
+            with _registry_lock:
+                _registry[name] = self
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._data and not self._expired(key, time.monotonic())
+
+    @property
+    def total_bytes(self):
+        return sum(self._sizes.values())
+
+    def _expired(self, key, now):
+        return self.ttl is not None and now - self._stored[key] > self.ttl
+
+    def _lookup(self, key, default):
+        # 적중/미스를 세지 않고 꺼냅니다. 만료된 항목은 이때 지웁니다.
+        if key not in self._data:
+            return default
+        now = time.monotonic()
+        if self._expired(key, now):
+            self._remove(key)
+            return default
+        self._data.move_to_end(key)
+        self._used[key] = now
+        return self._data[key]
+
+    def _remove(self, key):
+        del self._data[key]
+        for meta in (self._sizes, self._stored, self._used):
+            meta.pop(key, None)
+
+    def get(self, key, default=None):
+        with self._lock:
+            value = self._lookup(key, _MISSING)
+            if value is _MISSING:
+                self.misses += 1
+                return default
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        size = estimate_size(value)
+        now = time.monotonic()
+        with self._lock:
+            if key in self._data:
+                del self._data[key]
+            self._data[key] = value
+            self._sizes[key] = size
+            self._stored[key] = self._used[key] = now
+            self._evict()
+        if self.name is not None:
+            _enforce_global_limit()
+
+    def pop(self, key, default=None):
+        """항목을 꺼내면서 지웁니다. (제거 횟수에는 세지 않습니다)"""
+        with self._lock:
+            if key not in self._data:
+                return default
+            value = self._data[key]
+            self._remove(key)
+            return value
+
+    def get_or_compute(self, key, compute):
+        """캐시에 있으면 꺼내고, 없으면 compute()를 실행해 저장한 뒤 돌려줍니다.
+
+        여러 세션이 같은 키를 동시에 요청하면 한 곳에서만 계산하고 나머지는 그 결과를 기다립니다.
+        """
+        with self._lock:
+            value = self._lookup(key, _MISSING)
+            if value is not _MISSING:
+                self.hits += 1
+                return value
+            lock = self._inflight.setdefault(key, threading.Lock())
+        try:
+            with lock:
+                with self._lock:
+                    value = self._lookup(key, _MISSING)
+                    if value is not _MISSING:
+                        self.hits += 1
+                        return value
+                    self.misses += 1
+                value = compute()
+                self.put(key, value)
+                return value
+        finally:
+            with self._lock:
+                if self._inflight.get(key) is lock:
+                    del self._inflight[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            for meta in (self._sizes, self._stored, self._used):
+                meta.clear()
+
+    def stats(self):
+        return {
+            "entries": len(self._data),
+            "bytes": self.total_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def entries(self):
+        """항목별 (키, 크기, 저장 후 경과 초, 마지막 사용 후 경과 초) 목록. 오래 쓰이지 않은 순서입니다."""
+        now = time.monotonic()
+        with self._lock:
+            return [
+                (key, self._sizes[key], now - self._stored[key], now - self._used[key])
+                for key in self._data
+            ]
+
+    def _oldest(self):
+        # 전역 상한 정리용: (마지막 사용 시각, 키). 방금 넣은 항목 하나만 남았으면 None.
+        with self._lock:
+            if len(self._data) <= 1:
+                return None
+            key = next(iter(self._data))
+            return self._used[key], key
+
+    def _discard(self, key):
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+                self.evictions += 1
+
+    def _evict(self):
+        # 만료된 항목을 먼저 지우고, 가장 오래 쓰이지 않은 항목부터 제거하되 방금 넣은 항목 하나는 남겨 둡니다.
+        if self.ttl is not None:
+            now = time.monotonic()
+            for key in [k for k in self._data if self._expired(k, now)]:
+                self._remove(key)
+        while len(self._data) > 1 and (
+            len(self._data) > self.max_entries
+            or (self.max_bytes is not None and self.total_bytes > self.max_bytes)
+        ):
+            old_key = next(iter(self._data))
+            self._remove(old_key)
+            self.evictions += 1
+
+
+def registered():
+    """이름이 붙은 캐시 목록 {이름: LRUCache}."""
+    with _registry_lock:
+        return dict(_registry)
+
+
+def registry_stats():
+    """캐시별 통계 목록. 관리 화면과 계측 패널에서 씁니다."""
+    rows = []
+    for name, cache in registered().items():
+        stats = cache.stats()
+        lookups = stats["hits"] + stats["misses"]
+        rows.append({
+            "name": name,
+            **stats,
+            "hit_rate": stats["hits"] / lookups if lookups else None,
+            "ttl": cache.ttl,
+            "max_entries": cache.max_entries,
+            "max_bytes": cache.max_bytes,
+        })
+    return rows
+
+
+def total_bytes():
+    """등록된 모든 캐시의 크기 합계."""
+    return sum(cache.total_bytes for cache in registered().values())
+
+
+def clear_all():
+    for cache in registered().values():
+        cache.clear()
+
+
+def _enforce_global_limit():
+    # 모든 캐시를 통틀어 마지막 사용이 가장 오래된 항목부터 지웁니다.
+    while total_bytes() > GLOBAL_MAX_BYTES:
+        candidates = [(oldest, cache) for cache in registered().values() if (oldest := cache._oldest())]
+        if not candidates:
+            return
+        (_, key), cache = min(candidates, key=lambda item: item[0][0])
+        cache._discard(key)
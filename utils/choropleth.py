@@ -0,0 +1,70 @@
+"""단계구분도(choropleth) 그림 캐시.
+
+px.choropleth는 호출할 때마다 경계 GeoJSON 전체를 그림에 넣고 검증하므로, 지도와
+상관없는 위젯만 바꿔도 그림 생성·직렬화 비용을 다시 치릅니다.
+
+- 그림은 (데이터 해시, 색상 지표, 기준값, 색상 척도 등 그리기 옵션) 키로 캐시하므로
+  같은 입력이면 그림을 새로 만들지 않습니다.
+- Streamlit 정적 파일 서빙(.streamlit/config.toml의 server.enableStaticServing)이 켜져
+  있으면 경계는 static/geo/ 아래 파일의 URL로만 넘기므로, 그림에는 값만 담기고 경계는
+  브라우저가 한 번 받아 재사용합니다. 꺼져 있으면 GeoJSON을 그림에 넣습니다.
+"""
+import hashlib
+import os
+
+import pandas as pd
+
+from utils import geo, instrument
+from utils.cache import LRUCache
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "static")
+STATIC_URL = "app/static"
+
+_figures = LRUCache(max_entries=32, name="choropleth.figures")
+
+
+def _static_serving():
+    try:
+        import streamlit as st
+
+        return bool(st.get_option("server.enableStaticServing"))
+    except Exception:
+        return False
+
+
+@instrument.timed("choropleth.geometry")
+def geometry(level="sido", simplified=True):
+    """px.choropleth에 넘길 geojson 값. 정적 서빙이 켜져 있으면 URL 문자열, 아니면 GeoJSON 객체입니다."""
+    if _static_serving():
+        path = geo.static_copy(level, STATIC_DIR, simplified)
+        return f"{STATIC_URL}/{os.path.relpath(path, STATIC_DIR).replace(os.sep, '/')}"
+    return geo.load_boundaries(level, simplified)
+
+
+def data_hash(df):
+    """DataFrame 내용(인덱스·컬럼 이름 포함)의 해시."""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr(list(df.columns)).encode("utf-8"))
+    digest.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+@instrument.timed("choropleth.figure")
+def figure(df, level="sido", featureidkey="properties.name", geos=None, layout=None, **options):
+    """캐시된 단계구분도 그림. options는 px.choropleth 인자(locations, color, color_continuous_midpoint 등)입니다.
+
+    geos/layout은 update_geos/update_layout 인자입니다. 돌려받은 그림은 모든 세션이 공유하므로 수정하지 마세요.
+    """
+    geojson = geometry(level)
+    source = geojson if isinstance(geojson, str) else (geo.GEO_VERSION, level)
+    key = (data_hash(df), source, featureidkey, repr(sorted(options.items())), repr(geos), repr(layout))
+
+    def build():
+        import plotly.express as px
+
+        fig = px.choropleth(df, geojson=geojson, featureidkey=featureidkey, **options)
+        fig.update_geos(**(geos or {}))
+        fig.update_layout(**(layout or {}))
+        return fig
+
+    return _figures.get_or_compute(key, build)
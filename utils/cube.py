@@ -0,0 +1,86 @@
+"""시도 → 시군구 → 읍면동 집계 큐브.
+
+데이터셋마다 가장 세밀한 수준(읍면동)으로 한 번만 묶고, 위 수준은 그 작은 표를
+다시 합쳐 만듭니다. 드릴다운·롤업·수준 전환은 미리 만든 표에서 정렬된 인덱스로
+구간만 잘라 오므로 원본 행을 다시 훑지 않습니다.
+"""
+import numpy as np
+import pandas as pd
+
+from utils.region import LEVELS, split_regions
+
+COUNT = "건수"
+# 상위 수준은 알지만 하위 수준을 찾지 못한 행. 합계가 맞도록 버리지 않고 따로 묶습니다.
+UNKNOWN = "(미확인)"
+
+
+def _drop_subtotals(keys):
+    # 통계표(KOSIS 등)는 '서울특별시' 합계 행과 '서울특별시 종로구' 행이 함께 있습니다.
+    # 같은 상위 경로 아래에 더 세밀한 행이 있으면 소계 행은 중복이므로 뺍니다.
+    keep = np.ones(len(keys), dtype=bool)
+    for depth in range(1, len(LEVELS)):
+        known = keys[LEVELS[depth]].notna().to_numpy()
+        subtotal = ~known & keys[LEVELS[depth - 1]].notna().to_numpy()
+        if not subtotal.any() or not known.any():
+            continue
+        prefix = pd.MultiIndex.from_frame(keys[list(LEVELS[:depth])].fillna(UNKNOWN))
+        keep &= ~(subtotal & prefix.isin(prefix[known]))
+    return keep
+
+
+class RegionCube:
+    """모든 수준의 건수·합계를 미리 계산해 둔 집계표.
+
+    regions: split_regions 결과 (시도를 찾지 못한 행은 빠집니다)
+    values: {이름: 숫자 Series} — 수준별로 합계를 낼 값 (예: 독거노인 인구)
+    drop_subtotals: 통계표처럼 상위 합계 행이 섞여 있으면 True
+    """
+
+    def __init__(self, regions, values=None, drop_subtotals=False):
+        data = pd.DataFrame({COUNT: np.ones(len(regions), dtype=np.int64), **(values or {})}, index=regions.index)
+        mask = regions[LEVELS[0]].notna().to_numpy().copy()
+        if drop_subtotals:
+            mask &= _drop_subtotals(regions)
+        keys = regions.loc[mask, list(LEVELS)].fillna(UNKNOWN)
+        finest = data.loc[mask].groupby([keys[level] for level in LEVELS], sort=True).sum()
+        self.tables = {LEVELS[-1]: finest}
+        for depth in range(len(LEVELS) - 1, 0, -1):
+            coarser = self.tables[LEVELS[depth]].groupby(level=list(range(depth)), sort=True).sum()
+            if not isinstance(coarser.index, pd.MultiIndex):
+                coarser.index = pd.MultiIndex.from_arrays([coarser.index])
+            self.tables[LEVELS[depth - 1]] = coarser
+
+    def table(self, level, parent=()):
+        """level 수준의 표. parent=('서울특별시',)처럼 상위 경로를 주면 그 아래 지역만 돌려줍니다."""
+        table = self.tables[level]
+        if parent:
+            start, stop = table.index.slice_locs(tuple(parent), tuple(parent))
+            table = table.iloc[start:stop]
+        return table.reset_index()
+
+    def children(self, parent=()):
+        """parent 바로 아래 수준의 표 (드릴다운)."""
+        return self.table(LEVELS[len(parent)], parent)
+
+    def names(self, parent=()):
+        """parent 바로 아래 지역 이름 목록 (선택 상자용)."""
+        return self.children(parent)[LEVELS[len(parent)]].tolist()
+
+    def nbytes(self):
+        """캐시 크기 계산용 메모리 크기 (utils.cache.estimate_size)."""
+        return sum(int(t.memory_usage(deep=True).sum()) for t in self.tables.values())
+
+
+def build(df, region_col, value_cols=(), drop_subtotals=False):
+    """df의 region_col(주소/지역명)을 계층으로 나눠 큐브를 만듭니다. 값은 숫자로 바꾸고 결측은 0으로 봅니다."""
+    values = {col: pd.to_numeric(df[col], errors="coerce").fillna(0) for col in value_cols}
+    return RegionCube(split_regions(df[region_col]), values, drop_subtotals)
+
+
+def path_label(table, level):
+    """표의 경로 컬럼을 '서울특별시 종로구'처럼 이어 붙인 라벨. 시군구 경계의 full_name과 같은 형식입니다."""
+    columns = LEVELS[:LEVELS.index(level) + 1]
+    label = table[columns[0]].astype(str)
+    for col in columns[1:]:
+        label = label + " " + table[col].astype(str)
+    return label
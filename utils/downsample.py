@@ -0,0 +1,82 @@
+"""차트용 시계열 다운샘플링.
+
+- lttb: Largest-Triangle-Three-Buckets. 모양(급등락)을 잘 보존합니다.
+- minmax: 버킷마다 최솟값·최댓값을 남깁니다. 완전히 벡터화되어 가장 빠릅니다.
+
+둘 다 원래 배열에서 남길 위치(인덱스)를 돌려주므로 x·y 모두에 그대로 적용할 수 있습니다.
+"""
+import numpy as np
+
+METHODS = ("lttb", "minmax")
+
+# 전체 점 수가 이 값을 넘으면 WebGL(Scattergl) 트레이스를 씁니다.
+WEBGL_THRESHOLD = 10_000
+
+
+def _as_float(x):
+    x = np.asarray(x)
+    if np.issubdtype(x.dtype, np.datetime64):
+        return x.astype("datetime64[ns]").astype(np.int64).astype(np.float64)
+    return x.astype(np.float64)
+
+
+def lttb_indices(x, y, n_out):
+    """LTTB로 남길 인덱스 n_out개를 고릅니다. 첫 점과 마지막 점은 항상 포함됩니다."""
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = _as_float(x)
+    y = np.asarray(y, dtype=np.float64)
+
+    # 첫/마지막 점을 뺀 나머지를 n_out - 2개 버킷으로 나눕니다.
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    # 다음 버킷 평균은 누적합으로 한 번에 구해 둡니다.
+    cx, cy = np.concatenate(([0.0], np.cumsum(x))), np.concatenate(([0.0], np.cumsum(y)))
+    next_lo = np.append(edges[1:-1], n - 1)
+    next_hi = np.append(edges[2:], n)
+    avg_x = (cx[next_hi] - cx[next_lo]) / (next_hi - next_lo)
+    avg_y = (cy[next_hi] - cy[next_lo]) / (next_hi - next_lo)
+
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    prev = 0
+    for b in range(n_out - 2):
+        lo, hi = edges[b], edges[b + 1]
+        # 이전 선택점 · 버킷 후보 · 다음 버킷 평균이 이루는 삼각형 넓이가 최대인 후보
+        area = np.abs(
+            (x[prev] - avg_x[b]) * (y[lo:hi] - y[prev]) - (x[prev] - x[lo:hi]) * (avg_y[b] - y[prev])
+        )
+        prev = lo + int(np.argmax(area))
+        selected[b + 1] = prev
+    return selected
+
+
+def minmax_indices(y, n_buckets):
+    """버킷마다 최솟값과 최댓값 위치를 시간 순서대로 남깁니다 (최대 2·n_buckets개)."""
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    if 2 * n_buckets >= n:
+        return np.arange(n)
+    size = n // n_buckets
+    usable = size * n_buckets
+    blocks = y[:usable].reshape(n_buckets, size)
+    offsets = np.arange(n_buckets) * size
+    lows = offsets + blocks.argmin(axis=1)
+    highs = offsets + blocks.argmax(axis=1)
+    tail = np.arange(usable, n)
+    return np.unique(np.concatenate((lows, highs, tail, [0, n - 1])))
+
+
+def downsample(x, y, n_out, method="lttb"):
+    """(x, y)를 약 n_out개 점으로 줄입니다. 결측값은 먼저 제외합니다."""
+    x = np.asarray(x)
+    y = np.asarray(y, dtype=np.float64)
+    valid = ~np.isnan(y)
+    x, y = x[valid], y[valid]
+    if method == "lttb":
+        idx = lttb_indices(x, y, n_out)
+    elif method == "minmax":
+        idx = minmax_indices(y, max(1, n_out // 2))
+    else:
+        raise ValueError(f"알 수 없는 다운샘플링 방식입니다: {method}")
+    return x[idx], y[idx]
@@ -0,0 +1,69 @@
+"""CSV 인코딩 판별.
+
+공공데이터 CSV는 대부분 CP949(EUC-KR 확장)이고 일부가 UTF-8(BOM 포함)입니다.
+파일 전체를 UTF-8로 읽어 보고 실패하면 CP949로 다시 읽는 대신, 앞부분
+PREFIX_BYTES만 보고 인코딩을 정해 본 파싱은 한 번만 합니다.
+"""
+import codecs
+
+PREFIX_BYTES = 64 * 1024
+
+_BOMS = (
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+)
+# 앞부분이 ASCII뿐이면 한글이 뒤에 처음 나올 수 있으므로, 본 파싱이 실패하면 이 인코딩으로 한 번 더 읽습니다.
+FALLBACK_ENCODING = "cp949"
+
+
+def _decodes(prefix, encoding):
+    try:
+        prefix.decode(encoding)
+        return True
+    except UnicodeDecodeError as e:
+        # 앞부분을 자르면서 끝의 멀티바이트 문자가 잘렸으면 정상으로 봅니다.
+        return e.start >= len(prefix) - 3 and e.end == len(prefix)
+
+
+def _hangul_ratio(text):
+    # 비ASCII 문자 중 한글 음절(가-힣) 비율. 잘못 디코딩하면 한자·기호가 섞여 낮아집니다.
+    non_ascii = [c for c in text if ord(c) > 0x7F]
+    if not non_ascii:
+        return 0.0
+    return sum("가" <= c <= "힣" for c in non_ascii) / len(non_ascii)
+
+
+def detect_encoding(prefix):
+    """앞부분 바이트만 보고 인코딩 이름을 고릅니다.
+
+    BOM → UTF-8 → CP949 순서로 보고, 둘 다 깨끗하게 풀리지 않으면 오류를 대체 문자로
+    바꿔 읽었을 때 한글 음절 비율이 높은 쪽을 고릅니다.
+    """
+    prefix = bytes(prefix)
+    for bom, encoding in _BOMS:
+        if prefix.startswith(bom):
+            return encoding
+    if _decodes(prefix, "utf-8"):
+        return "utf-8"
+    if _decodes(prefix, "cp949"):
+        return "cp949"
+    candidates = ("utf-8", "cp949")
+    return max(candidates, key=lambda enc: _hangul_ratio(prefix.decode(enc, errors="replace")))
+
+
+def is_ascii(prefix):
+    """앞부분이 ASCII뿐이라 인코딩을 확정할 수 없는지."""
+    return bytes(prefix).isascii()
+
+
+def read_prefix(file, nbytes=PREFIX_BYTES):
+    """파일 앞부분 nbytes만 꺼냅니다. 업로드 버퍼 전체를 복사하지 않습니다."""
+    if hasattr(file, "getbuffer"):
+        with file.getbuffer() as view:
+            return bytes(view[:nbytes])
+    file.seek(0)
+    prefix = file.read(nbytes)
+    file.seek(0)
+    return prefix
+
@@ -0,0 +1,144 @@
+"""동시 다운로드 스케줄러.
+
+작업(키)마다 fetch_fn(key)를 스레드 풀에서 실행합니다.
+- 동시 실행 수 제한 (max_workers)
+- 시도마다 제한 시간 (timeout초를 넘기면 실패로 보고 재시도)
+- 지수 백오프 재시도 (retries회)
+- 초당 요청 수 제한 (rate)
+결과는 끝나는 순서대로 하나씩 내어주므로, 호출하는 쪽에서 부분 결과를 바로 쓸 수 있습니다.
+"""
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+
+DEFAULT_MAX_WORKERS = 4
+DEFAULT_TIMEOUT = 20.0
+DEFAULT_RETRIES = 2
+DEFAULT_BACKOFF = 0.5
+DEFAULT_RATE = 5.0
+
+
+@dataclass
+class FetchResult:
+    key: object
+    value: object = None
+    error: Exception = None
+    attempts: int = 0
+
+    @property
+    def ok(self):
+        return self.error is None
+
+
+class RateLimiter:
+    """초당 rate회를 넘지 않도록 요청 시작 간격을 맞춥니다."""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate else 0.0
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            now = time.monotonic()
+            wait_for = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if wait_for > 0:
+            time.sleep(wait_for)
+
+
+def _timed(fetch_fn, key, started):
+    # 작업 스레드에서 실제로 시작한 시각을 남깁니다. 제한 시간은 이때부터 잽니다.
+    started.append(time.monotonic())
+    return fetch_fn(key)
+
+
+def iter_fetch(keys, fetch_fn, max_workers=DEFAULT_MAX_WORKERS, timeout=DEFAULT_TIMEOUT,
+               retries=DEFAULT_RETRIES, backoff=DEFAULT_BACKOFF, rate=DEFAULT_RATE):
+    """keys의 각 항목에 대해 fetch_fn을 실행하고 FetchResult를 완료 순서대로 내어줍니다.
+
+    제한 시간을 넘긴 시도의 스레드는 멈출 수 없으므로 끝날 때까지 자리를 차지한 것으로 보고,
+    그동안은 그만큼 적게 시작합니다. 응답 없는 스레드가 timeout초 넘게 모든 자리를 차지하면
+    남은 작업은 실패로 돌려줍니다.
+    """
+    limiter = RateLimiter(rate)
+    queue = deque((key, 1, 0.0) for key in keys)  # (키, 시도 번호, 시작 가능 시각)
+    running = {}  # future -> (키, 시도 번호, [실제 시작 시각], 제출 시각)
+    abandoned = set()  # 제한 시간을 넘겨 결과를 버렸지만 아직 스레드가 끝나지 않은 future
+    stalled_since = None
+    pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="fetch")
+
+    def retry_or_fail(key, attempt, error):
+        if attempt <= retries:
+            delay = backoff * 2 ** (attempt - 1) * (1 + random.random() * 0.25)
+            queue.append((key, attempt + 1, time.monotonic() + delay))
+            return None
+        return FetchResult(key, error=error, attempts=attempt)
+
+    try:
+        while queue or running:
+            now = time.monotonic()
+            abandoned = {future for future in abandoned if not future.done()}
+            # 자리가 비어 있고 대기 시간이 지난 작업을 시작
+            for _ in range(len(queue)):
+                if len(running) + len(abandoned) >= max_workers:
+                    break
+                key, attempt, ready_at = queue.popleft()
+                if ready_at > now:
+                    queue.append((key, attempt, ready_at))
+                    continue
+                limiter.acquire()
+                started = []
+                running[pool.submit(_timed, fetch_fn, key, started)] = (key, attempt, started, time.monotonic())
+
+            now = time.monotonic()
+            if queue and not running and len(abandoned) >= max_workers:
+                # 응답 없는 스레드가 모든 자리를 차지하고 있습니다.
+                stalled_since = stalled_since if stalled_since is not None else now
+                if now - stalled_since >= timeout:
+                    while queue:
+                        key, attempt, _ = queue.popleft()
+                        yield FetchResult(key, error=TimeoutError(
+                            f"{key}: 응답 없는 요청이 모든 자리를 {timeout:g}초 넘게 차지하고 있어 시작하지 못했습니다."
+                        ), attempts=attempt - 1)
+                    break
+            else:
+                stalled_since = None
+
+            # 아직 시작하지 않은 시도는 제출 시각 기준으로 깨어나 다시 확인합니다.
+            deadlines = [(started[0] if started else submitted) + timeout for _, _, started, submitted in running.values()]
+            wakeups = [ready_at for _, _, ready_at in queue]
+            if stalled_since is not None:
+                wakeups.append(stalled_since + timeout)
+            wake = min(deadlines + wakeups, default=now)
+            pending = list(running) + list(abandoned)
+            if pending:
+                done, _ = wait(pending, timeout=max(0.0, wake - now), return_when=FIRST_COMPLETED)
+            else:
+                # 재시도 대기 중인 작업만 남았습니다. (wait는 빈 목록이면 바로 돌아옵니다)
+                time.sleep(max(0.0, wake - now))
+                done = set()
+
+            for future in done:
+                if future not in running:
+                    continue
+                key, attempt, _, _ = running.pop(future)
+                error = future.exception()
+                result = FetchResult(key, future.result(), attempts=attempt) if error is None else retry_or_fail(key, attempt, error)
+                if result is not None:
+                    yield result
+
+            # 제한 시간을 넘긴 시도는 결과를 버리고 재시도 (스레드는 끝날 때까지 자리를 차지함)
+            now = time.monotonic()
+            for future, (key, attempt, started, _) in list(running.items()):
+                if started and now - started[0] >= timeout:
+                    del running[future]
+                    abandoned.add(future)
+                    result = retry_or_fail(key, attempt, TimeoutError(f"{key}: {timeout:g}초 안에 응답이 없습니다."))
+                    if result is not None:
+                        yield result
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,234 @@
+"""오프라인 행정구역 경계(GeoJSON) 저장소.
+
+원본 GeoJSON을 한 번 전처리(명칭 보정, 좌표 단순화)해 data/geo/<버전>/ 아래에
+보관하고, 실행 중에는 프로세스당 한 번만 읽어 모든 세션이 같은 객체를 공유합니다.
+
+번들이 없으면 한 번 내려받아 저장합니다. 내려받기에 실패하면 DOWNLOAD_RETRY_SECONDS 동안은
+다시 시도하지 않고 바로 FileNotFoundError를 냅니다. 망 분리 환경에서는 GEO_OFFLINE=1로
+내려받기를 끌 수 있습니다.
+
+번들 생성(네트워크가 되는 환경에서 한 번만 실행):
+    python -m utils.geo sido
+    python -m utils.geo sigungu path/to/skorea_municipalities_geo_simple.json
+"""
+import json
+import os
+import pickle
+import sys
+import threading
+import time
+
+import numpy as np
+
+from utils.cache import LRUCache
+
+GEO_VERSION = "kostat-2013"
+GEO_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "geo", GEO_VERSION)
+
+SOURCES = {
+    "sido": "https://raw.githubusercontent.com/southkorea/southkorea-maps/master/kostat/2013/json/skorea_provinces_geo_simple.json",
+    "sigungu": "https://raw.githubusercontent.com/southkorea/southkorea-maps/master/kostat/2013/json/skorea_municipalities_geo_simple.json",
+}
+
+# 2013년 이후 바뀐 시도 명칭 보정
+NAME_FIXES = {
+    "강원도": "강원특별자치도",
+    "전라북도": "전북특별자치도",
+}
+
+# KOSTAT 2013 행정구역 코드 앞 두 자리 → 시도명 (보정 후 명칭)
+SIDO_BY_CODE = {
+    "11": "서울특별시", "21": "부산광역시", "22": "대구광역시", "23": "인천광역시",
+    "24": "광주광역시", "25": "대전광역시", "26": "울산광역시", "29": "세종특별자치시",
+    "31": "경기도", "32": "강원특별자치도", "33": "충청북도", "34": "충청남도",
+    "35": "전북특별자치도", "36": "전라남도", "37": "경상북도", "38": "경상남도",
+    "39": "제주특별자치도",
+}
+
+# 단순화 버전: Douglas–Peucker 허용 오차(도, 약 100m)와 좌표 소수점 자리수
+SIMPLIFY_TOLERANCE = 0.001
+SIMPLIFY_PRECISION = 3
+
+OFFLINE = os.environ.get("GEO_OFFLINE") == "1"
+DOWNLOAD_RETRY_SECONDS = 10 * 60
+
+# 수준별 마지막 내려받기 실패 (monotonic 시각, 오류 메시지)
+_failures = {}
+_failures_lock = threading.Lock()
+
+# 수준(sido/sigungu) × 단순화 여부별로 한 번 읽은 경계 (모든 세션 공유)
+_boundaries = LRUCache(max_entries=8, name="geo.boundaries")
+
+
+def _path(level, simplified, ext):
+    suffix = ".simple" if simplified else ""
+    return os.path.join(GEO_DIR, f"{level}{suffix}.{ext}")
+
+
+def preprocess(geojson, level):
+    """명칭을 보정하고, 시군구는 'full_name'(예: '서울특별시 중구') 속성을 추가합니다."""
+    for feature in geojson["features"]:
+        props = feature["properties"]
+        props["name"] = NAME_FIXES.get(props["name"], props["name"])
+        if level == "sigungu":
+            sido = SIDO_BY_CODE.get(str(props.get("code", ""))[:2], "")
+            props["sido"] = sido
+            props["full_name"] = f"{sido} {props['name']}".strip()
+    return geojson
+
+
+def _douglas_peucker(points, tolerance):
+    """열린 선 points(N×2 배열)에서 남길 점의 불리언 마스크. 양 끝점은 항상 남깁니다."""
+    keep = np.zeros(len(points), dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(points) - 1)]
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+        start, end = points[first], points[last]
+        inner = points[first + 1:last]
+        dx, dy = end - start
+        length = np.hypot(dx, dy)
+        if length == 0:
+            distances = np.hypot(*(inner - start).T)
+        else:
+            # 선분 (start, end)을 지나는 직선까지의 수직 거리
+            distances = np.abs(dx * (inner[:, 1] - start[1]) - dy * (inner[:, 0] - start[0])) / length
+        index = int(np.argmax(distances))
+        if distances[index] > tolerance:
+            split = first + 1 + index
+            keep[split] = True
+            stack.append((first, split))
+            stack.append((split, last))
+    return keep
+
+
+def _simplify_ring(ring, tolerance, precision):
+    points = np.asarray(ring, dtype=float)
+    if len(points) < 5:
+        return ring
+    # 닫힌 링은 시작점에서 가장 먼 점으로 나눠 두 선으로 단순화합니다.
+    far = int(np.argmax(np.hypot(*(points - points[0]).T)))
+    keep = np.zeros(len(points), dtype=bool)
+    keep[:far + 1] = _douglas_peucker(points[:far + 1], tolerance)
+    keep[far:] |= _douglas_peucker(points[far:], tolerance)
+    out = []
+    for x, y in np.round(points[keep], precision).tolist():
+        if not out or out[-1] != [x, y]:
+            out.append([x, y])
+    # 닫힌 링을 유지할 수 있을 만큼 점이 남지 않으면 원래 링을 씁니다.
+    return out if len(out) >= 4 and out[0] == out[-1] else ring
+
+
+def simplify(geojson, tolerance=SIMPLIFY_TOLERANCE, precision=SIMPLIFY_PRECISION):
+    """Douglas–Peucker로 꼭짓점을 줄이고 좌표를 반올림한 사본을 만듭니다."""
+    simple = {key: value for key, value in geojson.items() if key != "features"}
+    simple["features"] = []
+    for feature in geojson["features"]:
+        geometry = feature["geometry"]
+        if geometry["type"] == "Polygon":
+            coords = [_simplify_ring(ring, tolerance, precision) for ring in geometry["coordinates"]]
+        elif geometry["type"] == "MultiPolygon":
+            coords = [
+                [_simplify_ring(ring, tolerance, precision) for ring in polygon] for polygon in geometry["coordinates"]
+            ]
+        else:
+            coords = geometry["coordinates"]
+        simple["features"].append({
+            "type": "Feature",
+            "properties": dict(feature["properties"]),
+            "geometry": {"type": geometry["type"], "coordinates": coords},
+        })
+    return simple
+
+
+def _write(geojson, level, simplified):
+    with open(_path(level, simplified, "json"), "w", encoding="utf-8") as f:
+        json.dump(geojson, f, ensure_ascii=False, separators=(",", ":"))
+    with open(_path(level, simplified, "pickle"), "wb") as f:
+        pickle.dump(geojson, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def build_store(level, source=None):
+    """원본 GeoJSON(파일 경로 또는 URL)을 전처리해 번들 파일을 만듭니다."""
+    source = source or SOURCES[level]
+    if source.startswith(("http://", "https://")):
+        import requests
+
+        raw = requests.get(source, timeout=30).json()
+    else:
+        with open(source, encoding="utf-8") as f:
+            raw = json.load(f)
+    geojson = preprocess(raw, level)
+    os.makedirs(GEO_DIR, exist_ok=True)
+    _write(geojson, level, simplified=False)
+    _write(simplify(geojson), level, simplified=True)
+    return geojson
+
+
+def load_boundaries(level="sido", simplified=False):
+    """전처리된 경계 GeoJSON을 돌려줍니다. 프로세스당 한 번만 디스크에서 읽습니다.
+
+    반환된 객체는 모든 세션이 공유하므로 수정하지 마세요.
+    """
+    if level not in SOURCES:
+        raise ValueError(f"알 수 없는 경계 수준입니다: {level}")
+    return _boundaries.get_or_compute((level, simplified), lambda: _load(level, simplified))
+
+
+def _load(level, simplified):
+    pickle_path = _path(level, simplified, "pickle")
+    json_path = _path(level, simplified, "json")
+    # 빠른 경로: 미리 직렬화해 둔 pickle
+    if os.path.exists(pickle_path) and (
+        not os.path.exists(json_path) or os.path.getmtime(pickle_path) >= os.path.getmtime(json_path)
+    ):
+        with open(pickle_path, "rb") as f:
+            return pickle.load(f)
+    if os.path.exists(json_path):
+        with open(json_path, encoding="utf-8") as f:
+            geojson = json.load(f)
+        with open(pickle_path, "wb") as f:
+            pickle.dump(geojson, f, protocol=pickle.HIGHEST_PROTOCOL)
+        return geojson
+    # 번들이 없으면 한 번 내려받아 저장해 두고, 이후에는 오프라인으로 읽습니다.
+    missing = (
+        f"경계 데이터 번들이 없습니다({json_path}). "
+        f"네트워크가 되는 환경에서 'python -m utils.geo {level}'로 먼저 생성해 주세요."
+    )
+    if OFFLINE:
+        raise FileNotFoundError(missing)
+    with _failures_lock:
+        failure = _failures.get(level)
+    if failure is not None and time.monotonic() - failure[0] < DOWNLOAD_RETRY_SECONDS:
+        # 최근에 내려받지 못했으면 재실행마다 네트워크를 기다리지 않습니다.
+        raise FileNotFoundError(f"{missing} (내려받기 실패: {failure[1]})")
+    try:
+        geojson = build_store(level)
+    except Exception as e:
+        with _failures_lock:
+            _failures[level] = (time.monotonic(), f"{type(e).__name__}: {e}")
+        raise FileNotFoundError(missing) from e
+    with _failures_lock:
+        _failures.pop(level, None)
+    return _load(level, simplified)
+
+
+def static_copy(level, directory, simplified=True):
+    """경계 GeoJSON을 정적 파일 폴더(directory/geo/<버전>/)에 한 번 써 두고 그 경로를 돌려줍니다."""
+    target = os.path.join(directory, "geo", GEO_VERSION, os.path.basename(_path(level, simplified, "json")))
+    if not os.path.exists(target):
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        tmp = f"{target}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(load_boundaries(level, simplified), f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp, target)
+    return target
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] not in SOURCES:
+        sys.exit(f"사용법: python -m utils.geo {{{'|'.join(SOURCES)}}} [원본 파일 또는 URL]")
+    built = build_store(sys.argv[1], sys.argv[2] if len(sys.argv) > 2 else None)
+    print(f"{sys.argv[1]}: {len(built['features'])}개 경계 → {GEO_DIR}")
@@ -0,0 +1,395 @@
+"""업로드 파일 읽기와 파싱 결과 캐시.
+
+업로드 내용의 해시와 읽기 옵션(header, encoding)을 키로 파싱된 DataFrame을
+보관하므로, 파일이 바뀌지 않은 재실행에서는 CSV/XLSX 파싱을 건너뜁니다.
+"""
+import hashlib
+import io
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+from utils import encoding as _encoding
+from utils import schema as _schema
+from utils.cache import LRUCache
+from utils.region import normalize_regions
+
+# 업로드 관련 캐시 항목의 유효 시간(초). 사용자가 떠난 파일이 오래 남지 않게 합니다.
+UPLOAD_TTL_SECONDS = 60 * 60
+
+# 파싱된 DataFrame 캐시 (최대 8개, 합계 약 1GB)
+_parsed = LRUCache(max_entries=8, max_bytes=1024 ** 3, ttl=UPLOAD_TTL_SECONDS, name="ingest.parsed")
+
+
+class SharedUpload(io.RawIOBase):
+    """업로드 내용을 복사하지 않고 공유하면서 읽기 위치만 따로 갖는 읽기 전용 파일.
+
+    백그라운드 작업(utils.jobs)이 스크립트 스레드와 같은 업로드를 동시에 읽어도
+    서로의 seek가 섞이지 않도록 작업에는 이 객체를 넘깁니다.
+    """
+
+    def __init__(self, file):
+        self.name = file.name
+        self._view = file.getbuffer()
+        self._pos = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, b):
+        n = max(0, min(len(b), len(self._view) - self._pos))
+        b[:n] = self._view[self._pos:self._pos + n]
+        self._pos += n
+        return n
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self._pos, io.SEEK_END: len(self._view)}[whence]
+        self._pos = max(0, base + offset)
+        return self._pos
+
+    def tell(self):
+        return self._pos
+
+    def getbuffer(self):
+        # 호출하는 쪽이 with로 해제해도 공유 뷰는 남도록 새 뷰를 돌려줍니다.
+        return self._view[:]
+
+
+# Streamlit 업로드(file_id, 크기) → 내용 해시. 재실행마다 같은 업로드 전체를 다시 해시하지 않습니다.
+_hashes = LRUCache(max_entries=64, ttl=UPLOAD_TTL_SECONDS, name="ingest.hashes")
+
+
+def _hash_buffer(file):
+    digest = hashlib.blake2b(digest_size=16)
+    with file.getbuffer() as view:
+        digest.update(view)
+    return digest.hexdigest()
+
+
+def content_hash(file):
+    """업로드 파일 내용의 해시값을 계산합니다. (getvalue와 달리 내용을 복사하지 않습니다)
+
+    file_id가 있는 Streamlit 업로드는 업로드마다 한 번만 계산합니다.
+    """
+    file_id = getattr(file, "file_id", None)
+    if file_id is None:
+        return _hash_buffer(file)
+    return _hashes.get_or_compute((file_id, _size(file)), lambda: _hash_buffer(file))
+
+
+def file_kind(name):
+    """파일 이름에서 'csv' 또는 'xlsx' 형식을 판별합니다."""
+    name = name.lower()
+    if name.endswith(".csv"):
+        return "csv"
+    if name.endswith(".xlsx"):
+        return "xlsx"
+    raise ValueError(f"지원하지 않는 파일 형식입니다: {name}")
+
+
+def _read_csv(file, encoding=None, **kwargs):
+    # 업로드 버퍼에서 바로 읽습니다. (file.getvalue()/BytesIO 사본을 만들지 않음)
+    prefix = _encoding.read_prefix(file)
+    if encoding is None:
+        encoding = _encoding.detect_encoding(prefix)
+    file.seek(0)
+    try:
+        return pd.read_csv(file, encoding=encoding, **kwargs)
+    except UnicodeDecodeError:
+        # 앞부분이 ASCII뿐이라 인코딩을 확정하지 못했을 때만 CP949로 한 번 더 읽습니다.
+        if not _encoding.is_ascii(prefix) or encoding == _encoding.FALLBACK_ENCODING:
+            raise
+        file.seek(0)
+        return pd.read_csv(file, encoding=_encoding.FALLBACK_ENCODING, **kwargs)
+    finally:
+        file.seek(0)
+
+
+def _read_excel(file, **kwargs):
+    file.seek(0)
+    try:
+        # read_excel의 기본 동작은 첫 번째 시트를 읽습니다.
+        return pd.read_excel(file, **kwargs)
+    finally:
+        file.seek(0)
+
+
+def _parse(file, kind, header, encoding):
+    if kind == "csv":
+        return _read_csv(file, encoding, header=header)
+    return _read_excel(file, header=header)
+
+
+def _parse_plan(file, plan):
+    def read(typed):
+        kwargs = plan.read_kwargs(typed)
+        if plan.kind == "csv":
+            return plan.coerce(_read_csv(file, **kwargs))
+        return plan.coerce(_read_excel(file, **kwargs))
+
+    try:
+        return read(True)
+    except UnicodeDecodeError:
+        raise
+    except (ValueError, TypeError):
+        # 표본 뒤쪽에 숫자로 읽을 수 없는 값이 있으면 자료형 지정 없이 다시 읽습니다.
+        return read(False)
+
+
+def plan_upload(file, region_hints=(), target_hints=()):
+    """업로드 파일의 앞부분만 읽어 읽기 계획(utils.schema.ReadPlan)을 만듭니다."""
+    return _schema.infer_cached(content_hash(file), file, file_kind(file.name), region_hints, target_hints)
+
+
+def read_upload(file, header=0, encoding=None, copy=True, plan=None):
+    """업로드 파일을 DataFrame으로 읽습니다. 같은 내용·옵션이면 캐시를 사용합니다.
+
+    plan(ReadPlan)을 주면 header·encoding 대신 계획의 머리글 행, 읽을 컬럼, 자료형으로 읽습니다.
+    캐시에 든 원본이 페이지에서 수정되지 않도록 기본적으로 복사본을 돌려줍니다.
+    결과를 수정하지 않는 호출자는 copy=False로 복사를 생략할 수 있습니다.
+    """
+    if file is None:
+        return None
+    kind = file_kind(file.name)
+    if plan is not None:
+        key = (content_hash(file), plan)
+        df = _parsed.get_or_compute(key, lambda: _parse_plan(file, plan))
+    else:
+        key = (content_hash(file), kind, header, encoding)
+        df = _parsed.get_or_compute(key, lambda: _parse(file, kind, header, encoding))
+    return df.copy() if copy else df
+
+
+def cache_stats():
+    """파싱 캐시의 적중/미스 횟수와 사용량을 돌려줍니다."""
+    return _parsed.stats()
+
+
+# -----------------------------
+# 여러 파일·시트 병렬 읽기
+# -----------------------------
+# 병원·의원·약국처럼 나뉘어 배포된 파일(과 XLSX의 여러 시트)을 '파트'(파일, 읽기 계획)로 보고,
+# 파트마다 작업 프로세스에서 필요한 컬럼만 파싱한 뒤 합칩니다. 파싱은 GIL을 잡고 있는
+# 파이썬 코드(openpyxl 등)가 대부분이라 스레드가 아닌 프로세스로 나눕니다.
+PARSE_WORKERS = int(os.environ.get("PARSE_WORKERS", "0")) or os.cpu_count() or 1
+# 합계가 이보다 작거나 작업 프로세스가 하나뿐이면 데이터를 넘기는 비용이 더 크므로 이 프로세스에서 차례로 읽습니다.
+PARALLEL_MIN_BYTES = 8 * 1024 ** 2
+
+_sheets = LRUCache(max_entries=32, ttl=UPLOAD_TTL_SECONDS, name="ingest.sheets")
+_executor = None
+
+
+def sheet_names(file):
+    """XLSX 파일의 시트 이름 목록. CSV는 [None]입니다."""
+    if file_kind(file.name) == "csv":
+        return [None]
+
+    def compute():
+        from openpyxl import load_workbook
+
+        file.seek(0)
+        workbook = load_workbook(file, read_only=True)
+        try:
+            return list(workbook.sheetnames)
+        finally:
+            workbook.close()
+            file.seek(0)
+
+    return _sheets.get_or_compute(content_hash(file), compute)
+
+
+def part_label(file, plan):
+    """'파일 이름' 또는 '파일 이름 [시트]'."""
+    return file.name if plan.sheet is None else f"{file.name} [{plan.sheet}]"
+
+
+def plan_parts(files, region_hints=(), target_hints=()):
+    """업로드 파일들의 시트마다 읽기 계획을 만들어 [(file, ReadPlan), ...]으로 돌려줍니다.
+
+    시트가 하나뿐인 XLSX와 CSV는 파일 하나를 읽을 때(plan_upload)와 같은 계획입니다.
+    """
+    parts = []
+    for file in files:
+        kind = file_kind(file.name)
+        sheets = sheet_names(file)
+        for sheet in sheets if len(sheets) > 1 else [None]:
+            parts.append((file, _schema.infer_cached(content_hash(file), file, kind, region_hints, target_hints, sheet)))
+    return parts
+
+
+def parts_with(parts, columns):
+    """columns를 모두 가진 파트만 남깁니다. (안내문·표지 시트 등은 빠집니다)"""
+    wanted = set(columns)
+    return [(file, plan) for file, plan in parts if wanted <= set(plan.columns)]
+
+
+def _size(file):
+    with file.getbuffer() as view:
+        return view.nbytes
+
+
+def _parse_part(data, plan):
+    # 작업 프로세스에서 실행됩니다. 필요한 컬럼만 읽은 DataFrame을 돌려받습니다.
+    return _parse_plan(io.BytesIO(data), plan)
+
+
+def _pool():
+    global _executor
+    if _executor is None:
+        # Streamlit 서버는 여러 스레드로 돌아가므로 fork 대신 spawn으로 작업 프로세스를 만듭니다.
+        _executor = ProcessPoolExecutor(max_workers=PARSE_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return _executor
+
+
+def read_parts(parts, columns=None, progress=None):
+    """여러 파트(plan_parts)에서 columns만 읽어 하나의 DataFrame으로 합칩니다. 같은 내용·컬럼이면 캐시를 사용합니다.
+
+    columns가 None이면 파트마다 계획의 컬럼을 모두 읽습니다. 파트마다 작업 프로세스에서 따로
+    파싱하므로 읽는 시간은 전체 크기보다 코어 수를 따라 줄어듭니다. 결과는 수정하지 마세요.
+    """
+    selected = [(file, plan if columns is None else plan.select(columns)) for file, plan in parts]
+    if len(selected) == 1:
+        file, plan = selected[0]
+        return read_upload(file, copy=False, plan=plan)
+
+    def compute():
+        frames = [None] * len(selected)
+        total = sum(_size(file) for file, _ in selected)
+        if total < PARALLEL_MIN_BYTES or PARSE_WORKERS < 2:
+            for i, (file, plan) in enumerate(selected):
+                frames[i] = _parse_plan(file, plan)
+                if progress is not None:
+                    progress((i + 1) / len(selected), f"{i + 1}/{len(selected)}개 파일·시트")
+        else:
+            # 업로드 내용은 작업 프로세스로 복사되고, 돌아오는 것은 고른 컬럼뿐입니다.
+            futures = {
+                _pool().submit(_parse_part, _encoding.read_prefix(file, _size(file)), plan): i
+                for i, (file, plan) in enumerate(selected)
+            }
+            for done, future in enumerate(as_completed(futures), 1):
+                frames[futures[future]] = future.result()
+                if progress is not None:
+                    progress(done / len(selected), f"{done}/{len(selected)}개 파일·시트")
+        return pd.concat(frames, ignore_index=True)
+
+    key = ("parts", tuple((content_hash(file), plan) for file, plan in selected))
+    return _parsed.get_or_compute(key, compute)
+
+
+# -----------------------------
+# 대용량 파일 스트리밍 집계
+# -----------------------------
+# 시도별 개수만 필요할 때 파일 전체를 DataFrame으로 만들지 않고 조각 단위로 셉니다.
+_counts = LRUCache(max_entries=32, ttl=UPLOAD_TTL_SECONDS, name="ingest.counts")
+
+STREAM_CHUNK_ROWS = 200_000
+
+
+def _worksheet(workbook, sheet):
+    return workbook.worksheets[0] if sheet is None else workbook[sheet]
+
+
+def read_header(file, header=0, sheet=None):
+    """데이터 행은 읽지 않고 컬럼 이름만 돌려줍니다. header는 머리글 행 번호, sheet는 XLSX 시트 이름입니다."""
+    kind = file_kind(file.name)
+    file.seek(0)
+    if kind == "csv":
+        columns = _read_csv(file, header=header, nrows=0).columns
+    else:
+        from openpyxl import load_workbook
+
+        workbook = load_workbook(file, read_only=True, data_only=True)
+        try:
+            rows = _worksheet(workbook, sheet).iter_rows(min_row=header + 1, max_row=header + 1, values_only=True)
+            columns = [str(c) for c in next(rows, ())]
+        finally:
+            workbook.close()
+    file.seek(0)
+    return list(columns)
+
+
+def _iter_csv_column(file, column, encoding, chunksize, header=0):
+    file.seek(0)
+    for chunk in pd.read_csv(file, encoding=encoding, header=header, usecols=[column], dtype=str, chunksize=chunksize):
+        yield chunk[column]
+
+
+def _iter_xlsx_column(file, column, chunksize, header=0, sheet=None):
+    from openpyxl import load_workbook
+
+    file.seek(0)
+    # read_only 모드는 행을 하나씩 읽어 시트 전체를 메모리에 올리지 않습니다.
+    workbook = load_workbook(file, read_only=True, data_only=True)
+    try:
+        # 제목 행 등 머리글 위의 행은 건너뜁니다. (행 번호는 pandas의 header와 같은 기준)
+        rows = _worksheet(workbook, sheet).iter_rows(min_row=header + 1, values_only=True)
+        names = [str(c) for c in next(rows, ())]
+        idx = names.index(str(column))
+        batch = []
+        for row in rows:
+            batch.append(row[idx] if idx < len(row) else None)
+            if len(batch) >= chunksize:
+                yield pd.Series(batch, dtype=object)
+                batch = []
+        if batch:
+            yield pd.Series(batch, dtype=object)
+    finally:
+        workbook.close()
+
+
+def _count_regions(chunks, progress=None, position=None):
+    counts = pd.Series(dtype="int64")
+    rows = 0
+    for values in chunks:
+        # 시도를 인식하지 못한 주소(결측 포함)는 value_counts에서 빠집니다.
+        chunk_counts = normalize_regions(values).value_counts()
+        counts = counts.add(chunk_counts, fill_value=0)
+        rows += len(values)
+        if progress is not None:
+            progress(position() if position is not None else 0.0, f"{rows:,}행")
+    return counts.astype("int64")
+
+
+def _read_fraction(file):
+    # CSV 조각을 읽는 동안 파일 위치로 진행률을 어림합니다. (_size는 버퍼 뷰를 바로 놓아 줍니다)
+    size = _size(file) if hasattr(file, "getbuffer") else None
+    return (lambda: file.tell() / size) if size else None
+
+
+def count_regions_streaming(file, column, chunksize=STREAM_CHUNK_ROWS, progress=None, plan=None):
+    """주소 컬럼 하나만 조각 단위로 읽어 시도별 행 수를 셉니다.
+
+    최대 메모리 사용량은 파일 크기가 아니라 chunksize에 비례합니다.
+    반환값은 시도 공식 명칭을 인덱스로 하는 Series입니다.
+    progress(비율, 메시지)를 주면 조각마다 호출합니다. (utils.jobs)
+    plan(ReadPlan)을 주면 계획의 머리글 행·시트·인코딩대로 읽습니다. (제목 행이 있는 파일)
+    """
+    kind = file_kind(file.name)
+    header = plan.header if plan is not None else 0
+    sheet = plan.sheet if plan is not None else None
+    key = (content_hash(file), column, header, sheet)
+
+    def compute():
+        if kind == "xlsx":
+            return _count_regions(_iter_xlsx_column(file, column, chunksize, header, sheet), progress)
+        prefix = _encoding.read_prefix(file)
+        encoding = plan.encoding if plan is not None else _encoding.detect_encoding(prefix)
+        position = _read_fraction(file)
+        try:
+            return _count_regions(_iter_csv_column(file, column, encoding, chunksize, header), progress, position)
+        except UnicodeDecodeError:
+            if not _encoding.is_ascii(prefix):
+                raise
+            # 앞부분이 ASCII뿐이었다면 중간 조각에서 실패해도 처음부터 CP949로 다시 셉니다.
+            return _count_regions(
+                _iter_csv_column(file, column, _encoding.FALLBACK_ENCODING, chunksize, header), progress, position
+            )
+
+    counts = _counts.get_or_compute(key, compute)
+    file.seek(0)
+    return counts.rename_axis("지역").copy()
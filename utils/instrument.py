@@ -0,0 +1,209 @@
+"""재실행(rerun) 단위 처리 단계 계측.
+
+페이지가 재실행될 때마다 Run을 하나 시작하고(begin), 무거운 단계를 stage()로 감싸면
+단계별로 다음을 기록합니다.
+
+- seconds: 실행 시간
+- rss_bytes / rss_delta: 단계가 끝난 뒤 프로세스 RSS와 그 변화량
+- py_peak_bytes: 단계 동안 파이썬 할당 최대치 (tracemalloc이 켜져 있을 때만)
+- cache: 단계 동안 캐시별 적중/미스 증가분
+
+RSS·tracemalloc·캐시 통계는 프로세스 전체 값이므로 여러 세션이 동시에 실행되면 섞입니다.
+실행 중인 Run이 없으면 stage()는 아무것도 하지 않습니다. INSTRUMENT_LOG 환경 변수에
+파일 경로를 주면 끝난 단계마다 한 줄씩 JSON으로 덧붙입니다.
+"""
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+import uuid
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+
+from utils import cache
+
+LOG_PATH = os.environ.get("INSTRUMENT_LOG")
+
+# Streamlit은 세션마다 별도 스레드에서 스크립트를 실행하므로 현재 Run은 스레드별로 둡니다.
+_local = threading.local()
+_log_lock = threading.Lock()
+
+try:
+    _PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+except (AttributeError, ValueError, OSError):
+    _PAGE_SIZE = 4096
+
+
+def rss_bytes():
+    """현재 프로세스의 RSS(바이트). 알 수 없으면 None입니다."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+
+        # /proc이 없는 환경(macOS 등)은 최대 RSS로 대신합니다. (macOS는 바이트, 리눅스는 KB)
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if os.uname().sysname == "Darwin" else peak * 1024
+    except (ImportError, OSError):
+        return None
+
+
+def _cache_counts():
+    return {row["name"]: (row["hits"], row["misses"]) for row in cache.registry_stats()}
+
+
+def _cache_delta(before, after):
+    delta = {}
+    for name, (hits, misses) in after.items():
+        old_hits, old_misses = before.get(name, (0, 0))
+        if hits != old_hits or misses != old_misses:
+            delta[name] = {"hits": hits - old_hits, "misses": misses - old_misses}
+    return delta
+
+
+@dataclass
+class Stage:
+    name: str
+    depth: int
+    seconds: float
+    rss_bytes: int = None
+    rss_delta: int = None
+    py_peak_bytes: int = None
+    cache: dict = field(default_factory=dict)
+    error: str = None
+
+
+@dataclass
+class Run:
+    page: str
+    run_id: str = field(default_factory=lambda: uuid.uuid4().hex[:12])
+    session: str = None
+    started: str = field(default_factory=lambda: datetime.now(timezone.utc).isoformat(timespec="milliseconds"))
+    stages: list = field(default_factory=list)
+    # 단계가 끝날 때마다 호출됩니다. (Streamlit 패널 갱신용)
+    on_stage: object = field(default=None, repr=False, compare=False)
+    _t0: float = field(default_factory=time.perf_counter, repr=False, compare=False)
+    _cache0: dict = field(default_factory=_cache_counts, repr=False, compare=False)
+    _stack: list = field(default_factory=list, repr=False, compare=False)
+
+    @property
+    def seconds(self):
+        return time.perf_counter() - self._t0
+
+    def cache_delta(self):
+        """Run을 시작한 뒤 캐시별 적중/미스 증가분."""
+        return _cache_delta(self._cache0, _cache_counts())
+
+    def summary(self):
+        """JSON으로 직렬화할 수 있는 Run 요약."""
+        return {
+            "page": self.page,
+            "run_id": self.run_id,
+            "session": self.session,
+            "started": self.started,
+            "seconds": round(self.seconds, 6),
+            "rss_bytes": rss_bytes(),
+            "cache": self.cache_delta(),
+            "stages": [asdict(s) for s in self.stages],
+        }
+
+    def to_jsonl(self):
+        """단계마다 한 줄인 JSON lines 문자열."""
+        return "".join(_stage_line(self, s) + "\n" for s in self.stages)
+
+
+def _stage_line(run, stage):
+    record = {"page": run.page, "run_id": run.run_id, "session": run.session, "started": run.started, **asdict(stage)}
+    return json.dumps(record, ensure_ascii=False)
+
+
+def begin(page, session=None, on_stage=None):
+    """이 스레드에서 새 Run을 시작하고 돌려줍니다. 이전 Run은 버립니다."""
+    run = Run(page, session=session, on_stage=on_stage)
+    _local.run = run
+    return run
+
+
+def current():
+    """이 스레드에서 실행 중인 Run. 없으면 None입니다."""
+    return getattr(_local, "run", None)
+
+
+def end():
+    """이 스레드의 Run을 끝내고 돌려줍니다."""
+    run = current()
+    _local.run = None
+    return run
+
+
+@contextmanager
+def stage(name):
+    """with 블록 하나를 단계로 기록합니다. 단계 안에 단계를 둘 수 있습니다."""
+    run = current()
+    if run is None:
+        yield
+        return
+    # tracemalloc 최대치는 프로세스에 하나뿐이므로, 안쪽 단계가 reset_peak()하기 전에
+    # 바깥 단계의 최대치를 옮겨 두고 끝날 때 안쪽 최대치를 바깥으로 넘깁니다.
+    tracing = tracemalloc.is_tracing()
+    frame = {"base": 0, "peak": 0}
+    if tracing:
+        current_bytes, peak = tracemalloc.get_traced_memory()
+        if run._stack:
+            parent = run._stack[-1]
+            parent["peak"] = max(parent["peak"], peak)
+        tracemalloc.reset_peak()
+        frame = {"base": current_bytes, "peak": current_bytes}
+    record = Stage(name=name, depth=len(run._stack), seconds=None)
+    # 시작 순서대로 보이도록 미리 넣어 두고 끝날 때 값을 채웁니다.
+    run.stages.append(record)
+    run._stack.append(frame)
+    rss_before = rss_bytes()
+    cache_before = _cache_counts()
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception as e:
+        record.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        record.seconds = round(time.perf_counter() - started, 6)
+        run._stack.pop()
+        if tracing and tracemalloc.is_tracing():
+            frame["peak"] = max(frame["peak"], tracemalloc.get_traced_memory()[1])
+            record.py_peak_bytes = frame["peak"] - frame["base"]
+            if run._stack:
+                run._stack[-1]["peak"] = max(run._stack[-1]["peak"], frame["peak"])
+        record.rss_bytes = rss_bytes()
+        if record.rss_bytes is not None and rss_before is not None:
+            record.rss_delta = record.rss_bytes - rss_before
+        record.cache = _cache_delta(cache_before, _cache_counts())
+        if LOG_PATH:
+            _append_log(_stage_line(run, record))
+        if run.on_stage is not None:
+            run.on_stage(run)
+
+
+def _append_log(line):
+    with _log_lock:
+        with open(LOG_PATH, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+
+def timed(name=None):
+    """함수 호출 전체를 단계로 기록하는 데코레이터."""
+    def decorate(fn):
+        label = name or fn.__name__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with stage(label):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
@@ -0,0 +1,149 @@
+"""백그라운드 작업 실행기.
+
+오래 걸리는 분석을 Streamlit 스크립트 스레드가 아닌 프로세스 전역 스레드 풀에서 실행합니다.
+
+- 같은 키로 실행 중이거나 끝난 작업이 있으면 새로 시작하지 않고 그 작업을 돌려주므로,
+  여러 세션이 같은 파일을 올리거나 실행 중에 위젯을 눌러 재실행해도 계산은 한 번입니다.
+- 작업 함수는 progress(비율, 메시지) 키워드 인자로 진행률을 알립니다.
+- 끝난 작업은 ttl초 동안 보관되어, 다음 재실행이 결과를 바로 가져갑니다. 실패한 작업은
+  다음 submit에서 다시 시작합니다.
+- 결과는 Job이 아니라 등록된 캐시(jobs.results)에 두므로 전역 메모리 상한에 함께 잡힙니다.
+  상한 때문에 결과가 지워진 작업은 만료된 것으로 보고 다음 submit에서 다시 실행합니다.
+
+Streamlit 쪽 진행률 표시는 utils.ui.wait_for / job_progress를 보세요.
+"""
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.cache import LRUCache
+
+MAX_WORKERS = int(os.environ.get("JOB_WORKERS", "4"))
+JOB_TTL_SECONDS = 10 * 60
+MAX_FINISHED = 64
+
+PENDING, RUNNING, DONE, FAILED = "pending", "running", "done", "failed"
+
+_jobs = {}
+_lock = threading.Lock()
+_executor = None
+# 작업 키 → 끝난 작업의 결과
+_results = LRUCache(max_entries=MAX_FINISHED, name="jobs.results")
+_MISSING = object()
+
+
+class ResultEvicted(LookupError):
+    """끝난 작업의 결과가 캐시 상한으로 지워졌습니다. 같은 키로 다시 submit하면 다시 실행합니다."""
+
+
+class Job:
+    """백그라운드 작업 하나의 상태·진행률·결과."""
+
+    def __init__(self, key, name, ttl):
+        self.key = key
+        self.name = name
+        self.ttl = ttl
+        self.status = PENDING
+        self.progress = 0.0
+        self.message = ""
+        self.error = None
+        self.submitted = time.time()
+        self.started = None
+        self.finished = None
+        self._event = threading.Event()
+
+    @property
+    def done(self):
+        return self._event.is_set()
+
+    @property
+    def elapsed(self):
+        """시작 후 경과 시간(초). 끝났으면 실행 시간입니다."""
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.time()) - self.started
+
+    def report(self, fraction, message=None):
+        """진행률(0~1)과 메시지를 갱신합니다. 작업 함수의 progress 인자로 넘어갑니다."""
+        self.progress = min(max(float(fraction), 0.0), 1.0)
+        if message is not None:
+            self.message = message
+
+    def wait(self, timeout=None):
+        """끝날 때까지 최대 timeout초 기다리고, 끝났는지 돌려줍니다."""
+        return self._event.wait(timeout)
+
+    @property
+    def evicted(self):
+        """성공했지만 결과가 캐시에서 지워졌는지."""
+        return self.status == DONE and self.key not in _results
+
+    def result(self):
+        """결과. 실패한 작업이면 그 예외를, 결과가 지워졌으면 ResultEvicted를 던집니다."""
+        if self.error is not None:
+            raise self.error
+        value = _results.get(self.key, _MISSING)
+        if value is _MISSING:
+            raise ResultEvicted(self.key)
+        return value
+
+    def expired(self, now):
+        return self.done and (now - self.finished > self.ttl or self.evicted)
+
+    def _run(self, fn, args, kwargs):
+        self.status, self.started = RUNNING, time.time()
+        try:
+            _results.put(self.key, fn(*args, progress=self.report, **kwargs))
+            self.status, self.progress = DONE, 1.0
+        except Exception as e:
+            self.error, self.status = e, FAILED
+        finally:
+            self.finished = time.time()
+            self._event.set()
+
+
+def _pool():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="job")
+    return _executor
+
+
+def _prune(now):
+    for key in [key for key, job in _jobs.items() if job.expired(now)]:
+        del _jobs[key]
+        _results.pop(key)
+    finished = sorted((job.finished, key) for key, job in _jobs.items() if job.done)
+    for _, key in finished[:max(0, len(finished) - MAX_FINISHED)]:
+        del _jobs[key]
+        _results.pop(key)
+
+
+def submit(key, fn, *args, name=None, ttl=JOB_TTL_SECONDS, **kwargs):
+    """key 작업을 시작하거나, 실행 중·완료된 같은 키의 작업을 돌려줍니다.
+
+    fn(*args, progress=..., **kwargs)로 호출합니다. key는 입력 내용을 모두 담아야 합니다. (예: 파일 내용 해시)
+    """
+    with _lock:
+        now = time.time()
+        _prune(now)
+        job = _jobs.get(key)
+        if job is not None and job.status != FAILED:
+            return job
+        job = Job(key, name or getattr(fn, "__name__", "job"), ttl)
+        _jobs[key] = job
+        _pool().submit(job._run, fn, args, kwargs)
+    return job
+
+
+def get(key):
+    """같은 키의 작업. 없으면 None입니다."""
+    with _lock:
+        return _jobs.get(key)
+
+
+def list_jobs():
+    """보관 중인 작업 목록 (최근 제출 순)."""
+    with _lock:
+        return sorted(_jobs.values(), key=lambda job: -job.submitted)
@@ -0,0 +1,249 @@
+"""의료기관 원장: 시도별 의료기관 수의 증분 갱신.
+
+의료기관 목록은 매달 조금씩 바뀐 전체 파일로 다시 배포됩니다. 원장은 마지막으로 반영한
+파일의 행마다 (요양기관 코드, 주소)의 64비트 해시와 시도를 저장해 두고, 새 파일이 오면
+정렬된 해시 배열끼리 맞춰 보아 추가·삭제된 행을 찾습니다. 지역 정규화는 추가된 행에만 하고,
+시도별 개수는 저장된 개수에 추가·삭제분을 더하고 빼서 갱신합니다. (주소가 바뀐 기관은
+옛 행 삭제 + 새 행 추가로 처리됩니다)
+
+    data/ledgers/<이름>/manifest.json  컬럼·시도 목록·시도별 개수·갱신 이력
+    data/ledgers/<이름>/hashes.npy     행 해시 (uint64, 정렬, 중복 없음)
+    data/ledgers/<이름>/counts.npy     해시마다의 행 수 (같은 행이 여러 번 나온 경우)
+    data/ledgers/<이름>/regions.npy    해시마다의 시도 번호 (-1: 인식하지 못한 주소)
+"""
+import json
+import os
+import re
+import shutil
+import threading
+import time
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from utils.region import normalize_regions
+
+LEDGER_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "ledgers")
+FORMAT_VERSION = 2
+# 갱신 이력은 최근 것만 남깁니다.
+MAX_HISTORY = 24
+
+# 요양기관 코드 컬럼 후보 (앞쪽일수록 우선)
+ID_HINTS = ("암호화요양기호", "요양기호", "요양기관기호", "기관코드", "기관ID")
+
+_NAME_PATTERN = re.compile(r"^[\w가-힣][\w가-힣.-]{0,63}$")
+_locks = {}
+_locks_lock = threading.Lock()
+
+
+@dataclass(frozen=True)
+class Delta:
+    """한 번의 반영 결과. changed는 시도별 개수 변화(0이 아닌 시도만)입니다."""
+    inserted: int
+    deleted: int
+    rows: int
+    changed: dict
+    seconds: float
+
+
+def _dir(name):
+    if not _NAME_PATTERN.match(name):
+        raise ValueError(f"원장 이름에는 한글·영문·숫자·'_', '-', '.'만 쓸 수 있습니다: {name!r}")
+    return os.path.join(LEDGER_DIR, name)
+
+
+def _lock(name):
+    with _locks_lock:
+        return _locks.setdefault(name, threading.Lock())
+
+
+def read_manifest(name):
+    path = _dir(name)
+    if not os.path.exists(os.path.join(path, "manifest.json")) and os.path.exists(os.path.join(path + ".old", "manifest.json")):
+        # 다른 스레드가 원장을 교체하는 중이면 옮겨 둔 이전 원장을 읽습니다.
+        path += ".old"
+    with open(os.path.join(path, "manifest.json"), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def list_ledgers():
+    """저장된 원장 이름 목록 (최근 갱신 순)."""
+    if not os.path.isdir(LEDGER_DIR):
+        return []
+    names = [n for n in os.listdir(LEDGER_DIR) if os.path.exists(os.path.join(LEDGER_DIR, n, "manifest.json"))]
+    return sorted(names, key=lambda n: os.path.getmtime(os.path.join(LEDGER_DIR, n, "manifest.json")), reverse=True)
+
+
+def delete_ledger(name):
+    shutil.rmtree(_dir(name), ignore_errors=True)
+
+
+def revision(name):
+    """원장의 현재 리비전. 원장이 없으면 0입니다. (반영할 때마다 1씩 늘어납니다)"""
+    with _lock(name):
+        try:
+            return read_manifest(name)["revision"]
+        except FileNotFoundError:
+            return 0
+
+
+def read_counts(name):
+    """(리비전, 시도별 의료기관 수)를 apply와 같은 잠금 안에서 읽어 서로 맞는 값으로 돌려줍니다."""
+    with _lock(name):
+        manifest = read_manifest(name)
+    return manifest["revision"], pd.Series(manifest["counts"], dtype="int64").rename_axis("지역")
+
+
+def counts(name):
+    """원장의 시도별 의료기관 수 (시도 공식 명칭 인덱스의 Series)."""
+    return read_counts(name)[1]
+
+
+def _load_arrays(path):
+    return tuple(np.load(os.path.join(path, f"{part}.npy"), mmap_mode="r") for part in ("hashes", "counts", "regions"))
+
+
+def _hash(values):
+    # 문자열 그대로(범주화 없이) 해시합니다. 숫자 코드도 문자열로 바꿔 파일 형식과 무관하게 맞춥니다.
+    if not pd.api.types.is_string_dtype(values.dtype):
+        values = values.astype(str)
+    return pd.util.hash_array(values.fillna("").to_numpy(dtype=object), categorize=False)
+
+
+def row_hashes(df, id_col, region_col):
+    """(요양기관 코드, 주소) 쌍마다의 64비트 해시."""
+    with np.errstate(over="ignore"):
+        return _hash(df[id_col]) * np.uint64(0x9E3779B97F4A7C15) ^ _hash(df[region_col])
+
+
+def _unique(hashes):
+    """(정렬된 고유 해시, 해시마다 대표 행 번호, 행 수). 안정 정렬이 필요 없어 np.unique보다 빠릅니다."""
+    order = np.argsort(hashes, kind="quicksort")
+    ordered = hashes[order]
+    starts = np.flatnonzero(np.r_[True, ordered[1:] != ordered[:-1]])
+    return ordered[starts], order[starts], np.diff(np.r_[starts, len(ordered)])
+
+
+def _region_codes(values, regions):
+    """주소를 시도 번호로 바꿉니다. 처음 보는 시도는 regions 끝에 추가합니다."""
+    names = normalize_regions(values)
+    codes = np.full(len(names), -1, dtype=np.int16)
+    known = names.notna().to_numpy()
+    for region in pd.unique(names[known]):
+        if region not in regions:
+            regions.append(region)
+    lookup = {region: i for i, region in enumerate(regions)}
+    codes[known] = names[known].map(lookup).to_numpy()
+    return codes
+
+
+def _recover(path):
+    # 교체 도중 멈췄으면 옮겨 둔 이전 원장을 되살립니다.
+    old = path + ".old"
+    if not os.path.exists(path) and os.path.exists(old):
+        os.replace(old, path)
+    shutil.rmtree(old, ignore_errors=True)
+
+
+def _save(path, manifest, hashes, row_counts, regions):
+    tmp = path + ".tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+    np.save(os.path.join(tmp, "hashes.npy"), hashes)
+    np.save(os.path.join(tmp, "counts.npy"), row_counts)
+    np.save(os.path.join(tmp, "regions.npy"), regions)
+    with open(os.path.join(tmp, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1)
+    # 다 쓴 다음에 교체해서, 읽는 쪽이 반쯤 쓰인 원장을 보지 않게 합니다. 이전 원장은 먼저
+    # 옆으로 옮겨 두므로 교체 도중 멈춰도 _recover가 되살립니다.
+    old = path + ".old"
+    shutil.rmtree(old, ignore_errors=True)
+    if os.path.exists(path):
+        os.replace(path, old)
+    os.replace(tmp, path)
+    shutil.rmtree(old, ignore_errors=True)
+
+
+def apply(name, df, id_col, region_col, source=None):
+    """df(새로 배포된 전체 목록)를 원장에 반영하고 Delta를 돌려줍니다. 원장이 없으면 새로 만듭니다.
+
+    source(파일 내용 해시 등)가 마지막으로 반영한 것과 같으면 아무것도 하지 않습니다.
+    """
+    started = time.perf_counter()
+    path = _dir(name)
+    with _lock(name):
+        _recover(path)
+        manifest = read_manifest(name) if os.path.exists(os.path.join(path, "manifest.json")) else None
+        if manifest is not None and manifest.get("version") != FORMAT_VERSION:
+            # 저장 형식이 바뀐 원장은 이번 파일로 새로 만듭니다.
+            manifest = None
+        if manifest is not None and source is not None and manifest["source"] == source:
+            return Delta(0, 0, manifest["rows"], {}, time.perf_counter() - started)
+
+        new_hashes, first, new_counts = _unique(row_hashes(df, id_col, region_col))
+        if manifest is None:
+            old_hashes = np.empty(0, dtype=np.uint64)
+            old_counts = np.empty(0, dtype=np.int64)
+            old_regions = np.empty(0, dtype=np.int16)
+            regions = []
+        else:
+            old_hashes, old_counts, old_regions = _load_arrays(path)
+            regions = list(manifest["regions"])
+
+        # 정렬된 두 해시 배열을 맞춰 보고, 원장에 없던 행만 지역을 정규화합니다.
+        pos = np.searchsorted(old_hashes, new_hashes)
+        found = pos < len(old_hashes)
+        found[found] = old_hashes[pos[found]] == new_hashes[found]
+        kept = np.zeros(len(old_hashes), dtype=bool)
+        kept[pos[found]] = True
+
+        new_regions = np.empty(len(new_hashes), dtype=np.int16)
+        new_regions[found] = old_regions[pos[found]]
+        added = ~found
+        new_regions[added] = _region_codes(df[region_col].iloc[first[added]].reset_index(drop=True), regions)
+
+        # 행 수 변화: 새로 생긴 해시(+), 사라진 해시(-), 같은 해시의 중복 행 수 변화(±)
+        diff = new_counts.astype(np.int64)
+        diff[found] -= old_counts[pos[found]]
+        changed_rows = np.flatnonzero(diff)
+        gone = np.flatnonzero(~kept)
+        size = len(regions) + 1  # 마지막 칸은 인식하지 못한 주소(-1)
+        codes = np.where(new_regions[changed_rows] >= 0, new_regions[changed_rows], size - 1)
+        gone_codes = np.where(old_regions[gone] >= 0, old_regions[gone], size - 1)
+        # (입력이 비면 bincount가 정수 배열을 돌려주므로 제자리 연산 대신 빼기로 씁니다)
+        change = (np.bincount(codes, weights=diff[changed_rows], minlength=size)
+                  - np.bincount(gone_codes, weights=old_counts[gone], minlength=size))
+        change = change[:-1].astype(np.int64)
+
+        previous = manifest["counts"] if manifest is not None else {}
+        region_counts = {region: int(previous.get(region, 0) + change[i]) for i, region in enumerate(regions)}
+        inserted = int(diff[diff > 0].sum())
+        deleted = int(-diff[diff < 0].sum() + old_counts[gone].sum())
+        delta = Delta(
+            inserted=inserted,
+            deleted=deleted,
+            rows=len(df),
+            changed={region: int(change[i]) for i, region in enumerate(regions) if change[i]},
+            seconds=time.perf_counter() - started,
+        )
+        history = (manifest["history"] if manifest is not None else []) + [{
+            "updated": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "inserted": inserted,
+            "deleted": deleted,
+            "rows": len(df),
+            "source": source,
+        }]
+        _save(path, {
+            "version": FORMAT_VERSION,
+            "name": name,
+            "id_col": str(id_col),
+            "region_col": str(region_col),
+            "rows": len(df),
+            "regions": regions,
+            "counts": {region: n for region, n in region_counts.items() if n},
+            "source": source,
+            "revision": (manifest["revision"] + 1) if manifest is not None else 1,
+            "history": history[-MAX_HISTORY:],
+        }, new_hashes, new_counts.astype(np.int32), new_regions)
+    return delta
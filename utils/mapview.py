@@ -0,0 +1,107 @@
+"""대용량 점 레이어의 folium 렌더링.
+
+점 개수에 따라 렌더링 방식을 고릅니다.
+- markers: 점마다 마커 (적은 데이터)
+- cluster: FastMarkerCluster. 좌표 배열만 넘기고 마커는 브라우저에서 만듭니다.
+- heatmap: 밀도 히트맵
+- grid: NumPy로 격자별 개수를 미리 집계해 격자 폴리곤 하나의 GeoJSON 레이어로 표시
+
+cluster/heatmap/grid는 행마다 folium 객체를 만들지 않으므로 HTML 크기와 생성 시간이
+점 개수에 크게 좌우되지 않습니다. folium은 레이어를 처음 추가할 때 가져옵니다.
+"""
+import numpy as np
+
+from utils import instrument
+
+RENDER_MODES = ("auto", "markers", "cluster", "heatmap", "grid")
+DEFAULT_MARKER_LIMIT = 500
+DEFAULT_CLUSTER_LIMIT = 20_000
+DEFAULT_GRID_BINS = 60
+
+# 좌표 소수점 자리수 (약 1m). HTML에 들어가는 숫자 길이를 줄입니다.
+COORD_PRECISION = 5
+
+_GRID_COLORS = ["#ffffb2", "#fecc5c", "#fd8d3c", "#f03b20", "#bd0026"]
+
+
+def choose_mode(n_points, mode="auto", marker_limit=DEFAULT_MARKER_LIMIT, cluster_limit=DEFAULT_CLUSTER_LIMIT):
+    """점 개수와 기준값으로 실제 렌더링 방식을 정합니다."""
+    if mode != "auto":
+        return mode
+    if n_points <= marker_limit:
+        return "markers"
+    if n_points <= cluster_limit:
+        return "cluster"
+    return "grid"
+
+
+def _latlon_list(lat, lon):
+    return np.round(np.column_stack((lat, lon)).astype(np.float64), COORD_PRECISION).tolist()
+
+
+def grid_counts(lat, lon, bins=DEFAULT_GRID_BINS):
+    """좌표를 bins×bins 격자에 모아 (격자 남서쪽 위도, 경도, 크기(위도, 경도), 개수)를 돌려줍니다."""
+    lat = np.asarray(lat, dtype=np.float64)
+    lon = np.asarray(lon, dtype=np.float64)
+    south, west = lat.min(), lon.min()
+    cell_lat = max(np.ptp(lat), 1e-4) / bins
+    cell_lon = max(np.ptp(lon), 1e-4) / bins
+    rows = np.minimum(((lat - south) / cell_lat).astype(np.int64), bins - 1)
+    cols = np.minimum(((lon - west) / cell_lon).astype(np.int64), bins - 1)
+    cells, counts = np.unique(rows * bins + cols, return_counts=True)
+    return south + (cells // bins) * cell_lat, west + (cells % bins) * cell_lon, (cell_lat, cell_lon), counts
+
+
+def grid_geojson(lat, lon, bins=DEFAULT_GRID_BINS):
+    """격자 집계 결과를 색상이 들어간 GeoJSON FeatureCollection으로 만듭니다."""
+    cell_south, cell_west, (dlat, dlon), counts = grid_counts(lat, lon, bins)
+    # 개수를 로그 스케일 5단계로 나눠 색을 정합니다.
+    levels = np.log1p(counts)
+    levels = np.minimum((levels / max(levels.max(), 1e-9) * len(_GRID_COLORS)).astype(int), len(_GRID_COLORS) - 1)
+    features = []
+    for s, w, count, level in zip(cell_south.tolist(), cell_west.tolist(), counts.tolist(), levels.tolist()):
+        n, e = s + dlat, w + dlon
+        features.append({
+            "type": "Feature",
+            "properties": {"count": count, "color": _GRID_COLORS[level]},
+            "geometry": {"type": "Polygon", "coordinates": [[[w, s], [e, s], [e, n], [w, n], [w, s]]]},
+        })
+    return {"type": "FeatureCollection", "features": features}
+
+
+@instrument.timed("mapview.add_points")
+def add_points(m, lat, lon, names=None, color="blue", icon="user", mode="auto",
+               marker_limit=DEFAULT_MARKER_LIMIT, cluster_limit=DEFAULT_CLUSTER_LIMIT,
+               grid_bins=DEFAULT_GRID_BINS, layer_name=None):
+    """점 레이어를 지도에 추가하고 실제로 사용한 렌더링 방식을 돌려줍니다."""
+    import folium
+    from folium import plugins
+
+    lat = np.asarray(lat)
+    lon = np.asarray(lon)
+    if len(lat) == 0:
+        return None
+    mode = choose_mode(len(lat), mode, marker_limit, cluster_limit)
+    if mode == "markers":
+        labels = names if names is not None else [None] * len(lat)
+        group = folium.FeatureGroup(name=layer_name) if layer_name else m
+        for (y, x), label in zip(_latlon_list(lat, lon), labels):
+            folium.Marker(location=[y, x], popup=label, icon=folium.Icon(color=color, icon=icon)).add_to(group)
+        if group is not m:
+            group.add_to(m)
+    elif mode == "cluster":
+        plugins.FastMarkerCluster(_latlon_list(lat, lon), name=layer_name).add_to(m)
+    elif mode == "heatmap":
+        plugins.HeatMap(_latlon_list(lat, lon), name=layer_name, radius=12, blur=10).add_to(m)
+    elif mode == "grid":
+        folium.GeoJson(
+            grid_geojson(lat, lon, grid_bins),
+            name=layer_name,
+            style_function=lambda feature: {
+                "fillColor": feature["properties"]["color"], "color": "#999999", "weight": 0.3, "fillOpacity": 0.6,
+            },
+            tooltip=folium.GeoJsonTooltip(fields=["count"], aliases=["개수"]),
+        ).add_to(m)
+    else:
+        raise ValueError(f"알 수 없는 렌더링 방식입니다: {mode}")
+    return mode
@@ -0,0 +1,342 @@
+"""독거노인 대비 의료기관 분포 분석 파이프라인.
+
+단계: plan → ingest → detect_schema → normalize_region → aggregate → join → metrics
+시군구·읍면동 드릴다운: ingest → detect_schema → region_cube → drilldown
+의료기관 원장 증분 갱신: ingest → detect_schema → aggregate_facility_ledger → join → metrics
+여러 파일·시트로 나뉜 업로드는 plan/ingest 대신 plan_parts/ingest_parts로 읽습니다.
+
+각 단계의 결과(Frame)는 '토큰'을 가집니다. 토큰은 앞 단계 결과의 토큰과 이 단계의
+옵션으로 만들어지므로, 예를 들어 인구 컬럼만 바꾸면 aggregate 이후 단계만 다시
+계산되고 파일 읽기·스키마 판별·지역 정규화는 캐시에서 바로 나옵니다.
+
+캐시된 DataFrame은 여러 재실행·세션이 공유하므로 호출하는 쪽에서 수정하지 마세요.
+"""
+import functools
+import hashlib
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from utils import cube as _cube
+from utils import ingest as _ingest
+from utils import instrument as _instrument
+from utils import jobs as _jobs
+from utils import ledger as _ledger
+from utils import snapshot as _snapshot
+from utils.cache import LRUCache
+from utils.region import normalize_regions
+from utils.schema import pick_column
+
+ELDER_POPULATION = "독거노인_총인구"
+FACILITY_COUNT = "의료기관_수"
+RATIO = "독거노인_1000명당_의료기관_수"
+
+# 자동 선택 후보 (앞쪽일수록 우선)
+ELDER_REGION_HINTS = ("행정구역", "시도", "지역")
+FACILITY_REGION_HINTS = ("도로명전체주소", "소재지전체주소", "주소", "시도", "지역")
+TARGET_HINTS = (("1인가구(A)",), ("1인가구", "65세이상"), ("독거",))
+
+_results = LRUCache(max_entries=64, max_bytes=512 * 1024 ** 2, ttl=60 * 60, name="pipeline.results")
+
+
+@dataclass(frozen=True)
+class Frame:
+    token: str
+    df: pd.DataFrame
+
+
+@dataclass(frozen=True)
+class Schema:
+    frame: Frame
+    region_col: object
+    target_col: object
+    numeric_cols: tuple
+
+
+def _token(*parts):
+    digest = hashlib.blake2b(repr(parts).encode("utf-8"), digest_size=12)
+    return digest.hexdigest()
+
+
+def _stage(fn):
+    """입력 Frame의 토큰과 나머지 인자로 결과를 캐시하는 단계 데코레이터. (utils.instrument 단계로도 기록)"""
+    @functools.wraps(fn)
+    def wrapper(*args):
+        token = _token(fn.__name__, *(a.token if isinstance(a, Frame) else a for a in args))
+        with _instrument.stage(f"pipeline.{fn.__name__}"):
+            return _results.get_or_compute(token, lambda: Frame(token, fn(*args)))
+    return wrapper
+
+
+def cache_stats():
+    """단계 결과 캐시의 적중/미스 횟수와 사용량."""
+    return _results.stats()
+
+
+# -----------------------------
+# 1. ingest
+# -----------------------------
+def _plan_hints(kind):
+    return (ELDER_REGION_HINTS, TARGET_HINTS) if kind == "elder" else (FACILITY_REGION_HINTS, ())
+
+
+@_instrument.timed("pipeline.plan")
+def plan(file, kind):
+    """파일 앞부분만 읽어 읽기 계획과 지역/인구 컬럼 기본값을 정합니다. kind는 'elder' 또는 'facility'.
+
+    페이지는 계획의 columns로 컬럼 선택 UI를 먼저 그리고, 필요한 컬럼만 골라(plan.select) 읽을 수 있습니다.
+    """
+    if file is None:
+        return None
+    return _ingest.plan_upload(file, *_plan_hints(kind))
+
+
+@_instrument.timed("pipeline.ingest")
+def ingest(file, header=0, plan=None):
+    """업로드 파일을 읽어 Frame으로 만듭니다. 파싱 결과는 utils.ingest가 캐시합니다.
+
+    plan을 주면 그 머리글 행·컬럼·자료형대로 읽으므로 KOSIS 머리글 보정과 숫자 변환이 필요 없습니다.
+    """
+    if file is None:
+        return None
+    df = _ingest.read_upload(file, header=header, copy=False, plan=plan)
+    return Frame(_token("ingest", _ingest.content_hash(file), header if plan is None else plan), df)
+
+
+@_instrument.timed("pipeline.plan_parts")
+def plan_parts(files, kind):
+    """여러 업로드 파일의 시트마다 읽기 계획을 만듭니다. [(file, ReadPlan), ...] (utils.ingest.plan_parts)"""
+    return _ingest.plan_parts(files, *_plan_hints(kind))
+
+
+@_instrument.timed("pipeline.ingest_parts")
+def ingest_parts(parts, columns=None, progress=None):
+    """여러 파일·시트에서 columns만 병렬로 읽어 하나의 Frame으로 합칩니다.
+
+    파트가 하나면 ingest(file, plan=...)와 같은 Frame입니다.
+    """
+    if len(parts) == 1:
+        file, plan = parts[0]
+        if progress is not None:
+            progress(0.0, "파싱 중")
+        return ingest(file, plan=plan if columns is None else plan.select(columns))
+    columns = None if columns is None else tuple(columns)
+    df = _ingest.read_parts(parts, columns, progress)
+    return Frame(_token("ingest_parts", tuple((_ingest.content_hash(f), p) for f, p in parts), columns), df)
+
+
+@_instrument.timed("pipeline.from_snapshot")
+def from_snapshot(name):
+    """저장된 스냅샷(utils.snapshot)을 메모리 매핑으로 불러와 Frame으로 만듭니다."""
+    manifest = _snapshot.read_manifest(name)
+    # 저장 식별자가 없는 예전 스냅샷은 저장 시각으로 구분합니다.
+    token = _token("snapshot", name, manifest.get("id", manifest["created"]))
+    return _results.get_or_compute(token, lambda: Frame(token, _snapshot.load_snapshot(name)))
+
+
+def save_snapshot(name, frame):
+    """정리(clean)된 Frame을 스냅샷으로 저장합니다. 문자열 컬럼은 사전 인코딩됩니다."""
+    return _snapshot.save_snapshot(name, clean(frame).df, source=frame.token)
+
+
+# -----------------------------
+# 2. detect_schema
+# -----------------------------
+def _coerce_numeric(df):
+    # 머리글 행 때문에 문자열이 된 숫자 컬럼을 숫자로 되돌립니다.
+    out = {}
+    for col in df.columns:
+        values = df[col]
+        if values.dtype == object or pd.api.types.is_string_dtype(values.dtype):
+            converted = pd.to_numeric(values, errors="coerce")
+            if converted.notna().sum() == values.notna().sum() and values.notna().any():
+                values = converted
+        out[col] = values
+    return pd.DataFrame(out, index=df.index)
+
+
+@_stage
+def clean(frame):
+    """머리글을 정리하고 숫자 컬럼을 숫자형으로 바꿉니다."""
+    df = frame.df
+    if len(df) and str(df.columns[0]).strip() == str(df.iloc[0, 0]).strip():
+        # KOSIS 파일은 두 줄짜리 머리글이라 첫 데이터 행이 실제 컬럼명입니다.
+        # (예: 행정구역별 | 2024 | 2024  /  행정구역별 | 독거노인가구비율 | 65세이상 1인가구(A))
+        df = df.iloc[1:].reset_index(drop=True)
+        df.columns = [str(c).strip() for c in frame.df.iloc[0]]
+    return _coerce_numeric(df)
+
+
+@_instrument.timed("pipeline.detect_schema")
+def detect_schema(frame, kind):
+    """머리글을 정리하고 지역 컬럼·인구 컬럼 기본값을 고릅니다. kind는 'elder' 또는 'facility'."""
+    cleaned = clean(frame)
+    columns = list(cleaned.df.columns)
+    numeric = tuple(c for c in columns if pd.api.types.is_numeric_dtype(cleaned.df[c]))
+    if kind == "elder":
+        region_col = pick_column(columns, ELDER_REGION_HINTS)
+        target_col = pick_column(numeric, TARGET_HINTS)
+    else:
+        region_col = pick_column(columns, FACILITY_REGION_HINTS)
+        target_col = None
+    return Schema(cleaned, region_col, target_col, numeric)
+
+
+# -----------------------------
+# 3. normalize_region
+# -----------------------------
+@_stage
+def normalize_region(frame, region_col):
+    """region_col에서 시도 공식 명칭을 뽑아 '지역' 컬럼으로 붙이고, 인식하지 못한 행('전국' 등)은 뺍니다."""
+    regions = normalize_regions(frame.df[region_col])
+    mask = regions.notna().to_numpy()
+    df = frame.df.loc[mask].copy()
+    df["지역"] = regions[mask].to_numpy()
+    return df
+
+
+# -----------------------------
+# 4. aggregate
+# -----------------------------
+@_stage
+def aggregate_elder(frame, target_col):
+    """시도별 독거노인 인구 합계. 숫자로 바꿀 수 없는 값은 0으로 봅니다."""
+    population = pd.to_numeric(frame.df[target_col], errors="coerce").fillna(0)
+    return population.groupby(frame.df["지역"]).sum().rename(ELDER_POPULATION).reset_index()
+
+
+@_stage
+def aggregate_facility(frame):
+    """시도별 의료기관 수."""
+    return frame.df.groupby("지역").size().rename(FACILITY_COUNT).reset_index()
+
+
+@_instrument.timed("pipeline.aggregate_facility_streaming")
+def aggregate_facility_streaming(file, region_col, plan=None, progress=None):
+    """파일 전체를 읽지 않고 주소 컬럼만 조각 단위로 읽어 시도별 의료기관 수를 셉니다.
+
+    plan(ReadPlan)을 주면 계획에서 찾은 머리글 행·시트대로 읽습니다.
+    """
+    counts = _ingest.count_regions_streaming(file, region_col, progress=progress, plan=plan)
+    return Frame(_token("aggregate_facility_streaming", _ingest.content_hash(file), region_col, plan),
+                 counts.rename(FACILITY_COUNT).reset_index())
+
+
+@_instrument.timed("pipeline.aggregate_facility_ledger")
+def aggregate_facility_ledger(frame, id_col, region_col, name):
+    """frame(새로 배포된 의료기관 목록 전체)을 원장 name(utils.ledger)에 반영하고 (시도별 의료기관 수, Delta)를 돌려줍니다.
+
+    추가·삭제된 기관만 지역을 정규화해 저장된 개수를 고칩니다. 같은 frame을 다시 넘기면 원장을 읽기만 합니다.
+    """
+    delta = _ledger.apply(name, frame.df, id_col, region_col, source=frame.token)
+    revision, counts = _ledger.read_counts(name)
+    return Frame(_token("aggregate_facility_ledger", name, revision), counts.rename(FACILITY_COUNT).reset_index()), delta
+
+
+# -----------------------------
+# 5. join
+# -----------------------------
+@_stage
+def join(elder_agg, facility_agg):
+    """시도 기준으로 두 집계표를 병합합니다 (양쪽에 모두 있는 시도만)."""
+    return pd.merge(elder_agg.df, facility_agg.df, on="지역", how="inner")
+
+
+# -----------------------------
+# 6. metrics
+# -----------------------------
+def _add_ratio(df):
+    population = df[ELDER_POPULATION].replace(0, np.nan)
+    df[RATIO] = df[FACILITY_COUNT] / population * 1000
+    return df
+
+
+@_stage
+def metrics(joined):
+    """독거노인 1,000명당 의료기관 수. 인구가 0인 시도는 NaN입니다."""
+    return _add_ratio(joined.df.copy())
+
+
+# -----------------------------
+# 7. 시군구·읍면동 드릴다운
+# -----------------------------
+@_instrument.timed("pipeline.region_cube")
+def region_cube(frame, region_col, value_cols=(), drop_subtotals=False):
+    """시도/시군구/읍면동 모든 수준의 집계를 미리 계산한 큐브(utils.cube). 데이터셋·옵션마다 한 번만 만듭니다."""
+    token = _token("region_cube", frame.token, region_col, tuple(value_cols), drop_subtotals)
+    return _results.get_or_compute(
+        token, lambda: _cube.build(frame.df, region_col, value_cols, drop_subtotals)
+    )
+
+
+@_instrument.timed("pipeline.drilldown")
+def drilldown(elder_cube, facility_cube, target_col, level, parent=()):
+    """두 큐브에서 level 수준(parent 아래) 표를 꺼내 병합하고 1,000명당 의료기관 수를 붙입니다.
+
+    하위 지역을 찾지 못한 '(미확인)' 행은 비교에서 뺍니다. '지역' 컬럼은 '서울특별시 종로구'처럼 경로를 이어 붙인 라벨입니다.
+    """
+    keys = list(_cube.LEVELS[:_cube.LEVELS.index(level) + 1])
+    elder = elder_cube.table(level, parent)[keys + [target_col]].rename(columns={target_col: ELDER_POPULATION})
+    facility = facility_cube.table(level, parent)[keys + [_cube.COUNT]].rename(columns={_cube.COUNT: FACILITY_COUNT})
+    # 하위 지역을 찾지 못한 행끼리 맞추면 서로 다른 범위를 비교하게 되므로 뺍니다.
+    df = pd.merge(elder[elder[level] != _cube.UNKNOWN], facility, on=keys, how="inner")
+    df.insert(0, "지역", _cube.path_label(df, level))
+    return _add_ratio(df)
+
+
+# -----------------------------
+# 8. 백그라운드 작업 (utils.jobs)
+# -----------------------------
+# 오래 걸릴 수 있는 단계를 스크립트 밖에서 실행합니다. 작업 키가 위 단계의 캐시 키와 같은
+# 내용이므로, 다른 세션이 같은 파일을 올려도 실행 중인 작업 하나를 함께 기다립니다.
+def ingest_job(file, plan):
+    """ingest(file, plan=plan)를 실행하는 작업."""
+    shared = _ingest.SharedUpload(file)
+
+    def run(progress):
+        progress(0.0, "파싱 중")
+        return ingest(shared, plan=plan)
+
+    return _jobs.submit(("pipeline.ingest", _ingest.content_hash(file), plan), run, name="pipeline.ingest")
+
+
+def ingest_parts_job(parts, columns=None):
+    """ingest_parts를 실행하는 작업. 끝난 파일·시트 수로 진행률을 알립니다."""
+    shared = [(_ingest.SharedUpload(file), plan) for file, plan in parts]
+    columns = None if columns is None else tuple(columns)
+    key = ("pipeline.ingest_parts", tuple((_ingest.content_hash(f), p) for f, p in parts), columns)
+    return _jobs.submit(key, ingest_parts, shared, columns, name="pipeline.ingest_parts")
+
+
+def aggregate_facility_streaming_job(file, region_col, plan=None):
+    """aggregate_facility_streaming을 실행하는 작업. 읽은 위치로 진행률을 알립니다."""
+    shared = _ingest.SharedUpload(file)
+    return _jobs.submit(
+        ("pipeline.aggregate_facility_streaming", _ingest.content_hash(file), region_col, plan),
+        aggregate_facility_streaming, shared, region_col, plan,
+        name="pipeline.aggregate_facility_streaming",
+    )
+
+
+def region_cube_job(frame, region_col, value_cols=(), drop_subtotals=False):
+    """region_cube를 실행하는 작업."""
+    def run(progress):
+        progress(0.0, "지역 계층 집계 중")
+        return region_cube(frame, region_col, value_cols, drop_subtotals)
+
+    key = ("pipeline.region_cube", frame.token, region_col, tuple(value_cols), drop_subtotals)
+    return _jobs.submit(key, run, name="pipeline.region_cube")
+
+
+def aggregate_facility_ledger_job(frame, id_col, region_col, name):
+    """aggregate_facility_ledger를 실행하는 작업.
+
+    키에 원장의 현재 리비전을 넣으므로, 그사이 다른 파일을 반영했다면 같은 frame도 다시 반영합니다. (A → B → A)
+    """
+    def run(progress):
+        progress(0.0, f"원장 '{name}'과 비교 중")
+        return aggregate_facility_ledger(frame, id_col, region_col, name)
+
+    key = ("pipeline.aggregate_facility_ledger", frame.token, id_col, region_col, name, _ledger.revision(name))
+    return _jobs.submit(key, run, name="pipeline.aggregate_facility_ledger")
@@ -0,0 +1,286 @@
+"""로컬 주가 저장소.
+
+종목·날짜별 종가를 SQLite(data/prices.sqlite)에 보관하고, 이미 받아 둔 구간은
+다시 요청하지 않습니다. 저장된 구간 앞뒤로 빠진 부분(보통 마지막 날짜 이후)만
+데이터 소스에서 가져옵니다.
+
+빠진 구간들은 utils.fetch 스케줄러로 동시에(재시도·제한 시간·요청 속도 제한 포함) 받습니다.
+데이터 소스는 fetch(ticker, start, end) -> 종가 Series 하나만 구현하면 됩니다.
+PRICE_DATA_DIR 환경변수를 지정하면 yfinance 대신 <디렉터리>/<티커>.csv를 읽는
+오프라인 소스를 씁니다.
+"""
+import os
+import re
+import sqlite3
+import threading
+import time
+from datetime import date, timedelta
+
+import pandas as pd
+
+from utils import fetch, jobs
+from utils.cache import LRUCache
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+DEFAULT_DB_PATH = os.path.join(DATA_DIR, "prices.sqlite")
+
+# 종목 목록 파일의 첫 줄이 머리글인지 가리는 데 씁니다. (예: 005930.KS, BRK-B, ^GSPC, KRW=X)
+TICKER_PATTERN = re.compile(r"^[A-Z0-9^][A-Z0-9.^=-]{0,19}$")
+HEADER_NAMES = {"TICKER", "TICKERS", "SYMBOL", "CODE", "티커", "종목", "종목코드", "코드"}
+
+# 오늘 날짜 구간은 장중에 바뀔 수 있어 확인 완료로 기록하지 않고, 이 간격(초)마다만 다시 받습니다.
+TODAY_REFRESH_SECONDS = 15 * 60
+
+# 저장소에서 읽은 wide 종가표. 키에 저장소 버전이 들어가므로 새로 저장하면 자연히 다시 읽습니다.
+# (다른 프로세스가 같은 파일에 쓰는 경우를 위해 유효 시간도 둡니다)
+_frames = LRUCache(max_entries=32, max_bytes=256 * 1024 ** 2, ttl=TODAY_REFRESH_SECONDS, name="prices.frames")
+
+
+# -----------------------------
+# 데이터 소스
+# -----------------------------
+class PriceSource:
+    """종가 데이터 소스. fetch는 [start, end] 구간의 종가를 날짜 인덱스 Series로 돌려줍니다."""
+
+    name = "base"
+
+    def fetch(self, ticker, start, end):
+        raise NotImplementedError
+
+
+class YFinanceSource(PriceSource):
+    """야후 파이낸스 (수정 종가)."""
+
+    name = "yfinance"
+
+    def fetch(self, ticker, start, end):
+        import yfinance as yf
+
+        # yfinance의 end는 해당 날짜를 포함하지 않으므로 하루 뒤로 넘깁니다.
+        data = yf.download(ticker, start=start, end=end + timedelta(days=1), auto_adjust=True, progress=False)
+        if data.empty:
+            return pd.Series(dtype="float64")
+        if isinstance(data.columns, pd.MultiIndex):
+            data.columns = data.columns.get_level_values(0)
+        return data["Close"].dropna()
+
+
+class CSVSource(PriceSource):
+    """<디렉터리>/<티커>.csv (Date, Close 컬럼)를 읽는 오프라인 소스."""
+
+    name = "csv"
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def fetch(self, ticker, start, end):
+        path = os.path.join(self.directory, f"{ticker}.csv")
+        if not os.path.exists(path):
+            return pd.Series(dtype="float64")
+        df = pd.read_csv(path, parse_dates=["Date"], index_col="Date")
+        close = df["Close"].sort_index()
+        return close.loc[pd.Timestamp(start):pd.Timestamp(end)].dropna()
+
+
+def default_source():
+    """PRICE_DATA_DIR이 있으면 CSV 소스, 없으면 yfinance 소스를 돌려줍니다."""
+    directory = os.environ.get("PRICE_DATA_DIR")
+    return CSVSource(directory) if directory else YFinanceSource()
+
+
+# -----------------------------
+# 저장소
+# -----------------------------
+class PriceStore:
+    """(ticker, date) 키의 종가 테이블과 종목별로 확인을 마친 구간(coverage)을 보관합니다."""
+
+    def __init__(self, path=DEFAULT_DB_PATH):
+        self.path = path
+        # 쓸 때마다 올라가는 번호. 읽기 캐시 키에 씁니다.
+        self.version = 0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS prices ("
+                "ticker TEXT NOT NULL, date TEXT NOT NULL, close REAL NOT NULL, PRIMARY KEY (ticker, date))"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS coverage ("
+                "ticker TEXT NOT NULL, source TEXT NOT NULL, start TEXT NOT NULL, end TEXT NOT NULL, "
+                "PRIMARY KEY (ticker, source))"
+            )
+
+    def _connect(self):
+        return sqlite3.connect(self.path)
+
+    def coverage(self, ticker, source):
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT start, end FROM coverage WHERE ticker = ? AND source = ?", (ticker, source)
+            ).fetchone()
+        return (date.fromisoformat(row[0]), date.fromisoformat(row[1])) if row else None
+
+    def write(self, ticker, source, close, start, end):
+        """종가를 저장하고 확인한 구간을 [start, end]만큼 넓힙니다. 오늘은 확인 구간에서 뺍니다.
+
+        받은 종가가 없으면(휴장일 구간이거나, yfinance가 오류를 삼키고 빈 표를 준 경우) 확인 구간을
+        넓히지 않습니다. 빈 결과로 구간을 넓히면 그 구간은 다시는 받지 않기 때문입니다.
+        """
+        if close.empty:
+            return
+        end = min(end, date.today() - timedelta(days=1))
+        rows = [(ticker, ts.date().isoformat(), float(v)) for ts, v in close.items()]
+        with self._lock, self._connect() as conn:
+            conn.executemany("INSERT OR REPLACE INTO prices VALUES (?, ?, ?)", rows)
+            self.version += 1
+            old = conn.execute(
+                "SELECT start, end FROM coverage WHERE ticker = ? AND source = ?", (ticker, source)
+            ).fetchone()
+            if old:
+                start = min(start, date.fromisoformat(old[0]))
+                end = max(end, date.fromisoformat(old[1]))
+            if end < start:
+                return
+            conn.execute(
+                "INSERT OR REPLACE INTO coverage VALUES (?, ?, ?, ?)",
+                (ticker, source, start.isoformat(), end.isoformat()),
+            )
+
+    def read_long(self, tickers, start, end):
+        """종가를 (date, ticker, close) long 형식 DataFrame으로 읽습니다."""
+        placeholders = ",".join("?" * len(tickers))
+        with self._connect() as conn:
+            long = pd.read_sql_query(
+                f"SELECT date, ticker, close FROM prices WHERE ticker IN ({placeholders}) "
+                "AND date BETWEEN ? AND ? ORDER BY date",
+                conn,
+                params=[*tickers, start.isoformat(), end.isoformat()],
+            )
+        long["date"] = pd.to_datetime(long["date"])
+        return long
+
+    def read(self, tickers, start, end):
+        """종목별 종가를 날짜 × 종목 wide DataFrame으로 읽습니다.
+
+        같은 조회는 모든 세션이 캐시된 표를 함께 쓰므로 돌려받은 표를 수정하지 마세요.
+        """
+        key = (self.path, self.version, tuple(tickers), start, end)
+        return _frames.get_or_compute(key, lambda: to_wide(self.read_long(tickers, start, end), tickers))
+
+
+def to_wide(long, tickers=None):
+    """(date, ticker, close) long 형식을 날짜 × 종목 wide 형식으로 바꿉니다."""
+    wide = long.pivot(index="date", columns="ticker", values="close")
+    if tickers is not None:
+        wide = wide.reindex(columns=[t for t in tickers if t in wide.columns])
+    return wide
+
+
+def missing_ranges(covered, start, end):
+    """확인을 마친 구간 covered를 제외하고 [start, end]에서 새로 받아야 할 구간 목록."""
+    if covered is None:
+        return [(start, end)]
+    ranges = []
+    if start < covered[0]:
+        ranges.append((start, covered[0] - timedelta(days=1)))
+    if end > covered[1]:
+        ranges.append((covered[1] + timedelta(days=1), end))
+    return ranges
+
+
+_default_store = None
+_recent_fetches = {}
+
+
+def get_store():
+    """프로세스 전체가 함께 쓰는 기본 저장소."""
+    global _default_store
+    if _default_store is None:
+        _default_store = PriceStore()
+    return _default_store
+
+
+def iter_refresh(tickers, start, end, source=None, store=None, **schedule):
+    """저장소에 없는 구간만 동시에 받아 저장하며, 구간 하나가 끝날 때마다 FetchResult를 내어줍니다.
+
+    FetchResult.key는 (ticker, 시작일, 종료일)입니다. schedule은 utils.fetch.iter_fetch 옵션입니다.
+    """
+    source = source or default_source()
+    store = store or get_store()
+    now = time.monotonic()
+    jobs = []
+    for ticker in tickers:
+        for lo, hi in missing_ranges(store.coverage(ticker, source.name), start, end):
+            if now - _recent_fetches.get((store.path, source.name, ticker, lo, hi), -TODAY_REFRESH_SECONDS) < TODAY_REFRESH_SECONDS:
+                continue
+            jobs.append((ticker, lo, hi))
+    for result in fetch.iter_fetch(jobs, lambda job: source.fetch(*job), **schedule):
+        if result.ok:
+            ticker, lo, hi = result.key
+            store.write(ticker, source.name, result.value, lo, hi)
+            _recent_fetches[(store.path, source.name, ticker, lo, hi)] = now
+        yield result
+
+
+def refresh(tickers, start, end, source=None, store=None, **schedule):
+    """저장소에 없는 구간을 모두 받아 저장하고, 실패한 구간의 FetchResult 목록을 돌려줍니다."""
+    return [r for r in iter_refresh(tickers, start, end, source, store, **schedule) if not r.ok]
+
+
+def refresh_job(tickers, start, end, source=None, store=None, **schedule):
+    """refresh를 백그라운드 작업(utils.jobs)으로 실행합니다. 결과는 refresh와 같은 실패 목록입니다.
+
+    종목 하나를 받을 때마다 진행률을 알리므로, 그사이 저장소를 읽어 부분 결과를 그릴 수 있습니다.
+    """
+    source = source or default_source()
+    store = store or get_store()
+    tickers = list(tickers)
+
+    def run(progress):
+        failed, finished = [], set()
+        for result in iter_refresh(tickers, start, end, source, store, **schedule):
+            ticker = result.key[0]
+            finished.add(ticker)
+            if not result.ok:
+                failed.append(result)
+            progress(len(finished) / len(tickers), f"{ticker} {'수신 완료' if result.ok else '실패'}")
+        return failed
+
+    key = ("prices.refresh", store.path, source.name, tuple(tickers), start, end)
+    return jobs.submit(key, run, name="prices.refresh", ttl=TODAY_REFRESH_SECONDS)
+
+
+def get_prices_long(tickers, start, end, source=None, store=None, **schedule):
+    """[start, end] 구간의 종가를 (date, ticker, close) long 형식으로 돌려줍니다."""
+    start, end = pd.Timestamp(start).date(), pd.Timestamp(end).date()
+    store = store or get_store()
+    refresh(tickers, start, end, source, store, **schedule)
+    return store.read_long(list(tickers), start, end)
+
+
+def get_prices(tickers, start, end, source=None, store=None, **schedule):
+    """[start, end] 구간의 종가를 날짜 × 종목 wide DataFrame으로 돌려줍니다."""
+    return to_wide(get_prices_long(tickers, start, end, source, store, **schedule), list(tickers))
+
+
+def parse_universe(text):
+    """'티커[,이름]' 형식의 줄 목록을 {티커: 이름} 사전으로 바꿉니다. 빈 줄과 '#' 주석은 무시합니다.
+
+    첫 줄이 '티커,이름' 같은 머리글(알려진 머리글 이름이거나 티커 형식이 아닌 값)이면 건너뜁니다.
+    """
+    universe = {}
+    first = True
+    for line in text.splitlines():
+        line = line.split("#", 1)[0].strip()
+        if not line:
+            continue
+        ticker, _, name = line.partition(",")
+        ticker = ticker.strip().upper()
+        if first:
+            first = False
+            if ticker in HEADER_NAMES or not TICKER_PATTERN.match(ticker):
+                continue
+        if ticker:
+            universe[ticker] = name.strip() or ticker
+    return universe
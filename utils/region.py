@@ -0,0 +1,134 @@
+"""시도 명칭 정규화와 시도/시군구/읍면동 계층 분해.
+
+주소나 지역명 앞부분에서 시도를 찾아 GeoJSON과 같은 공식 명칭으로 바꿉니다.
+정식 명칭, 약칭, 옛 명칭(강원도·전라북도 등)을 모두 인식합니다.
+split_regions는 그 뒤에 이어지는 시군구·읍면동까지 나눕니다.
+
+행마다 비교하지 않고 고유값 단위로 한 번씩만 판별한 뒤 전체 행에 되돌려 적용하므로,
+수백만 행의 주소도 빠르게 처리합니다.
+"""
+import re
+
+import numpy as np
+import pandas as pd
+
+# 공식 명칭 → 함께 인식할 약칭/옛 명칭
+SIDO_ALIASES = {
+    "서울특별시": ("서울", "서울시"),
+    "부산광역시": ("부산", "부산시"),
+    "대구광역시": ("대구", "대구시"),
+    "인천광역시": ("인천", "인천시"),
+    "광주광역시": ("광주광역", ),
+    "대전광역시": ("대전", "대전시"),
+    "울산광역시": ("울산", "울산시"),
+    "세종특별자치시": ("세종", "세종시"),
+    "경기도": ("경기", ),
+    "강원특별자치도": ("강원", "강원도"),
+    "충청북도": ("충북", ),
+    "충청남도": ("충남", ),
+    "전북특별자치도": ("전북", "전라북도"),
+    "전라남도": ("전남", ),
+    "경상북도": ("경북", ),
+    "경상남도": ("경남", ),
+    "제주특별자치도": ("제주", "제주도"),
+}
+SIDO_NAMES = list(SIDO_ALIASES)
+
+# '광주'는 경기도 광주시와 겹치므로 단독 토큰일 때만 광주광역시로 봅니다.
+_EXACT_ONLY = {"광주": "광주광역시"}
+
+_LOOKUP = {name: name for name in SIDO_NAMES}
+for _name, _aliases in SIDO_ALIASES.items():
+    _LOOKUP.update({alias: _name for alias in _aliases})
+
+# 긴 명칭부터 비교해야 '서울특별시'가 '서울'보다 먼저 잡힙니다.
+_PATTERN = re.compile(r"\s*(" + "|".join(sorted(map(re.escape, _LOOKUP), key=len, reverse=True)) + ")")
+_MAX_LEN = max(map(len, _LOOKUP))
+
+
+LEVELS = ("시도", "시군구", "읍면동")
+
+# 세종시는 시군구가 없으므로 경계 데이터(KOSTAT)와 같은 이름을 시군구로 씁니다.
+_SEJONG = ("세종특별자치시", "세종시")
+_SIGUNGU_SUFFIXES = ("시", "군", "구")
+_DONG = re.compile(r"^[가-힣0-9.·]+[읍면동가]$")
+# 도로명주소 끝의 참고항목. 예: '... 세종대로 175 (세종로)', '... (매산로1가, 래미안)'
+_REFERENCE_DONG = re.compile(r"\(([가-힣0-9.·]+[동가])[,)]")
+
+
+def _split_sido(name):
+    # (시도 공식 명칭, 시도 뒤의 나머지 문자열). 시도를 찾지 못하면 (None, None).
+    if not isinstance(name, str):
+        return None, None
+    stripped = name.strip()
+    token = stripped.split(" ", 1)[0] if stripped else ""
+    if token in _EXACT_ONLY:
+        return _EXACT_ONLY[token], stripped[len(token):]
+    match = _PATTERN.match(name)
+    return (_LOOKUP[match.group(1)], name[match.end():]) if match else (None, None)
+
+
+def normalize_region(name):
+    """값 하나를 시도 공식 명칭으로 바꿉니다. 인식하지 못하면 None을 돌려줍니다."""
+    return _split_sido(name)[0]
+
+
+def parse_region(name):
+    """주소/지역명 하나를 (시도, 시군구, 읍면동)으로 나눕니다. 찾지 못한 수준은 None입니다.
+
+    일반구가 있는 시는 경계 데이터처럼 붙여 씁니다. (예: '수원시 팔달구' → '수원시팔달구')
+    """
+    sido, rest = _split_sido(name)
+    if sido is None:
+        return None, None, None
+    tokens = rest.split()
+    if sido == _SEJONG[0]:
+        sigungu, i = _SEJONG[1], 0
+    elif tokens and tokens[0].endswith(_SIGUNGU_SUFFIXES):
+        sigungu, i = tokens[0], 1
+        if sigungu.endswith("시") and len(tokens) > 1 and tokens[1].endswith("구"):
+            sigungu, i = sigungu + tokens[1], 2
+    else:
+        return sido, None, None
+    if i < len(tokens) and _DONG.match(tokens[i]):
+        return sido, sigungu, tokens[i]
+    match = _REFERENCE_DONG.search(rest)
+    return sido, sigungu, match.group(1) if match else None
+
+
+def normalize_regions(values):
+    """Series(주소 또는 지역명)를 시도 공식 명칭 Series로 바꿉니다. 인식하지 못한 값은 NaN입니다."""
+    values = pd.Series(values)
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        # 범주형은 범주 목록만 판별하고 코드로 되돌립니다.
+        codes = values.cat.codes.to_numpy()
+        mapped = normalize_regions(pd.Series(values.cat.categories)).to_numpy(dtype=object)
+        lookup = np.append(mapped, None)
+    else:
+        # 시도 판별에는 앞부분만 필요하므로 잘라낸 뒤 고유값으로 묶습니다.
+        try:
+            heads = values.str.slice(0, _MAX_LEN + 2)
+        except AttributeError:
+            # 문자열이 없는 컬럼(숫자 등)에는 시도명이 있을 수 없습니다.
+            return pd.Series(np.nan, index=values.index, dtype=object)
+        codes, uniques = pd.factorize(heads)
+        lookup = np.array([normalize_region(u) for u in uniques] + [None], dtype=object)
+    # factorize/cat.codes의 -1(결측)은 마지막 None으로 연결됩니다.
+    result = pd.Series(lookup[codes], index=values.index, dtype=object)
+    return result.where(result.notna(), np.nan)
+
+
+def split_regions(values):
+    """Series를 시도·시군구·읍면동 세 컬럼(LEVELS)의 DataFrame으로 나눕니다. 찾지 못한 수준은 NaN입니다."""
+    values = pd.Series(values)
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        codes, uniques = values.cat.codes.to_numpy(), values.cat.categories
+    elif values.dtype == object or pd.api.types.is_string_dtype(values.dtype):
+        # 주소는 고유값이 많아 잘라낼 수 없으므로(참고항목이 끝에 있음) 값 그대로 묶습니다.
+        codes, uniques = pd.factorize(values)
+    else:
+        return pd.DataFrame(np.nan, index=values.index, columns=list(LEVELS), dtype=object)
+    table = np.empty((len(uniques) + 1, len(LEVELS)), dtype=object)
+    table[:-1] = [parse_region(u) for u in uniques] if len(uniques) else np.empty((0, len(LEVELS)))
+    result = pd.DataFrame(table[codes], index=values.index, columns=list(LEVELS))
+    return result.where(result.notna(), np.nan)
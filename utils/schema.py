@@ -0,0 +1,184 @@
+"""표본 기반 스키마 판별과 읽기 계획.
+
+업로드 파일 전체를 파싱하기 전에 앞부분(최대 SAMPLE_BYTES, SAMPLE_ROWS행)만 읽어
+인코딩, 머리글 행(KOSIS 두 줄 머리글 포함), 컬럼별 자료형, 지역/인구 컬럼을 정하고,
+본 읽기는 그 계획(header, usecols, dtype)대로 한 번만 수행합니다.
+"""
+import io
+from dataclasses import dataclass, replace
+
+import pandas as pd
+
+from utils.cache import LRUCache
+from utils.encoding import PREFIX_BYTES, detect_encoding, read_prefix
+
+SAMPLE_ROWS = 500
+SAMPLE_BYTES = 1024 ** 2
+# 머리글로 볼 수 있는 최대 행 수 (KOSIS는 두 줄)
+MAX_HEADER_ROWS = 5
+# 표본에서 고유값 비율이 이보다 낮은 문자열 컬럼은 범주형으로 읽습니다.
+CATEGORY_RATIO = 0.5
+# 천 단위 쉼표("356,186")나 결측 표시("-")가 섞여 문자열로 읽히는 숫자 컬럼 (KOSIS 등).
+# 문자열로 읽은 뒤 coerce()에서 숫자로 바꿉니다.
+NUMERIC_TEXT = "numeric_text"
+MISSING_MARKS = ("-", "")
+
+_plans = LRUCache(max_entries=32, ttl=60 * 60, name="schema.plans")
+
+
+@dataclass(frozen=True)
+class ReadPlan:
+    kind: str
+    encoding: object
+    header: int
+    columns: tuple
+    dtypes: tuple
+    usecols: tuple = None
+    region_col: object = None
+    target_col: object = None
+    # XLSX에서 읽을 시트 이름 (None: 첫 번째 시트)
+    sheet: object = None
+    # 읽은 뒤 바꿀 컬럼 이름 ((원래 이름, 새 이름), ...)
+    renames: tuple = ()
+
+    @property
+    def numeric_cols(self):
+        return tuple(col for col, dtype in self.dtypes if dtype in ("Int64", "float64", NUMERIC_TEXT))
+
+    def select(self, columns):
+        """읽을 컬럼을 columns로 제한한 계획. 순서는 파일의 컬럼 순서를 따릅니다."""
+        return replace(self, usecols=tuple(c for c in self.columns if c in set(columns)))
+
+    def rename(self, mapping):
+        """읽은 뒤 컬럼 이름을 mapping({원래 이름: 새 이름})대로 바꾸는 계획.
+
+        파일·시트마다 이름이 다른 컬럼(예: 도로명전체주소/소재지전체주소)을 한 컬럼으로 합칠 때 씁니다.
+        """
+        return replace(self, renames=tuple((old, new) for old, new in mapping.items() if old != new))
+
+    def read_kwargs(self, typed=True):
+        """pd.read_csv / pd.read_excel에 넘길 인자."""
+        kwargs = {"header": self.header}
+        if self.usecols is not None:
+            kwargs["usecols"] = list(self.usecols)
+        if typed:
+            wanted = self.columns if self.usecols is None else self.usecols
+            kwargs["dtype"] = {
+                col: "str" if dtype == NUMERIC_TEXT else dtype for col, dtype in self.dtypes if col in wanted
+            }
+        if self.kind == "csv":
+            kwargs["encoding"] = self.encoding
+        elif self.sheet is not None:
+            kwargs["sheet_name"] = self.sheet
+        return kwargs
+
+    def coerce(self, df):
+        """읽은 df에서 숫자 문자열 컬럼(NUMERIC_TEXT)을 숫자로 바꾸고 renames대로 컬럼 이름을 바꿉니다.
+
+        숫자로 바꿀 수 없는 값은 NaN입니다.
+        """
+        text_cols = [col for col, dtype in self.dtypes if dtype == NUMERIC_TEXT and col in df.columns]
+        if text_cols:
+            df = df.copy()
+            for col in text_cols:
+                df[col] = to_number(df[col])
+        return df.rename(columns=dict(self.renames)) if self.renames else df
+
+
+def to_number(values):
+    """'356,186'·'-' 같은 숫자 문자열을 숫자로 바꿉니다. ('-'와 빈 문자열은 결측)"""
+    text = values.astype("str").str.strip().str.replace(",", "", regex=False)
+    return pd.to_numeric(text.mask(text.isin(MISSING_MARKS)), errors="coerce")
+
+
+def pick_column(columns, hints):
+    """hints 순서대로 이름에 힌트(들)가 모두 들어간 첫 컬럼을 고릅니다. 없으면 None."""
+    for hint in hints:
+        parts = (hint,) if isinstance(hint, str) else hint
+        for col in columns:
+            if all(p in str(col) for p in parts):
+                return col
+    return None
+
+
+def _sample_buffer(file, kind):
+    if kind == "xlsx":
+        # XLSX는 압축 파일이라 앞부분만 자를 수 없습니다. read_excel(nrows)이 앞 행만 읽습니다.
+        return file
+    prefix = read_prefix(file, SAMPLE_BYTES)
+    if len(prefix) == SAMPLE_BYTES:
+        # 마지막 줄은 잘렸을 수 있으므로 버립니다.
+        prefix = prefix[:prefix.rfind(b"\n") + 1] or prefix
+    return io.BytesIO(prefix)
+
+
+def _read(buffer, kind, encoding, sheet=None, **kwargs):
+    buffer.seek(0)
+    try:
+        if kind == "csv":
+            return pd.read_csv(buffer, encoding=encoding, **kwargs)
+        return pd.read_excel(buffer, sheet_name=0 if sheet is None else sheet, **kwargs)
+    finally:
+        buffer.seek(0)
+
+
+def _header_row(rows):
+    # KOSIS 파일은 첫 칸이 같은 머리글 행이 이어지고, 마지막 머리글 행이 실제 컬럼명입니다.
+    # (예: 행정구역별 | 2024 | 2024  /  행정구역별 | 독거노인가구비율 | 65세이상 1인가구(A))
+    if rows.empty:
+        return 0
+    first = str(rows.iat[0, 0]).strip()
+    header = 0
+    while header + 1 < min(len(rows), MAX_HEADER_ROWS) and str(rows.iat[header + 1, 0]).strip() == first:
+        header += 1
+    return header
+
+
+def _is_numeric_text(values):
+    # 쉼표를 빼고 결측 표시를 지웠을 때 남은 값이 모두 숫자이고, 숫자가 하나 이상 있는지
+    if not len(values) or not (values.dtype == object or pd.api.types.is_string_dtype(values.dtype)):
+        return False
+    text = values.astype("str").str.strip().str.replace(",", "", regex=False)
+    text = text[~text.isin(MISSING_MARKS)]
+    return bool(len(text)) and pd.to_numeric(text, errors="coerce").notna().all()
+
+
+def _plan_dtype(values):
+    # 표본이 비어 있거나 참/거짓 컬럼은 pandas 기본 추론에 맡깁니다.
+    if values.isna().all() or pd.api.types.is_bool_dtype(values.dtype):
+        return None
+    if pd.api.types.is_integer_dtype(values.dtype):
+        # 표본 뒤쪽에 빈 칸이 있어도 자료형 지정 읽기가 실패하지 않도록 결측을 담을 수 있는 정수로 읽습니다.
+        return "Int64"
+    if pd.api.types.is_float_dtype(values.dtype):
+        return "float64"
+    non_null = values.dropna()
+    if _is_numeric_text(non_null):
+        return NUMERIC_TEXT
+    if len(non_null) and non_null.nunique() <= CATEGORY_RATIO * len(non_null):
+        return "category"
+    return None
+
+
+def infer(file, kind, region_hints=(), target_hints=(), sheet=None):
+    """업로드 파일의 앞부분만 읽어 ReadPlan을 만듭니다. sheet는 XLSX의 시트 이름입니다. (None: 첫 번째 시트)"""
+    sample = _sample_buffer(file, kind)
+    encoding = detect_encoding(sample.getvalue()[:PREFIX_BYTES]) if kind == "csv" else None
+    rows = _read(sample, kind, encoding, sheet, header=None, nrows=MAX_HEADER_ROWS, dtype=str)
+    header = _header_row(rows)
+    df = _read(sample, kind, encoding, sheet, header=header, nrows=SAMPLE_ROWS)
+    dtypes = tuple((col, dtype) for col in df.columns if (dtype := _plan_dtype(df[col])) is not None)
+    plan = ReadPlan(kind, encoding, header, tuple(df.columns), dtypes, sheet=sheet)
+    return replace(
+        plan,
+        region_col=pick_column(plan.columns, region_hints),
+        target_col=pick_column(plan.numeric_cols, target_hints),
+    )
+
+
+def infer_cached(key, file, kind, region_hints=(), target_hints=(), sheet=None):
+    """infer 결과를 key(업로드 내용 해시 등)로 캐시합니다."""
+    return _plans.get_or_compute(
+        (key, kind, tuple(region_hints), tuple(target_hints), sheet),
+        lambda: infer(file, kind, region_hints, target_hints, sheet),
+    )
@@ -0,0 +1,135 @@
+"""업로드 데이터의 컬럼형 스냅샷.
+
+한 번 읽어 정리한 DataFrame을 data/snapshots/<이름>/ 아래에 컬럼마다 .npy 파일로
+저장합니다. 문자열 컬럼(지역명 등)은 사전 인코딩(정수 코드 + 고유값 목록)해서 저장하고,
+불러올 때는 np.load(mmap_mode="r")로 파일을 메모리 매핑하므로 XLSX/CSV를 다시 파싱하지
+않고 필요한 부분만 디스크에서 읽습니다.
+
+    data/snapshots/<이름>/manifest.json   컬럼 목록·형식·행 수·저장 식별자
+    data/snapshots/<이름>/<번호>.npy        숫자/날짜 값 또는 사전 코드 (시간대가 있는 날짜는 UTC 기준)
+    data/snapshots/<이름>/<번호>.dict.json  사전 인코딩된 컬럼의 고유값 목록
+"""
+import json
+import os
+import re
+import shutil
+import time
+import uuid
+
+import numpy as np
+import pandas as pd
+
+SNAPSHOT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "snapshots")
+FORMAT_VERSION = 1
+
+_NAME_PATTERN = re.compile(r"^[\w가-힣][\w가-힣.-]{0,63}$")
+
+
+def _dir(name):
+    if not _NAME_PATTERN.match(name):
+        raise ValueError(f"스냅샷 이름에는 한글·영문·숫자·'_', '-', '.'만 쓸 수 있습니다: {name!r}")
+    return os.path.join(SNAPSHOT_DIR, name)
+
+
+def safe_name(text):
+    """파일 이름 등을 스냅샷 이름으로 쓸 수 있게 바꿉니다."""
+    name = re.sub(r"[^\w가-힣.-]+", "_", os.path.splitext(text)[0]).strip("._-")
+    return name[:64] or "snapshot"
+
+
+def _encode(values):
+    """문자열/범주형 컬럼을 (int32 코드, 고유값 목록)으로 바꿉니다. 결측은 -1입니다."""
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        codes, categories = values.cat.codes.to_numpy(), values.cat.categories
+    else:
+        codes, categories = pd.factorize(values, use_na_sentinel=True)
+    return codes.astype(np.int32), [str(c) for c in categories]
+
+
+def _to_array(values):
+    """숫자·날짜 컬럼을 메모리 매핑할 수 있는 배열과 manifest에 남길 정보로 바꿉니다."""
+    if isinstance(values.dtype, pd.DatetimeTZDtype):
+        # 시간대가 있는 날짜는 object 배열이 되므로 UTC 기준 datetime64로 저장하고 시간대 이름을 남깁니다.
+        return values.dt.tz_convert("UTC").dt.tz_localize(None).to_numpy(), {"tz": str(values.dt.tz)}
+    array = values.to_numpy()
+    if array.dtype == object:
+        # 결측이 있는 nullable 불리언·정수는 NaN이 있는 실수로 저장합니다.
+        array = values.to_numpy(dtype="float64", na_value=np.nan)
+    return array, {}
+
+
+def save_snapshot(name, df, source=None):
+    """DataFrame을 스냅샷으로 저장합니다. 같은 이름이 있으면 덮어씁니다."""
+    path = _dir(name)
+    tmp = path + ".tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+    columns = []
+    for i, col in enumerate(df.columns):
+        values = df[col]
+        if pd.api.types.is_bool_dtype(values.dtype) or pd.api.types.is_numeric_dtype(values.dtype) or pd.api.types.is_datetime64_any_dtype(values.dtype):
+            array, extra = _to_array(values)
+            np.save(os.path.join(tmp, f"{i}.npy"), array)
+            columns.append({"name": str(col), "kind": "array", **extra})
+        else:
+            codes, categories = _encode(values)
+            np.save(os.path.join(tmp, f"{i}.npy"), codes)
+            with open(os.path.join(tmp, f"{i}.dict.json"), "w", encoding="utf-8") as f:
+                json.dump(categories, f, ensure_ascii=False)
+            columns.append({"name": str(col), "kind": "dictionary"})
+    manifest = {
+        "version": FORMAT_VERSION,
+        "name": name,
+        "rows": len(df),
+        "columns": columns,
+        "source": source,
+        "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+        # 저장할 때마다 새로 만드는 식별자. 같은 초에 덮어쓴 스냅샷도 캐시에서 구분합니다.
+        "id": uuid.uuid4().hex,
+    }
+    with open(os.path.join(tmp, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1)
+    # 다 쓴 다음에 교체해서, 읽는 쪽이 반쯤 쓰인 스냅샷을 보지 않게 합니다.
+    shutil.rmtree(path, ignore_errors=True)
+    os.replace(tmp, path)
+    return manifest
+
+
+def read_manifest(name):
+    with open(os.path.join(_dir(name), "manifest.json"), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def list_snapshots():
+    """저장된 스냅샷 이름 목록 (최근 생성 순)."""
+    if not os.path.isdir(SNAPSHOT_DIR):
+        return []
+    names = [n for n in os.listdir(SNAPSHOT_DIR) if os.path.exists(os.path.join(SNAPSHOT_DIR, n, "manifest.json"))]
+    return sorted(names, key=lambda n: os.path.getmtime(os.path.join(SNAPSHOT_DIR, n, "manifest.json")), reverse=True)
+
+
+def load_snapshot(name, columns=None):
+    """스냅샷을 DataFrame으로 불러옵니다. 숫자 컬럼은 메모리 매핑된 배열을 그대로 씁니다.
+
+    columns를 주면 해당 컬럼 파일만 엽니다. 반환된 DataFrame은 읽기 전용으로 다루세요.
+    """
+    path = _dir(name)
+    manifest = read_manifest(name)
+    data = {}
+    for i, meta in enumerate(manifest["columns"]):
+        if columns is not None and meta["name"] not in columns:
+            continue
+        array = np.load(os.path.join(path, f"{i}.npy"), mmap_mode="r")
+        if meta["kind"] == "dictionary":
+            with open(os.path.join(path, f"{i}.dict.json"), encoding="utf-8") as f:
+                categories = json.load(f)
+            data[meta["name"]] = pd.Categorical.from_codes(array, categories=categories)
+        elif "tz" in meta:
+            data[meta["name"]] = pd.Series(array).dt.tz_localize("UTC").dt.tz_convert(meta["tz"])
+        else:
+            data[meta["name"]] = array
+    return pd.DataFrame(data, copy=False)
+
+
+def delete_snapshot(name):
+    shutil.rmtree(_dir(name), ignore_errors=True)
@@ -0,0 +1,114 @@
+"""KD-tree 기반 최근접 시설 검색.
+
+위경도를 단위 구 위의 3차원 좌표로 바꿔 scipy.spatial.cKDTree에 넣습니다.
+3차원 직선(현) 거리는 대권 거리와 순서가 같으므로 최근접 결과가 정확하고,
+반환 거리는 미터 단위 대권 거리로 변환해 돌려줍니다.
+
+scipy는 가져오는 데 시간이 걸리므로 인덱스를 처음 만들 때 가져옵니다.
+"""
+import hashlib
+
+import numpy as np
+
+from utils import jobs
+from utils.cache import LRUCache
+from utils.distance import EARTH_RADIUS_M
+
+# 백그라운드 최근접 검색에서 진행률을 알리는 단위 (점 개수)
+NEAREST_CHUNK_ROWS = 200_000
+
+# 시설 좌표 해시 → FacilityIndex (재실행 시 트리를 다시 만들지 않음)
+_indexes = LRUCache(max_entries=8, name="spatial.indexes")
+
+# cKDTree 노드 하나의 크기(바이트, 64비트 빌드의 ckdtreenode 구조체)
+_KDTREE_NODE_BYTES = 72
+
+
+def to_unit_xyz(lat, lon):
+    """위도/경도(도) 배열을 단위 구 위의 (N, 3) 좌표로 바꿉니다."""
+    lat = np.radians(np.asarray(lat, dtype=np.float64))
+    lon = np.radians(np.asarray(lon, dtype=np.float64))
+    cos_lat = np.cos(lat)
+    return np.column_stack((cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)))
+
+
+def chord_to_meters(chord):
+    """단위 구 위의 직선 거리를 지표면 대권 거리(m)로 바꿉니다."""
+    return 2.0 * EARTH_RADIUS_M * np.arcsin(np.clip(np.asarray(chord) / 2.0, 0.0, 1.0))
+
+
+def meters_to_chord(meters):
+    """지표면 대권 거리(m)를 단위 구 위의 직선 거리로 바꿉니다."""
+    return 2.0 * np.sin(np.asarray(meters, dtype=np.float64) / (2.0 * EARTH_RADIUS_M))
+
+
+def tree_nbytes(tree):
+    """cKDTree의 대략적인 메모리 크기. 노드 배열은 C++ 쪽에 있어 sys.getsizeof에 잡히지 않습니다."""
+    return tree.data.nbytes + tree.indices.nbytes + tree.size * _KDTREE_NODE_BYTES + 2 * tree.m * 8
+
+
+class FacilityIndex:
+    """시설 좌표에 대한 최근접/반경 검색 인덱스."""
+
+    def __init__(self, lat, lon):
+        from scipy.spatial import cKDTree
+
+        self.size = len(lat)
+        self.tree = cKDTree(to_unit_xyz(lat, lon))
+
+    def nbytes(self):
+        """캐시 크기 계산용 메모리 크기 (utils.cache.estimate_size)."""
+        return tree_nbytes(self.tree)
+
+    def nearest(self, lat, lon, k=1, workers=-1):
+        """각 점에서 가까운 시설 k개의 (거리[m], 시설 위치 인덱스)를 한 번에 구합니다.
+
+        k=1이면 (N,) 배열, k>1이면 (N, k) 배열을 돌려줍니다.
+        """
+        k = min(k, self.size)
+        chord, idx = self.tree.query(to_unit_xyz(lat, lon), k=k, workers=workers)
+        return chord_to_meters(chord), idx
+
+    def within_radius(self, lat, lon, radius_m, workers=-1):
+        """각 점의 반경 radius_m 안에 있는 시설 위치 인덱스 목록을 돌려줍니다."""
+        return self.tree.query_ball_point(to_unit_xyz(lat, lon), r=meters_to_chord(radius_m), workers=workers)
+
+    def count_within_radius(self, lat, lon, radius_m, workers=-1):
+        """각 점의 반경 radius_m 안에 있는 시설 수를 (N,) 배열로 돌려줍니다."""
+        return self.tree.query_ball_point(
+            to_unit_xyz(lat, lon), r=meters_to_chord(radius_m), workers=workers, return_length=True
+        )
+
+
+def coords_hash(lat, lon):
+    """좌표 배열 내용의 해시값을 계산합니다."""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(np.ascontiguousarray(lat, dtype=np.float64).tobytes())
+    digest.update(np.ascontiguousarray(lon, dtype=np.float64).tobytes())
+    return digest.hexdigest()
+
+
+def get_index(lat, lon):
+    """같은 시설 좌표에 대해서는 만들어 둔 인덱스를 재사용합니다."""
+    return _indexes.get_or_compute(coords_hash(lat, lon), lambda: FacilityIndex(lat, lon))
+
+
+def nearest_job(facility_lat, facility_lon, lat, lon, chunk_size=NEAREST_CHUNK_ROWS):
+    """모든 점의 최근접 시설 (거리[m], 시설 위치 인덱스)을 백그라운드 작업(utils.jobs)으로 구합니다.
+
+    chunk_size개 점마다 진행률을 알립니다. 같은 시설·점 좌표면 세션이 달라도 작업 하나를 함께 씁니다.
+    """
+    def run(progress):
+        progress(0.0, "시설 인덱스 준비 중")
+        index = get_index(facility_lat, facility_lon)
+        n = len(lat)
+        meters = np.empty(n, dtype=np.float64)
+        idx = np.empty(n, dtype=np.intp)
+        for start in range(0, n, chunk_size):
+            stop = min(start + chunk_size, n)
+            meters[start:stop], idx[start:stop] = index.nearest(lat[start:stop], lon[start:stop])
+            progress(stop / n, f"{stop:,} / {n:,}명")
+        return meters, idx
+
+    key = ("spatial.nearest", coords_hash(facility_lat, facility_lon), coords_hash(lat, lon))
+    return jobs.submit(key, run, name="spatial.nearest")
@@ -0,0 +1,220 @@
+"""여러 페이지가 함께 쓰는 Streamlit 사이드바 구성 요소."""
+import os
+import threading
+import time
+import tracemalloc
+
+import streamlit as st
+
+from utils import instrument, jobs, pipeline, snapshot
+
+UPLOAD_OPTION = "(업로드 파일 사용)"
+
+# 디버그 패널은 DEBUG_PANEL=1 환경 변수로 모든 세션에 켜거나, DEBUG_PANEL=query로 두고
+# ?debug=1 주소로 연 세션에만 켭니다. (환경 변수가 없으면 주소 인자는 무시합니다)
+DEBUG_PARAM = "debug"
+DEBUG_HISTORY = 20
+MB = 1024 ** 2
+
+# 캐시 관리 페이지(pages/00_cache.py)는 모든 세션의 캐시 키를 보여 주고 비울 수 있으므로
+# 운영자가 CACHE_ADMIN=1로 켠 경우에만 엽니다.
+CACHE_ADMIN_ENV = "CACHE_ADMIN"
+
+# tracemalloc은 프로세스 전체에 적용되므로, 켠 세션이 이 시간(초) 동안 재실행하지 않으면 끕니다.
+TRACE_LEASE_SECONDS = 5 * 60
+
+# 백그라운드 작업 진행률을 다시 그리는 간격(초)과, 진행률을 띄우기 전에 기다려 보는 시간(초)
+JOB_POLL_SECONDS = 0.5
+JOB_GRACE_SECONDS = 0.3
+
+
+def snapshot_picker(label, key):
+    """저장된 스냅샷을 고르는 선택 상자. 스냅샷을 고르면 그 Frame을, 아니면 None을 돌려줍니다."""
+    names = snapshot.list_snapshots()
+    if not names:
+        return None
+    choice = st.sidebar.selectbox(f"{label} 스냅샷 불러오기", [UPLOAD_OPTION] + names, key=f"{key}_snapshot")
+    if choice == UPLOAD_OPTION:
+        return None
+    try:
+        return pipeline.from_snapshot(choice)
+    except Exception as e:
+        st.sidebar.error(f"스냅샷을 불러오지 못했습니다: {e}")
+        return None
+
+
+def snapshot_saver(label, frame, files, key):
+    """업로드한 파일(여러 개면 목록)을 이름을 붙여 스냅샷으로 저장하는 사이드바 양식."""
+    files = files if isinstance(files, (list, tuple)) else [files]
+    default = snapshot.safe_name(files[0].name)
+    if len(files) > 1:
+        # 여러 파일을 합친 표는 첫 파일 이름만으로 구분되지 않게 파일 수를 붙입니다.
+        default = snapshot.safe_name(f"{default}_외{len(files) - 1}개")
+    with st.sidebar.expander(f"{label} 파일을 스냅샷으로 저장"):
+        name = st.text_input("스냅샷 이름", default, key=f"{key}_snapshot_name")
+        if st.button("저장", key=f"{key}_snapshot_save"):
+            try:
+                manifest = pipeline.save_snapshot(name, frame)
+                st.success(f"'{name}' 저장 완료 ({manifest['rows']:,}행). 다음부터는 업로드 없이 불러올 수 있습니다.")
+            except (ValueError, OSError) as e:
+                st.error(f"스냅샷 저장 오류: {e}")
+
+
+# -----------------------------
+# 백그라운드 작업 (utils.jobs)
+# -----------------------------
+def job_progress(job, label, render=None):
+    """job이 끝날 때까지 진행률을 주기적으로 다시 그리고, 끝나면 앱 전체를 다시 실행합니다.
+
+    render를 주면 진행률 아래에 함께 다시 그립니다. (예: 지금까지 받은 데이터로 그린 차트)
+    """
+    @st.fragment(run_every=JOB_POLL_SECONDS)
+    def poll():
+        if job.done:
+            st.rerun()
+        text = f"{label} — {job.message}" if job.message else label
+        st.progress(job.progress, text=f"{text} ({job.elapsed:.0f}초)")
+        if render is not None:
+            render()
+
+    poll()
+
+
+def wait_for(job, label, render=None):
+    """끝난 job의 결과를 돌려줍니다. 아직 실행 중이면 진행률만 보여 주고 이번 재실행을 멈춥니다.
+
+    그사이 위젯을 눌러 재실행해도 같은 키의 작업은 이어서 실행되고, 끝나면 다음 재실행이 결과를 가져갑니다.
+    실패한 작업은 그 예외를 다시 던집니다. 결과가 캐시 상한으로 지워졌으면 재실행해서 다시 계산합니다.
+    """
+    if not job.wait(JOB_GRACE_SECONDS):
+        job_progress(job, label, render)
+        st.stop()
+    try:
+        return job.result()
+    except jobs.ResultEvicted:
+        st.rerun()
+
+
+# -----------------------------
+# 디버그 패널 (utils.instrument)
+# -----------------------------
+def debug_enabled():
+    mode = os.environ.get("DEBUG_PANEL")
+    return mode == "1" or (mode == "query" and st.query_params.get(DEBUG_PARAM) == "1")
+
+
+def cache_admin_enabled():
+    return os.environ.get(CACHE_ADMIN_ENV) == "1"
+
+
+# 세션 id → 추적 유지 기한 (monotonic 시각)
+_trace_leases = {}
+_trace_lock = threading.Lock()
+_trace_timer = None
+# 패널이 켠 추적인지 (PYTHONTRACEMALLOC 등으로 처음부터 켜진 추적은 끄지 않습니다)
+_trace_owned = False
+
+
+def _set_tracing(session, wanted):
+    """session의 tracemalloc 요청을 갱신합니다. 요청한 세션이 하나도 없으면 추적을 끕니다."""
+    global _trace_timer, _trace_owned
+    now = time.monotonic()
+    with _trace_lock:
+        if wanted:
+            _trace_leases[session] = now + TRACE_LEASE_SECONDS
+        else:
+            _trace_leases.pop(session, None)
+        for key in [key for key, until in _trace_leases.items() if until <= now]:
+            del _trace_leases[key]
+        if _trace_leases and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _trace_owned = True
+        elif not _trace_leases and _trace_owned:
+            tracemalloc.stop()
+            _trace_owned = False
+        if _trace_timer is not None:
+            _trace_timer.cancel()
+            _trace_timer = None
+        if _trace_leases:
+            # 세션이 닫혀 재실행이 없어도 기한이 지나면 끄도록 예약합니다.
+            _trace_timer = threading.Timer(min(_trace_leases.values()) - now, _set_tracing, (None, False))
+            _trace_timer.daemon = True
+            _trace_timer.start()
+
+
+def _session_id():
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+        ctx = get_script_run_ctx()
+        return ctx.session_id if ctx is not None else None
+    except ImportError:
+        return None
+
+
+def _stage_rows(run):
+    return [
+        {
+            "단계": "\u3000" * stage.depth + stage.name,
+            "시간(ms)": stage.seconds * 1000 if stage.seconds is not None else None,
+            "RSS 변화(MB)": stage.rss_delta / MB if stage.rss_delta is not None else None,
+            "파이썬 최대(MB)": stage.py_peak_bytes / MB if stage.py_peak_bytes is not None else None,
+            "캐시 적중/미스": ", ".join(f"{name} {c['hits']}/{c['misses']}" for name, c in stage.cache.items()),
+            "오류": stage.error,
+        }
+        for stage in run.stages
+    ]
+
+
+def debug_panel(page):
+    """이번 재실행의 계측을 시작하고, 켜져 있으면 사이드바에 단계별 계측 패널을 그립니다.
+
+    패널은 단계가 끝날 때마다 갱신되므로 st.stop()으로 멈춘 재실행도 그때까지의 단계가 보입니다.
+    패널이 꺼져 있어도 INSTRUMENT_LOG가 있으면 기록만 합니다.
+    """
+    if not debug_enabled():
+        if _trace_leases:
+            _set_tracing(_session_id(), False)
+        if instrument.LOG_PATH:
+            return instrument.begin(page, _session_id())
+        instrument.end()
+        return None
+
+    history = st.session_state.setdefault("instrument_runs", [])
+    with st.sidebar.expander("🛠️ 디버그: 단계별 계측"):
+        # tracemalloc은 프로세스 전체에 적용되고 모든 할당을 느리게 하므로, 켠 세션이 모두 끄거나
+        # TRACE_LEASE_SECONDS 동안 재실행하지 않으면 끕니다.
+        trace = st.checkbox("파이썬 메모리 추적 (tracemalloc)", value=False, key="instrument_tracemalloc")
+        _set_tracing(_session_id(), trace)
+        if history:
+            st.download_button(
+                f"JSON lines 내보내기 (이전 실행 {len(history)}개)",
+                "".join(run.to_jsonl() for run in history),
+                file_name=f"instrument-{page}.jsonl",
+                mime="application/jsonl",
+                key="instrument_export",
+            )
+        placeholder = st.empty()
+
+    def render(run):
+        with placeholder.container():
+            rss = instrument.rss_bytes()
+            st.caption(f"실행 {run.run_id} · {run.seconds:.3f}초" + (f" · RSS {rss / MB:,.0f} MB" if rss else ""))
+            caches = run.cache_delta()
+            if caches:
+                st.caption("캐시 적중/미스 — " + ", ".join(f"{name} {c['hits']}/{c['misses']}" for name, c in caches.items()))
+            st.dataframe(
+                _stage_rows(run),
+                hide_index=True,
+                column_config={
+                    "시간(ms)": st.column_config.NumberColumn(format="%.1f"),
+                    "RSS 변화(MB)": st.column_config.NumberColumn(format="%.1f"),
+                    "파이썬 최대(MB)": st.column_config.NumberColumn(format="%.1f"),
+                },
+            )
+
+    run = instrument.begin(page, _session_id(), on_stage=render)
+    history.append(run)
+    del history[:-DEBUG_HISTORY]
+    render(run)
+    return run
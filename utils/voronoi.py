@@ -0,0 +1,189 @@
+"""행정경계로 자른 Voronoi 서비스 권역.
+
+시설마다 '그 시설이 가장 가까운 영역'(Voronoi 셀)을 만들고 경계 폴리곤으로 잘라냅니다.
+바깥쪽 시설도 빠짐없이 닫힌 셀을 갖도록 멀리 떨어진 보조점 네 개를 함께 넣어 계산합니다.
+
+계산은 위도 기준 경도 축척을 보정한 평면(x = 경도·cos φ0, y = 위도)에서 합니다.
+같은 평면 좌표의 KD-tree 최근접 검색이 곧 '어느 셀에 속하는가'이므로 한 번에 셀을 배정하고,
+경계 안인지는 점마다 자기 셀(잘린 폴리곤)에 대해서만 확인합니다. 잘린 셀들이 경계를 빈틈없이
+나누므로 '자기 셀 안' = '경계 안'입니다. (scipy는 권역을 처음 만들 때 가져옵니다)
+"""
+import numpy as np
+
+from utils.cache import LRUCache, estimate_size
+from utils.spatial import coords_hash, tree_nbytes
+
+# (시설 좌표 해시, 경계 키) → ServiceAreas
+_diagrams = LRUCache(max_entries=8, name="voronoi.diagrams")
+# 포함 검사에서 한 번에 만드는 (점 × 변) 행렬의 최대 칸 수
+_PIP_CHUNK = 1_000_000
+
+
+def bbox_boundary(lat, lon, pad=0.1):
+    """좌표 범위를 pad 비율만큼 넓힌 사각형 경계를 만듭니다."""
+    lat, lon = np.asarray(lat, dtype=np.float64), np.asarray(lon, dtype=np.float64)
+    dlat = max(np.ptp(lat), 0.01) * pad
+    dlon = max(np.ptp(lon), 0.01) * pad
+    south, north = lat.min() - dlat, lat.max() + dlat
+    west, east = lon.min() - dlon, lon.max() + dlon
+    return [[[[west, south], [east, south], [east, north], [west, north], [west, south]]]]
+
+
+def boundary_from_feature(feature):
+    """GeoJSON Feature(Polygon/MultiPolygon)를 폴리곤 목록 [[외곽링, 구멍...], ...]으로 바꿉니다."""
+    geometry = feature["geometry"]
+    if geometry["type"] == "Polygon":
+        return [geometry["coordinates"]]
+    if geometry["type"] == "MultiPolygon":
+        return geometry["coordinates"]
+    raise ValueError(f"경계로 쓸 수 없는 도형입니다: {geometry['type']}")
+
+
+def _clip_ring(ring, cell):
+    """Sutherland–Hodgman: 링(오목해도 됨)을 볼록 셀(반시계 방향)로 잘라냅니다."""
+    points = ring
+    for a, b in zip(cell, np.roll(cell, -1, axis=0)):
+        if len(points) == 0:
+            break
+        edge = b - a
+        side = edge[0] * (points[:, 1] - a[1]) - edge[1] * (points[:, 0] - a[0])
+        inside = side >= 0
+        prev_points = np.roll(points, 1, axis=0)
+        prev_side = np.roll(side, 1)
+        crossing = inside != np.roll(inside, 1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            # 교차하지 않는 변의 t는 쓰이지 않으므로 0/0이어도 무방합니다.
+            t = prev_side / (prev_side - side)
+            intersections = prev_points + t[:, np.newaxis] * (points - prev_points)
+        # 각 꼭짓점 앞에 (교차점), 뒤에 (안쪽이면 자기 자신)을 순서대로 놓습니다.
+        slots = np.stack([intersections, points], axis=1)
+        points = slots[np.column_stack([crossing, inside])]
+    return points
+
+
+def _signed_area(ring):
+    x, y = ring[:, 0], ring[:, 1]
+    return 0.5 * np.sum(x * np.roll(y, -1) - np.roll(x, -1) * y)
+
+
+def _contains(rings, points):
+    """짝홀 규칙 포함 검사. rings는 한 셀의 모든 링(외곽·구멍)이며 닫는 점 없이 받습니다."""
+    inside = np.zeros(len(points), dtype=bool)
+    for ring in rings:
+        a, b = ring, np.roll(ring, -1, axis=0)
+        step = max(1, _PIP_CHUNK // len(ring))
+        for start in range(0, len(points), step):
+            x = points[start:start + step, 0, np.newaxis]
+            y = points[start:start + step, 1, np.newaxis]
+            straddle = (a[:, 1] > y) != (b[:, 1] > y)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                # 수평 변은 straddle이 거짓이라 0/0이어도 무방합니다.
+                cross_x = a[:, 0] + (y - a[:, 1]) * (b[:, 0] - a[:, 0]) / (b[:, 1] - a[:, 1])
+            inside[start:start + step] ^= (np.count_nonzero(straddle & (x < cross_x), axis=1) % 2).astype(bool)
+    return inside
+
+
+class ServiceAreas:
+    """경계로 잘린 시설별 Voronoi 셀과 점 → 셀 배정."""
+
+    def __init__(self, lat, lon, boundary):
+        from scipy.spatial import Voronoi, cKDTree
+
+        lat = np.asarray(lat, dtype=np.float64)
+        lon = np.asarray(lon, dtype=np.float64)
+        self.size = len(lat)
+        self.scale = np.cos(np.radians(lat.mean()))
+        points = np.column_stack((lon * self.scale, lat))
+
+        # 같은 좌표의 시설은 하나의 셀을 공유하고, 먼저 나온 시설에 배정합니다.
+        unique_points, first_idx = np.unique(points, axis=0, return_index=True)
+        self._owner = first_idx
+        self._tree = cKDTree(unique_points)
+
+        polygons = [[self._to_plane(ring) for ring in polygon] for polygon in boundary]
+        all_xy = np.vstack([ring for polygon in polygons for ring in polygon] + [unique_points])
+        center = (all_xy.min(axis=0) + all_xy.max(axis=0)) / 2
+        span = max(np.ptp(all_xy, axis=0).max(), 1e-3) * 10
+        far = center + span * np.array([[-1, -1], [1, -1], [1, 1], [-1, 1]])
+        vor = Voronoi(np.vstack([unique_points, far]))
+
+        self.cells = [[] for _ in range(self.size)]
+        # 포함 검사용: 시설마다 잘린 셀의 평면 좌표 링 (외곽·구멍 구분 없이)
+        self._rings = [[] for _ in range(self.size)]
+        for i, owner in enumerate(first_idx):
+            cell = vor.vertices[vor.regions[vor.point_region[i]]]
+            if _signed_area(cell) < 0:
+                cell = cell[::-1]
+            cell_min, cell_max = cell.min(axis=0), cell.max(axis=0)
+            for polygon in polygons:
+                outer = polygon[0]
+                if np.any(outer.max(axis=0) < cell_min) or np.any(outer.min(axis=0) > cell_max):
+                    continue
+                rings = [_clip_ring(ring, cell) for ring in polygon]
+                # 셀이 경계 변에만 닿으면 넓이 0인 조각이 남으므로 버립니다.
+                if len(rings[0]) < 3 or abs(_signed_area(rings[0])) <= 1e-9 * abs(_signed_area(outer)):
+                    continue
+                rings = [r for r in rings if len(r) >= 3]
+                self.cells[owner].append([self._to_lonlat(r) for r in rings])
+                self._rings[owner].extend(rings)
+
+    def nbytes(self):
+        """캐시 크기 계산용 메모리 크기 (utils.cache.estimate_size). 셀 좌표는 중첩 list입니다."""
+        rings = sum(ring.nbytes for rings in self._rings for ring in rings)
+        return tree_nbytes(self._tree) + self._owner.nbytes + rings + estimate_size(self.cells)
+
+    def _to_plane(self, ring):
+        ring = np.asarray(ring, dtype=np.float64)
+        return np.column_stack((ring[:, 0] * self.scale, ring[:, 1]))
+
+    def _to_lonlat(self, ring):
+        coords = np.column_stack((ring[:, 0] / self.scale, ring[:, 1])).tolist()
+        return coords + coords[:1]
+
+    def assign(self, lat, lon, workers=-1):
+        """각 점이 속한 셀(시설 위치 인덱스)을 한 번에 구합니다. 경계 밖의 점은 -1입니다."""
+        lat = np.asarray(lat, dtype=np.float64)
+        query = np.column_stack((np.asarray(lon, dtype=np.float64) * self.scale, lat))
+        _, idx = self._tree.query(query, workers=workers)
+        owner = self._owner[idx]
+        # 셀별로 나눠 자기 셀에 대해서만 포함 검사를 합니다.
+        order = np.argsort(owner, kind="stable")
+        for chunk in np.split(order, np.flatnonzero(np.diff(owner[order])) + 1):
+            if len(chunk) == 0:
+                continue
+            rings = self._rings[owner[chunk[0]]]
+            inside = _contains(rings, query[chunk]) if rings else np.zeros(len(chunk), dtype=bool)
+            owner[chunk[~inside]] = -1
+        return owner
+
+    def load(self, lat, lon):
+        """(시설별로 배정된 점의 수(셀 부하) (시설 수,) 배열, 경계 밖이라 빠진 점의 수)."""
+        owner = self.assign(lat, lon)
+        inside = owner >= 0
+        return np.bincount(owner[inside], minlength=self.size), int(np.count_nonzero(~inside))
+
+    def to_geojson(self, properties=None):
+        """셀을 GeoJSON FeatureCollection으로 만듭니다. properties[i]는 i번째 시설 셀에 붙습니다."""
+        features = []
+        for i, polygons in enumerate(self.cells):
+            if not polygons:
+                continue
+            features.append({
+                "type": "Feature",
+                "properties": dict(properties[i]) if properties is not None else {"facility": i},
+                "geometry": {"type": "MultiPolygon", "coordinates": polygons},
+            })
+        return {"type": "FeatureCollection", "features": features}
+
+
+def get_service_areas(lat, lon, boundary=None, boundary_key=None):
+    """시설 좌표와 경계가 같으면 만들어 둔 서비스 권역을 재사용합니다.
+
+    boundary를 주지 않으면 시설 좌표 범위의 사각형을 씁니다.
+    boundary를 줄 때는 캐시 구분용 boundary_key(예: 시도명)를 함께 주세요.
+    """
+    if boundary is None:
+        boundary = bbox_boundary(lat, lon)
+        boundary_key = ("bbox",)
+    key = (coords_hash(lat, lon), boundary_key)
+    return _diagrams.get_or_compute(key, lambda: ServiceAreas(lat, lon, boundary))